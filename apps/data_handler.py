@@ -2,26 +2,49 @@
 This class manages data operations.
 """
 import os
+import time
 import pandas as pd
 
 from .configs import SnowflakeConfig
-from .functions import AnnualDataProcessor, DataStorageManager, LoggingManager, QuarterlyDataProcessor, SECAPIClient, SnowflakeDataManager, TransformerManager
-from .queries import ASSET_LIABILITIES, CASH_FLOW, DEBT_MANAGEMENT, LIQUIDITY, MARKET_VALUATION, OPERATIONAL_EFFICIENCY, PROFITABILITY, QUERY_FILES
-from .utils import FileVersionManager
+from .functions import PERIODIC_FORMS, AnnualDataProcessor, BulkArchiveReader, DataStorageManager, LoggingManager, QuarterlyDataProcessor, SECAPIClient, SnowflakeDataManager, StorageCompactor, TransformerManager, concat_fact_frames, latest_filing
+from .queries import ASSET_LIABILITIES, CASH_FLOW, DEBT_MANAGEMENT, LIQUIDITY, MARKET_VALUATION, OPERATIONAL_EFFICIENCY, PROFITABILITY, QUERY_FILES, LocalSQLEngine, QueryResultCache
+from .utils import FileVersionManager, combine_hashes
+
+# Categories prepared from quarterly frames; every other category uses annual (10-K) frames
+QUARTERLY_CATEGORIES = ('Assets and Liabilities', 'Liquidity', 'Profitability')
+# Manifest data sources of the data the Snowflake and embedded SQLite queries read
+SNOWFLAKE_SOURCE = 'snowflake'
+LOCAL_SQL_SOURCE = 'local_sql'
 
 
 class DataPipelineIntegration:
-    def __init__(self, cik_number=None, use_snowflake=True, snowflake_config=None, local_storage_dir='data'):
+    def __init__(self, cik_number=None, use_snowflake=True, snowflake_config=None, local_storage_dir='data',
+                 keep_all_metrics=False, all_units=False, local_sql=False, storage_formats=None, snowflake_upsert=True,
+                 query_cache=True):
         self._init_metrics()
+        # By default only the metrics used by category_metric_map are parsed; keep everything for exploratory work
+        self.keep_all_metrics = keep_all_metrics
+        # Extract every taxonomy and unit (dei shares, USD/shares EPS, ...) into one compact long-format frame
+        self.all_units = all_units
         self.cik_number = cik_number
-        self.data_storage_manager = DataStorageManager(local_storage_dir, cik_number)
+        # Storage type -> 'csv', 'parquet' or 'feather', e.g. COLUMNAR_STORAGE_FORMATS; CSV unless opted in
+        self.storage_formats = storage_formats
+        self.data_storage_manager = DataStorageManager(local_storage_dir, cik_number, storage_formats)
         self.document = FileVersionManager(base_dir=local_storage_dir)
         self.error_handler = LoggingManager()
         self.local_storage_dir = local_storage_dir
         self.use_snowflake = use_snowflake
+        # MERGE reruns into the Snowflake tables instead of appending the whole history again
+        self.snowflake_upsert = snowflake_upsert
         if self.use_snowflake:
             self.snowflake_config = snowflake_config if snowflake_config else SnowflakeConfig()
             self.snowflake_manager = SnowflakeDataManager(self.snowflake_config)
+        # Run the QUERY_FILES on an embedded SQLite copy of the facts instead of the pandas query functions
+        self.sql_engine = None
+        if local_sql and not self.use_snowflake:
+            self.sql_engine = LocalSQLEngine(os.path.join(local_storage_dir, 'local_sql.sqlite'))
+        # Query results keyed by query text and data version, in memory and under <local_storage_dir>/query_cache
+        self.query_cache = QueryResultCache(os.path.join(local_storage_dir, 'query_cache')) if query_cache else None
         self.sec_client = SECAPIClient()
         self.transformer_manager = TransformerManager()
 
@@ -40,9 +63,23 @@ class DataPipelineIntegration:
             # 'Cash Flow': ['NetCashProvidedByUsedInOperatingActivities', 'NetCashProvidedByUsedInInvestingActivities', 'NetCashProvidedByUsedInFinancingActivities']
         }
 
-    def fetch_data(self, cik_number=None):
+    def required_metrics(self):
+        """
+        Get the metrics needed by the configured categories.
+        Returns:
+            set of str: Union of the metrics in category_metric_map.
+        """
+        return {metric for metrics in self.category_metric_map.values() for metric in metrics}
+
+    def _metric_filter(self):
+        return None if self.keep_all_metrics else self.required_metrics()
+
+    def fetch_data(self, cik_number=None, stream=False):
         """
         Fetch data from the SEC API using the given CIK number.
+        Args:
+            cik_number (str, optional): Overrides the pipeline's CIK number.
+            stream (bool): Parse the response incrementally so that peak memory stays bounded for very large filers.
         """
         cik = cik_number if cik_number else self.cik_number
         if not cik:
@@ -50,7 +87,13 @@ class DataPipelineIntegration:
             return {"error": "CIK number is required"}
 
         try:
-            company_facts = self.sec_client.fetch_company_facts(cik)
+            if stream:
+                chunks = list(self.sec_client.iter_company_facts(cik, metrics=self._metric_filter(),
+                                                                 all_units=self.all_units))
+                return concat_fact_frames(chunks)
+
+            company_facts = self.sec_client.fetch_company_facts(cik, metrics=self._metric_filter(),
+                                                                all_units=self.all_units)
             if 'error' in company_facts:
                 self.error_handler.log(f"Error fetching data for CIK {cik}: {company_facts['error']}", "ERROR")
                 return company_facts
@@ -59,6 +102,108 @@ class DataPipelineIntegration:
             self.error_handler.log_error(e, "ERROR")
             return {"error": str(e)}
 
+    def bulk_ingest(self, zip_path, cik_numbers=None, max_workers=None, process=True):
+        """
+        Ingest company facts for many companies from a local SEC companyfacts.zip bulk archive
+        and feed them through the preprocess (and optionally process) stages.
+        Args:
+            zip_path (str): Path to the companyfacts.zip archive.
+            cik_numbers (list of str, optional): Restrict the ingest to these CIK numbers. All companies if None.
+            max_workers (int, optional): Number of parser processes.
+            process (bool): Also run the category queries and store processed data for each company.
+        Returns:
+            dict: CIK number -> 'OK' or an error message.
+        """
+        summary = {}
+        reader = BulkArchiveReader(zip_path, max_workers=max_workers)
+        for cik, company_facts in reader.iter_company_facts(cik_numbers, metrics=self._metric_filter(),
+                                                            all_units=self.all_units):
+            if isinstance(company_facts, dict) and 'error' in company_facts:
+                self.error_handler.log(f"Error parsing bulk data for CIK {cik}: {company_facts['error']}", "ERROR")
+                summary[cik] = company_facts['error']
+                continue
+
+            self._switch_cik(cik)
+            result = self.preprocess_data(company_facts)
+            summary[cik] = result['error'] if result else 'OK'
+
+        ingested = [cik for cik, status in summary.items() if status == 'OK']
+        if ingested and process and not self.use_snowflake:
+            # One stacked query per category over every ingested company
+            result = self.process_and_store_data(cik_numbers=ingested)
+            if result:
+                summary.update({cik: result['error'] for cik in ingested})
+        return summary
+
+    def incremental_refresh(self, cik_numbers, forms=PERIODIC_FORMS, process=True, max_concurrency=8):
+        """
+        Refresh only the companies that filed since their last refresh.
+        The submissions feed of every company is checked first (small, and usually a conditional-GET 304);
+        company facts are fetched and run through the preprocess (and optionally process) stages only for
+        companies whose newest periodic filing differs from the one recorded at their last refresh.
+        Args:
+            cik_numbers (list of str): The companies to refresh.
+            forms (iterable of str): Form types whose filings trigger a refresh.
+            process (bool): Also run the category queries and store processed data for refreshed companies.
+            max_concurrency (int): Maximum number of SEC requests kept in flight.
+        Returns:
+            dict: CIK number -> 'OK', 'up to date' or an error message.
+        """
+        summary = {}
+        last_accessions = self.document.manifest.last_accessions(cik_numbers)
+        new_filings = {}
+        for cik, filings in self.sec_client.fetch_submissions_many(cik_numbers, max_concurrency=max_concurrency):
+            if isinstance(filings, dict) and 'error' in filings:
+                self.error_handler.log(f"Error fetching submissions for CIK {cik}: {filings['error']}", "ERROR")
+                summary[cik] = filings['error']
+                continue
+            filing = latest_filing(filings, forms)
+            if filing is None:
+                summary[cik] = 'up to date'  # Nothing that carries financial data yet
+            elif last_accessions.get(f"{int(cik):010d}") == filing['accessionNumber']:
+                summary[cik] = 'up to date'
+            else:
+                new_filings[cik] = filing
+        self.error_handler.log(f"{len(new_filings)} of {len(cik_numbers)} companies have new filings.", "INFO")
+        if not new_filings:
+            return summary
+
+        for cik, company_facts in self._fetch_company_facts_many(list(new_filings), max_concurrency):
+            if isinstance(company_facts, dict) and 'error' in company_facts:
+                self.error_handler.log(f"Error fetching company facts for CIK {cik}: {company_facts['error']}",
+                                       "ERROR")
+                summary[cik] = company_facts['error']
+                continue
+
+            self._switch_cik(cik)
+            result = self.preprocess_data(company_facts)
+            summary[cik] = result['error'] if result else 'OK'
+
+        refreshed = [cik for cik in new_filings if summary.get(cik) == 'OK']
+        if refreshed and process and not self.use_snowflake:
+            result = self.process_and_store_data(cik_numbers=refreshed)
+            if result:
+                summary.update({cik: result['error'] for cik in refreshed})
+
+        # Only companies that went through every stage are marked as refreshed; the others are retried next run
+        for cik in refreshed:
+            if summary[cik] == 'OK':
+                filing_date = new_filings[cik]['filingDate']
+                self.document.manifest.record_accession(cik, new_filings[cik]['accessionNumber'],
+                                                        None if pd.isna(filing_date) else str(filing_date.date()))
+        return summary
+
+    def _fetch_company_facts_many(self, cik_numbers, max_concurrency):
+        yield from self.sec_client.fetch_company_facts_many(cik_numbers, max_concurrency=max_concurrency,
+                                                            metrics=self._metric_filter(), all_units=self.all_units)
+
+    def _switch_cik(self, cik_number):
+        """
+        Point the pipeline (and its local storage) at another company.
+        """
+        self.cik_number = cik_number
+        self.data_storage_manager = DataStorageManager(self.local_storage_dir, cik_number, self.storage_formats)
+
     def preprocess_data(self, raw_data):
         """
         Preprocess the raw data using the defined metrics, store using FileVersionManager, and store the data.
@@ -67,22 +212,37 @@ class DataPipelineIntegration:
         """
         try:
             df = pd.DataFrame(raw_data)
-            annual_processor = AnnualDataProcessor(df)
-            quarterly_processor = QuarterlyDataProcessor(df)
+            if self.sql_engine:
+                self.sql_engine.load_data(df)
+                self.document.manifest.bump_data_version(LOCAL_SQL_SOURCE)
+            quarterly_categories = {category: metrics for category, metrics in self.category_metric_map.items()
+                                    if category in QUARTERLY_CATEGORIES}
+            annual_categories = {category: metrics for category, metrics in self.category_metric_map.items()
+                                 if category not in QUARTERLY_CATEGORIES}
+            # One filter/parse/sort pass per processor instead of one per category
+            prepared = QuarterlyDataProcessor(df).process_categories(quarterly_categories)
+            prepared.update(AnnualDataProcessor(df).process_categories(annual_categories))
 
-            for category, metrics in self.category_metric_map.items():
-                if category in ['Assets and Liabilities', 'Liquidity', 'Profitability']:
-                    preprocessed_data = quarterly_processor.process_data(metrics)
-                else:
-                    preprocessed_data = annual_processor.process_data(metrics)
+            for category in self.category_metric_map:
+                preprocessed_data = prepared[category]
 
                 if self.use_snowflake:
-                    self.snowflake_manager.upload_data(preprocessed_data, category)
-                    self.error_handler.log(f"Preprocessed data for {category} uploaded to Snowflake.", "INFO")
+                    if self.snowflake_upsert:
+                        upload = self.snowflake_manager.upsert_data(preprocessed_data, category)
+                    else:
+                        upload = self.snowflake_manager.upload_data(preprocessed_data, category)
+                    if 'error' in upload:
+                        self.error_handler.log(f"Failed to upload preprocessed data for {category}: "
+                                               f"{upload['error']}", "ERROR")
+                    else:
+                        self.document.manifest.bump_data_version(SNOWFLAKE_SOURCE)
+                        self.error_handler.log(f"Preprocessed data for {category} uploaded to Snowflake.", "INFO")
                 else:
                     file_name = self.data_storage_manager.store_data(preprocessed_data, 'preprocessed_data', category)
                     if file_name:
-                        self.document.update_index(self.cik_number, category, file_name, 'preprocessed_data')
+                        file_path = self.data_storage_manager.get_file_path('preprocessed_data', category, file_name)
+                        self.document.update_index(self.cik_number, category, file_name, 'preprocessed_data',
+                                                   file_path, row_count=len(preprocessed_data))
                     else:
                         self.error_handler.log(f"Failed to store preprocessed data for {category}", "ERROR")
 
@@ -90,11 +250,13 @@ class DataPipelineIntegration:
             self.error_handler.log_error(e, "ERROR")
             return {"error": str(e)}
 
-    def process_and_store_data(self, specific_queries=None):
+    def process_and_store_data(self, specific_queries=None, cik_numbers=None):
         """
         Process the preprocessed data by running queries and store the results.
         Args:
             specific_queries (list of str, optional): Specific queries to execute. If None, all categories are processed.
+            cik_numbers (list of str, optional): Run each query once over the stacked data of these companies and
+                                                 store every company's slice of the result. Defaults to the pipeline's CIK.
         """
         try:
             categories_to_process = specific_queries if specific_queries else self.category_metric_map.keys()
@@ -104,20 +266,38 @@ class DataPipelineIntegration:
                     self.error_handler.log(f"Invalid category or query name: {category}", "WARNING")
                     continue
 
+                if cik_numbers:
+                    input_hashes = {cik: self._input_hash(category, cik) for cik in cik_numbers}
+                    # Companies whose preprocessed data has not changed since their last run are left out
+                    stale_ciks = [cik for cik in cik_numbers if not self.document.manifest.is_current(
+                        cik, 'processed_data', category, input_hashes[cik])]
+                    if not stale_ciks:
+                        self.error_handler.log(f"{category} is up to date for all companies; skipping.", "INFO")
+                        continue
+                    query_result = self.execute_query(category, stale_ciks)
+                    if query_result.get(category) is None:
+                        self.error_handler.log(f"No valid results for query {category}.", "WARNING")
+                        continue
+                    ciks = {int(cik): cik for cik in stale_ciks}
+                    for cik, company_result in query_result[category].groupby('CIK', sort=False):
+                        cik = ciks.get(int(cik), cik)
+                        self._store_processed_data(category, company_result, cik, input_hashes.get(cik))
+                    continue
+
                 preprocessed_file_path = self.data_storage_manager.get_processed_data_file_path(category)
                 if not preprocessed_file_path:
                     self.error_handler.log(f"No preprocessed data found for {category}", "WARNING")
                     continue
 
+                input_hash = self._input_hash(category, self.cik_number)
+                if self.document.manifest.is_current(self.cik_number, 'processed_data', category, input_hash):
+                    self.error_handler.log(f"Preprocessed data for {category} is unchanged; skipping.", "INFO")
+                    continue
+
                 query_result = self.execute_query(category)
 
                 if query_result and category in query_result and query_result[category] is not None:
-                    processed_file_name = self.data_storage_manager.store_data(query_result[category], 'processed_data',
-                                                                               category)
-
-                    if processed_file_name:
-                        self.document.update_index(self.cik_number, category, processed_file_name, 'processed_data')
-
+                    self._store_processed_data(category, query_result[category], self.cik_number, input_hash)
                 else:
                     self.error_handler.log(f"No valid results for query {category}.", "WARNING")
 
@@ -125,11 +305,33 @@ class DataPipelineIntegration:
             self.error_handler.log_error(e, "ERROR")
             return {"error": str(e)}
 
-    def execute_query(self, query_names):
+    def _input_hash(self, category, cik_number):
+        """
+        Content hash of the preprocessed data a category's query reads, or None if it is unknown
+        (e.g. the data lives in Snowflake).
+        """
+        if self.use_snowflake:
+            return None
+        return self.data_storage_manager.content_hash('preprocessed_data', category, cik_number=cik_number)
+
+    def _store_processed_data(self, category, query_result, cik_number, input_hash=None):
+        storage_manager = self.data_storage_manager
+        if str(cik_number) != str(self.cik_number):
+            storage_manager = DataStorageManager(self.local_storage_dir, cik_number, self.storage_formats)
+        processed_file_name = storage_manager.store_data(query_result, 'processed_data', category)
+
+        if processed_file_name:
+            file_path = storage_manager.get_file_path('processed_data', category, processed_file_name)
+            self.document.update_index(cik_number, category, processed_file_name, 'processed_data', file_path,
+                                       row_count=len(query_result), input_hash=input_hash)
+
+    def execute_query(self, query_names, cik_numbers=None):
         """
         Execute one or more SQL queries based on their names.
         Args:
             query_names (str or list of str): Name(s) of the query(ies) to execute.
+            cik_numbers (list of str, optional): Run each query once over the stacked data of these companies
+                                                 instead of the pipeline's CIK.
         Returns:
             dict: A dictionary with query names as keys and query results as values.
         """
@@ -144,26 +346,111 @@ class DataPipelineIntegration:
                 results[query_name] = None
                 continue
 
+            # Read once: the same text keys the result cache and runs
+            with open(query_filename, 'r') as file:
+                query_text = file.read()
+
             if self.use_snowflake:
-                results[query_name] = self.snowflake_manager.execute_query_from_file(query_filename)
+                # The whole result is cached, so every selection of companies is served from one entry
+                result = self._cached_query(query_name, query_text, SNOWFLAKE_SOURCE,
+                                            self.document.manifest.data_version(SNOWFLAKE_SOURCE), None,
+                                            lambda: self.snowflake_manager.get_data(query_text))
+                results[query_name] = self._filter_ciks(result, cik_numbers) if cik_numbers else result
+            elif self.sql_engine:
+                ciks = cik_numbers or ([self.cik_number] if self.cik_number else None)
+                try:
+                    results[query_name] = self._cached_query(
+                        query_name, query_text, LOCAL_SQL_SOURCE,
+                        self.document.manifest.data_version(LOCAL_SQL_SOURCE), ciks,
+                        lambda: self.sql_engine.execute_snowflake_query(query_text, ciks))
+                except Exception as e:
+                    self.error_handler.log(f"Error executing query {query_name} locally: {e}", "ERROR")
+                    results[query_name] = None
             else:
-                results[query_name] = self._execute_query_locally(query_name)
+                ciks = cik_numbers or [self.cik_number]
+                # The preprocessed files' content hashes change whenever new data is stored
+                data_version = combine_hashes(*(self._input_hash(query_name, cik) for cik in ciks))
+                results[query_name] = self._cached_query(query_name, query_text, 'local', data_version, ciks,
+                                                         lambda: self._execute_query_locally(query_name, cik_numbers))
 
         return results
 
-    def _execute_query_locally(self, query_name):
+    def _cached_query(self, query_name, query_text, backend, data_version, cik_numbers, run):
+        """
+        Serve a query from the result cache, or run it and cache its result.
+        Args:
+            query_name (str): The query name.
+            query_text (str): The query's SQL; part of the cache key.
+            backend (str): Where the query runs.
+            data_version (str): Version of the data the query reads. Nothing is cached if it is unknown.
+            cik_numbers (list of str): Companies the result is restricted to.
+            run (callable): Runs the query.
+        Returns:
+            DataFrame: The query result.
+        """
+        if self.query_cache is None:
+            return run()
+        key = self.query_cache.key(query_name, query_text, data_version, cik_numbers, backend)
+        result = self.query_cache.get(key)
+        if result is not None:
+            return result
+        start = time.perf_counter()
+        result = run()
+        # Failed Snowflake queries come back as frames without columns
+        if result is not None and len(result.columns):
+            self.query_cache.put(key, result, time.perf_counter() - start)
+        return result
+
+    def get_query_cache_stats(self):
+        """
+        Returns:
+            dict: Hits per tier, misses, hit rate and saved execution seconds of the query result cache,
+                  or {'error': message} if the cache is disabled.
+        """
+        if self.query_cache is None:
+            return {'error': 'The query result cache is disabled.'}
+        return self.query_cache.get_stats()
+
+    @staticmethod
+    def _filter_ciks(result, cik_numbers):
+        # Snowflake returns upper-cased column names
+        cik_column = next((column for column in result.columns if column.upper() == 'CIK'), None)
+        if cik_column is None:
+            return result
+        return result[result[cik_column].isin([int(cik) for cik in cik_numbers])]
+
+    def load_preprocessed_data(self, query_name, cik_numbers=None, columns=None):
+        """
+        Load the latest preprocessed data of one or more companies as a single stacked frame.
+        Args:
+            query_name (str): The query (category) whose preprocessed data is loaded.
+            cik_numbers (list of str, optional): Companies to stack. Defaults to the pipeline's CIK.
+            columns (list of str, optional): Only load these columns.
+        Returns:
+            DataFrame: The stacked data, or None if no company has preprocessed data for the query.
+        """
+        frames = []
+        for cik in cik_numbers or [self.cik_number]:
+            file_path = self.data_storage_manager.get_processed_data_file_path(query_name, cik)
+            if file_path and os.path.exists(file_path):
+                frames.append(self.data_storage_manager.read_data(file_path, columns=columns))
+        if not frames:
+            return None
+        return pd.concat(frames, ignore_index=True) if len(frames) > 1 else frames[0]
+
+    def _execute_query_locally(self, query_name, cik_numbers=None):
         """
         Execute a query on locally stored data using a query file.
         Args:
             query_name (str): Path to a SQL file containing the query.
+            cik_numbers (list of str, optional): Companies whose data is stacked and queried in one pass.
         Returns:
             DataFrame: Query results as a pandas DataFrame.
         """
-        processed_file_path = self.data_storage_manager.get_processed_data_file_path(query_name)
-        if not os.path.exists(processed_file_path):
+        df = self.load_preprocessed_data(query_name, cik_numbers)
+        if df is None:
             self.error_handler.log(f"No processed data file found for query {query_name}.", "ERROR")
             return None
-        df = pd.read_csv(processed_file_path)
 
         if query_name == 'Assets Liabilities':
             return ASSET_LIABILITIES(df)
@@ -182,13 +469,38 @@ class DataPipelineIntegration:
         else:
             self.error_handler.log(f"Query name '{query_name}' not implemented for local execution.", "ERROR")
 
+    def compact_storage(self, retention_policy=None, cik_numbers=None, dry_run=False):
+        """
+        Fold the stored versions outside a retention policy into one compressed archive per CIK.
+        Args:
+            retention_policy (RetentionPolicy, optional): Versions to keep. Defaults to the last five per directory.
+            cik_numbers (list of str, optional): Companies to compact. The pipeline's CIK, or every CIK if unset.
+            dry_run (bool): Only report what would be archived.
+        Returns:
+            dict: CIK number -> {'archived': [...], 'archive': path} or {'error': message}.
+        """
+        compactor = StorageCompactor(self.local_storage_dir, retention_policy, self.document.manifest)
+        cik_numbers = cik_numbers or ([self.cik_number] if self.cik_number else None)
+        if not cik_numbers:
+            return compactor.compact_all(dry_run=dry_run)
+        return {cik: compactor.compact(cik, dry_run=dry_run) for cik in cik_numbers}
+
     def transform_and_store_json(self, category, chart_types=None):
         processed_file_path = self.data_storage_manager.get_latest_processed_data_file_path(category)
         if not processed_file_path:
             self.error_handler.log(f"No processed data found for {category}", "WARNING")
             return
 
-        df = pd.read_csv(processed_file_path)
+        input_hash = self.data_storage_manager.content_hash('processed_data', category)
+        sub_categories = [chart_types] if isinstance(chart_types, str) else chart_types
+        if self.document.manifest.is_current(self.cik_number, 'processed_json', category, input_hash, sub_categories):
+            self.error_handler.log(f"Processed data for {category} is unchanged; keeping its chart JSON.", "INFO")
+            return
+
+        df = self.data_storage_manager.read_data(processed_file_path)
+        # Columnar formats keep dates as datetimes; the chart JSON expects the same strings a CSV would hold
+        for column in df.select_dtypes(include=['datetime64[ns]']).columns:
+            df[column] = df[column].dt.strftime('%Y-%m-%d')
 
         # Get the comprehensive transformed JSON for all chart types
         transformed_json = self.transformer_manager.transform_data(df, category, chart_types)
@@ -196,4 +508,8 @@ class DataPipelineIntegration:
         for chart_type, data in transformed_json.items():
             json_file_name = self.data_storage_manager.store_json_data(data, 'processed_json', category, chart_type)
             if not json_file_name:
-                self.error_handler.log(f"Failed to store transformed JSON for {category} - {chart_type}", "ERROR")
\ No newline at end of file
+                self.error_handler.log(f"Failed to store transformed JSON for {category} - {chart_type}", "ERROR")
+                continue
+            file_path = self.data_storage_manager.get_file_path('processed_json', category, json_file_name, chart_type)
+            self.document.update_index(self.cik_number, category, json_file_name, 'processed_json', file_path,
+                                       row_count=len(data), sub_category=chart_type, input_hash=input_hash)
\ No newline at end of file
@@ -2,16 +2,25 @@
 
 from .data import AnnualDataProcessor, QuarterlyDataProcessor
 from .managers import LoggingManager, NotificationManager
-from .responses import SECAPIClient
-from .storages import SnowflakeDataManager, DataStorageManager
+from .responses import PERIODIC_FORMS, AsyncSECAPIClient, BulkArchiveReader, SECAPIClient, concat_fact_frames, latest_filing, parse_submissions
+from .storages import COLUMNAR_STORAGE_FORMATS, SnowflakeDataManager, DataStorageManager, RetentionPolicy, StorageCompactor
 from .transformers import TransformerManager
 
-__all__ = ['AnnualDataProcessor',
+__all__ = ['PERIODIC_FORMS',
+           'AnnualDataProcessor',
+           'AsyncSECAPIClient',
+           'BulkArchiveReader',
+           'COLUMNAR_STORAGE_FORMATS',
            'DataStorageManager',
            'LoggingManager',
            'NotificationManager',
            'QuarterlyDataProcessor',
+           'RetentionPolicy',
            'SECAPIClient',
            'SnowflakeDataManager',
-           'TransformerManager'
+           'StorageCompactor',
+           'TransformerManager',
+           'concat_fact_frames',
+           'latest_filing',
+           'parse_submissions'
            ]
@@ -6,81 +6,112 @@ retrieved from the SEC API and converts it into a pandas DataFrame for further a
 from abc import ABC, abstractmethod
 import pandas as pd
 
+# 'CY2008Q2' (duration), 'CY2008Q4I' (instant) or 'CY2008' (annual)
+FRAME_PATTERN = r'^CY(?P<year>\d{4})(?P<quarter>Q[1-4])?(?P<instant>I)?$'
+QUARTERS = ['Q1', 'Q2', 'Q3', 'Q4']
+ANNUAL_QUARTERS = ['Q1', 'Q2', 'Q3', 'Q4', 'FY']
+
+
+def parse_frames(frames):
+    """
+    Split SEC 'frame' values into calendar year and quarter without row-wise Python.
+    Frames repeat heavily, so the regex only runs over the distinct values and the result is broadcast back.
+    Args:
+        frames (pd.Series): The 'frame' column.
+    Returns:
+        pd.DataFrame: 'year' (Int64), 'quarter' ('Q1'..'Q4' or missing) and 'instant' (bool), aligned with frames.
+    """
+    codes, uniques = pd.factorize(frames.astype(object))
+    parsed = pd.Series(uniques, dtype=object).str.extract(FRAME_PATTERN)
+    parsed = parsed.reindex(codes).reset_index(drop=True)  # code -1 (missing frame) becomes an all-NaN row
+    parsed.index = frames.index
+    return pd.DataFrame({
+        'year': pd.to_numeric(parsed['year']).astype('Int64'),
+        'quarter': parsed['quarter'],
+        'instant': parsed['instant'].notna(),
+    })
+
 
 class FinancialDataProcessor(ABC):
     @abstractmethod
     def process_data(self, metric):
         pass
 
-
-class AnnualDataProcessor(FinancialDataProcessor):
-    def __init__(self, df):
-        self.df = df
+    def process_categories(self, category_metric_map):
+        """
+        Prepare every category in a single pass: the full frame is filtered and its 'frame' field parsed
+        once for the union of all metrics, and each category is then a cheap subset of that result.
+        Args:
+            category_metric_map (dict): Category name -> list of metrics.
+        Returns:
+            dict: Category name -> prepared DataFrame.
+        """
+        all_metrics = [metric for metrics in category_metric_map.values() for metric in metrics]
+        prepared = self._prepare(all_metrics)
+        return {category: prepared[prepared['Metric'].isin(metrics)]
+                for category, metrics in category_metric_map.items()}
 
     def process_data(self, metrics):
         """
-        Prepares and sorts financial data for a specific metric.
+        Prepares and sorts financial data for specific metrics.
         Args:
             metrics (list[str]): The specific financial metrics to prepare and sort.
         Returns:
-            DataFrame: A DataFrame filtered, cleaned, and sorted for the specific metric.
+            DataFrame: A DataFrame filtered, cleaned, and sorted for the specific metrics.
         """
-        # Filter by Metric
         if isinstance(metrics, str):
             metrics = [metrics]
-        df_metric = self.df[self.df['Metric'].isin(metrics)]
-        # Filter for 10-K filings and ensure 'frame' column is not empty
-        filtered_df = df_metric[df_metric['form'] == '10-K']
-        filtered_df = filtered_df[filtered_df['frame'].notna()]
-        # Drop unnecessary columns
-        columns_to_drop = ['accn', 'fy', 'fp', 'form', 'filed']
-        filtered_df_cleaned = filtered_df.drop(columns=columns_to_drop)
-        # Define a custom sorting key and split into 'year' and 'quarter'
+        return self._prepare(metrics)
 
-        def custom_sort_key(frame_value):
-            year = frame_value[2:6]  # Extract the year part (e.g., '2007')
-            quarter_order = {'Q1': 1, 'Q2': 2, 'Q3': 3, 'Q4': 4, 'FY': 5}  # Define order for quarters and FY
-            quarter = frame_value[6:] if frame_value[6:] in quarter_order else 'FY'
-            return year, quarter_order[quarter]
-        filtered_df_cleaned[['year', 'quarter']] = filtered_df_cleaned['frame'].apply(custom_sort_key).apply(pd.Series)
-        # Sort the DataFrame and drop the 'frame' and 'frame_sort_key' columns
-        sorted_df = filtered_df_cleaned.sort_values(by=['year', 'quarter']).drop(columns=['frame'])
-        return sorted_df
+    @abstractmethod
+    def _prepare(self, metrics):
+        pass
 
 
-class QuarterlyDataProcessor(FinancialDataProcessor):
+class AnnualDataProcessor(FinancialDataProcessor):
     def __init__(self, df):
         self.df = df
 
-    def process_data(self, metrics):
+    def _prepare(self, metrics):
         """
-        Prepares and sorts financial data for a specific metric, focusing exclusively on quarterly data.
-        Args:
-            metrics (list[str]): The specific financial metrics to prepare and sort.
-        Returns:
-            DataFrame: A DataFrame filtered, cleaned, and sorted for the specific metric, with only quarterly data.
+        Keep 10-K facts with a frame, split the frame into an integer 'year' and an ordered 'quarter'
+        (Q1 < Q2 < Q3 < Q4 < FY; anything that is not a plain quarterly frame counts as FY) and sort by them.
         """
-        # Filter by Metric
-        if isinstance(metrics, str):
-            metrics = [metrics]
-        df_metric = self.df[self.df['Metric'].isin(metrics)]
+        # Filter by Metric, 10-K filings and ensure 'frame' column is not empty
+        df = self.df
+        mask = df['Metric'].isin(metrics) & (df['form'] == '10-K') & df['frame'].notna()
+        filtered_df = df[mask]
+        frames = parse_frames(filtered_df['frame'])
+        plain_quarter = frames['quarter'].notna() & ~frames['instant']
+        quarter = frames['quarter'].where(plain_quarter, 'FY')
         # Drop unnecessary columns
-        columns_to_drop = ['accn', 'form', 'filed']
-        df_cleaned = df_metric.drop(columns=columns_to_drop)
-        # Function to extract year and quarter, excluding non-quarterly data
+        cleaned_df = filtered_df.drop(columns=['accn', 'fy', 'fp', 'form', 'filed', 'frame'], errors='ignore')
+        cleaned_df = cleaned_df.assign(year=frames['year'],
+                                       quarter=pd.Categorical(quarter, categories=ANNUAL_QUARTERS, ordered=True))
+        cleaned_df = cleaned_df[cleaned_df['year'].notna()]
+        cleaned_df['year'] = cleaned_df['year'].astype('int64')
+        # Sort the DataFrame by year and quarter
+        return cleaned_df.sort_values(by=['year', 'quarter'], kind='stable')
+
 
-        def extract_year_quarter(row):
-            if pd.notna(row['frame']) and 'Q' in row['frame']:
-                year = row['frame'][2:6]  # Extract year part
-                quarter = row['frame'][6:8]  # Extract quarter part
-                return [year, quarter]
-            return [None, None]  # Exclude non-quarterly entries
-        # Apply the function to each row
-        df_cleaned[['year', 'quarter']] = df_cleaned.apply(extract_year_quarter, axis=1, result_type="expand")
-        # Remove rows with None values in 'year' or 'quarter'
-        df_cleaned.dropna(subset=['year', 'quarter'], inplace=True)
+class QuarterlyDataProcessor(FinancialDataProcessor):
+    def __init__(self, df):
+        self.df = df
+
+    def _prepare(self, metrics):
+        """
+        Keep quarterly facts only (frames such as CY2008Q2 or CY2008Q2I), split the frame into an integer
+        'year' and an ordered 'quarter' and sort by them.
+        """
+        df = self.df
+        filtered_df = df[df['Metric'].isin(metrics)]
+        frames = parse_frames(filtered_df['frame'])
+        # Drop unnecessary columns
+        cleaned_df = filtered_df.drop(columns=['accn', 'form', 'filed', 'frame', 'fp', 'fy'], errors='ignore')
+        cleaned_df = cleaned_df.assign(year=frames['year'],
+                                       quarter=pd.Categorical(frames['quarter'], categories=QUARTERS, ordered=True))
+        # Remove non-quarterly entries
+        cleaned_df = cleaned_df[cleaned_df['quarter'].notna()]
+        cleaned_df['year'] = cleaned_df['year'].astype('int64')
         # Sort the DataFrame by year and quarter
-        sorted_df = df_cleaned.sort_values(by=['year', 'quarter'])
-        # Drop columns
-        sorted_df = sorted_df.drop(columns=['frame', 'fp', 'fy'])
-        return sorted_df
+        return cleaned_df.sort_values(by=['year', 'quarter'], kind='stable')
@@ -1,5 +1,15 @@
 # In apps/functions/responses/__init__.py
 
+from .async_sec_api_client import AsyncSECAPIClient
+from .bulk_archive import BulkArchiveReader
+from .facts_flattener import concat_fact_frames
 from .sec_api_client import SECAPIClient
+from .submissions_parser import PERIODIC_FORMS, latest_filing, parse_submissions
 
-__all__ = ['SECAPIClient']
+__all__ = ['AsyncSECAPIClient',
+           'BulkArchiveReader',
+           'PERIODIC_FORMS',
+           'SECAPIClient',
+           'concat_fact_frames',
+           'latest_filing',
+           'parse_submissions']
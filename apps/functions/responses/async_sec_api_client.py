@@ -0,0 +1,146 @@
+'''
+This module provides the AsyncSECAPIClient class for fetching SEC API data concurrently.
+A single aiohttp session (and therefore a single connection pool) is shared by all requests,
+a semaphore bounds the number of requests in flight and results are yielded as they complete.
+Request starts are throttled by the process-wide SEC rate limiter shared with SECAPIClient and Roster,
+and an optional HttpCache turns unchanged resources into conditional-GET 304s; its SQLite and gzip work runs
+in worker threads so that it never blocks the event loop.
+Example usage:
+    client = AsyncSECAPIClient(max_concurrency=8)
+    async for cik, payload in client.fetch_company_facts_many(['0000012927', '0000320193']):
+        ...
+'''
+import asyncio
+import json
+
+import aiohttp
+
+from apps.functions.managers import LoggingManager
+from apps.types import BASE_URL, COMPANY_FACTS, SUBMISSIONS
+from apps.utils import HttpCache, RetryPolicy, get_rate_limiter
+
+DEFAULT_USER_AGENT = 'YourName <your_email@example.com>'
+
+
+class AsyncSECAPIClient:
+    def __init__(self, base_url=None, max_concurrency=8, headers=None, timeout=60, rate_limiter=None,
+                 retry_policy=None, http_cache=None):
+        """
+        Initialize the AsyncSECAPIClient.
+        Args:
+            base_url (str): Base URL of the API. Defaults to the SEC data API; point it at a local server for testing.
+            max_concurrency (int): Maximum number of requests kept in flight.
+            headers (dict): Request headers. Defaults to the SEC fair-access User-Agent header.
+            timeout (int): Total timeout in seconds for a single request.
+            rate_limiter (TokenBucketRateLimiter): Limiter to draw from. Defaults to the process-wide limiter.
+            retry_policy (RetryPolicy): Backoff policy for 429/5xx responses and connection errors.
+            http_cache (HttpCache): Persistent response cache used for conditional requests. Disabled if None.
+        """
+        self.base_url = (base_url if base_url else BASE_URL).rstrip('/')
+        self.max_concurrency = max_concurrency
+        self.headers = headers if headers else {'User-Agent': DEFAULT_USER_AGENT}
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+        self.error_handler = LoggingManager()
+        self.rate_limiter = rate_limiter or get_rate_limiter()
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.http_cache = http_cache
+
+    def company_facts_url(self, cik_number):
+        return f"{self.base_url}{COMPANY_FACTS.format(f'{int(cik_number):010d}')}"
+
+    def submissions_url(self, cik_number):
+        return f"{self.base_url}{SUBMISSIONS.format(f'{int(cik_number):010d}')}"
+
+    async def fetch_company_facts_many(self, cik_numbers):
+        """
+        Fetch company facts for many CIK numbers concurrently.
+        Args:
+            cik_numbers (iterable of str): The CIK numbers to fetch.
+        Yields:
+            tuple: (cik_number, dict) in completion order. The dict is the raw JSON payload,
+                   or {'error': message} if the request failed.
+        """
+        async for result in self._fetch_many(cik_numbers, self.company_facts_url):
+            yield result
+
+    async def fetch_submissions_many(self, cik_numbers):
+        """
+        Fetch submissions for many CIK numbers concurrently.
+        Yields:
+            tuple: (cik_number, dict) in completion order.
+        """
+        async for result in self._fetch_many(cik_numbers, self.submissions_url):
+            yield result
+
+    async def _fetch_many(self, cik_numbers, url_builder):
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        connector = aiohttp.TCPConnector(limit=self.max_concurrency)
+
+        async with aiohttp.ClientSession(connector=connector, headers=self.headers, timeout=self.timeout) as session:
+            async def bounded_fetch(cik):
+                async with semaphore:
+                    return cik, await self._send_get_request(session, url_builder(cik))
+
+            tasks = [asyncio.ensure_future(bounded_fetch(cik)) for cik in cik_numbers]
+            try:
+                for next_done in asyncio.as_completed(tasks):
+                    yield await next_done
+            finally:
+                for task in tasks:
+                    task.cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _send_get_request(self, session, url):
+        """
+        Send a GET request through the shared session, retrying 429/5xx responses with backoff.
+        Returns:
+            dict: The response as a JSON object, or {'error': message} on failure.
+        """
+        try:
+            cache_entry = await asyncio.to_thread(self.http_cache.lookup, url) if self.http_cache else None
+            response = await self._get_with_retries(session, url, HttpCache.conditional_headers(cache_entry))
+            if response.status == 304 and cache_entry:
+                response.release()
+                cached_body = await asyncio.to_thread(self.http_cache.revalidated, url)
+                if cached_body is not None:
+                    return json.loads(cached_body)
+                # The cached body vanished between lookup and revalidation; fetch it unconditionally
+                response = await self._get_with_retries(session, url, {})
+            async with response:
+                response.raise_for_status()
+                body = await response.read()
+            if self.http_cache:
+                await asyncio.to_thread(self.http_cache.store, url, body, response.headers.get('ETag'),
+                                        response.headers.get('Last-Modified'))
+            return json.loads(body)
+        except aiohttp.ClientError as e:
+            error_message = f"Error sending GET request: {str(e)}"
+            self.error_handler.log_error(error_message)
+            return {'error': error_message}
+        except asyncio.TimeoutError:
+            error_message = f"Timed out requesting {url}"
+            self.error_handler.log_error(error_message)
+            return {'error': error_message}
+        except Exception as e:
+            error_message = f"Error during API request: {str(e)}"
+            self.error_handler.log_error(error_message)
+            return {'error': error_message}
+
+    async def _get_with_retries(self, session, url, headers):
+        attempt = 0
+        while True:
+            await self.rate_limiter.acquire_async()
+            try:
+                response = await session.get(url, headers=headers)
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError):
+                if attempt >= self.retry_policy.max_retries:
+                    raise
+                delay = self.retry_policy.get_delay(attempt)
+            else:
+                if not self.retry_policy.should_retry(response.status, attempt):
+                    return response
+                delay = self.retry_policy.get_delay(attempt, response.headers.get('Retry-After'))
+                response.release()
+            self.rate_limiter.record_retry()
+            await asyncio.sleep(delay)
+            attempt += 1
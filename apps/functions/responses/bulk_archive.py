@@ -0,0 +1,116 @@
+'''
+This module provides the BulkArchiveReader class for ingesting SEC bulk archives (companyfacts.zip, submissions.zip).
+Entries are streamed straight out of the local zip: only the central directory is read up front and each
+company's JSON is decompressed on demand, so the archive is never extracted nor loaded into memory as a whole.
+Company facts are parsed in a process pool whose workers each keep their own handle on the archive.
+Example usage:
+    reader = BulkArchiveReader('data/bulk/companyfacts.zip', max_workers=4)
+    for cik, df in reader.iter_company_facts():
+        ...
+'''
+import json
+import os
+import re
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from apps.functions.managers import LoggingManager
+
+ENTRY_PATTERN = re.compile(r'^CIK(\d{10})\.json$')
+
+_worker_archive = None
+_worker_client = None
+
+
+def _init_worker(zip_path):
+    global _worker_archive, _worker_client
+    from .sec_api_client import SECAPIClient
+    _worker_archive = zipfile.ZipFile(zip_path)
+    _worker_client = SECAPIClient(use_http_cache=False)
+
+
+def _parse_company_facts_entry(entry_name, metrics, all_units=False):
+    with _worker_archive.open(entry_name) as entry:
+        payload = json.load(entry)
+    response_type = 'company_facts_all' if all_units else 'company_facts'
+    parsed_data = _worker_client._parse_response(payload, response_type, metrics)
+    if parsed_data is None:
+        return {'error': f'Failed to parse company facts in {entry_name}'}
+    return parsed_data
+
+
+class BulkArchiveReader:
+    def __init__(self, zip_path, max_workers=None):
+        """
+        Initialize the BulkArchiveReader.
+        Args:
+            zip_path (str): Path to a local companyfacts.zip or submissions.zip archive.
+            max_workers (int): Number of parser processes. Defaults to the number of CPUs.
+        """
+        self.zip_path = zip_path
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.error_handler = LoggingManager()
+
+    def entry_names(self, cik_numbers=None):
+        """
+        List the per-company entries of the archive.
+        Args:
+            cik_numbers (iterable of str): Restrict to these CIK numbers. All companies if None.
+        Returns:
+            list of tuple: (cik_number, entry_name) with ten-digit, zero-padded CIK numbers.
+        """
+        wanted = {f"{int(cik):010d}" for cik in cik_numbers} if cik_numbers else None
+        with zipfile.ZipFile(self.zip_path) as archive:
+            names = archive.namelist()
+        entries = []
+        for name in names:
+            match = ENTRY_PATTERN.match(os.path.basename(name))
+            if match and (wanted is None or match.group(1) in wanted):
+                entries.append((match.group(1), name))
+        return entries
+
+    def iter_json(self, cik_numbers=None):
+        """
+        Stream the raw JSON payloads of the archive one entry at a time.
+        Yields:
+            tuple: (cik_number, dict)
+        """
+        with zipfile.ZipFile(self.zip_path) as archive:
+            for cik, name in self.entry_names(cik_numbers):
+                with archive.open(name) as entry:
+                    yield cik, json.load(entry)
+
+    def iter_company_facts(self, cik_numbers=None, metrics=None, all_units=False):
+        """
+        Parse the company facts entries of a companyfacts.zip archive in a process pool.
+        At most two entries per worker are in flight, which bounds the memory held by pending results.
+        Args:
+            cik_numbers (iterable of str): Restrict to these CIK numbers. All companies if None.
+            metrics (iterable of str): Only parse these concepts. All concepts if None.
+            all_units (bool): Extract every taxonomy and unit in the long, compact format.
+        Yields:
+            tuple: (cik_number, pd.DataFrame or dict) in completion order; a dict signals an error.
+        """
+        entries = iter(self.entry_names(cik_numbers))
+        metrics = frozenset(metrics) if metrics is not None else None
+        window = self.max_workers * 2
+        with ProcessPoolExecutor(max_workers=self.max_workers, initializer=_init_worker,
+                                 initargs=(self.zip_path,)) as executor:
+            pending = {}
+            for cik, name in entries:
+                pending[executor.submit(_parse_company_facts_entry, name, metrics, all_units)] = cik
+                if len(pending) >= window:
+                    break
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    cik = pending.pop(future)
+                    try:
+                        yield cik, future.result()
+                    except Exception as e:
+                        self.error_handler.log_error(e, "ERROR")
+                        yield cik, {'error': str(e)}
+                    next_entry = next(entries, None)
+                    if next_entry is not None:
+                        future = executor.submit(_parse_company_facts_entry, next_entry[1], metrics, all_units)
+                        pending[future] = next_entry[0]
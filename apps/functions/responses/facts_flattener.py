@@ -0,0 +1,231 @@
+'''
+This module flattens SEC companyfacts payloads into a long-format pandas DataFrame.
+Instead of building one dict per fact and handing pandas a list of dicts, the FactColumns accumulator
+keeps one list per output field and extends it concept by concept; entity name and CIK are broadcast
+as constants when the DataFrame is built. The resulting schema (column order and dtypes) is the same
+as pd.DataFrame([{'EntityName': ..., 'CIK': ..., 'Metric': ..., **fact}, ...]).
+flatten_company_facts_long captures every taxonomy and unit into one long-format table with compact dtypes
+(categoricals for repeated strings, datetime64 dates, float64 values).
+Example usage:
+    df = flatten_company_facts(response)
+    long_df = flatten_company_facts_long(response)
+'''
+from itertools import repeat
+from operator import itemgetter
+
+import numpy as np
+import pandas as pd
+
+
+# Fields that are absent from many facts and are therefore read with dict.get
+OPTIONAL_FIELDS = frozenset(['start', 'frame'])
+NUMERIC_FIELDS = frozenset(['val', 'fy'])
+FACT_FIELDS = ('start', 'end', 'val', 'accn', 'fy', 'fp', 'form', 'filed', 'frame')
+DATE_FIELDS = frozenset(['start', 'end', 'filed'])
+
+
+class FactColumns:
+    def __init__(self, entity_name, cik):
+        """
+        Accumulate facts column by column.
+        Args:
+            entity_name (str): Entity name, broadcast to every row.
+            cik (int): CIK number, broadcast to every row.
+        """
+        self.entity_name = entity_name
+        self.cik = cik
+        self.metric = []
+        self.columns = {}
+        self.length = 0
+
+    def add_facts(self, metric, facts):
+        """
+        Append the facts reported for one concept/unit.
+        Args:
+            metric (str): The concept name, stored in the 'Metric' column.
+            facts (list of dict): The fact records from the companyfacts payload.
+        """
+        count = len(facts)
+        if not count:
+            return
+        self._register_fields(facts)
+        required = [field for field in self.columns if field not in OPTIONAL_FIELDS]
+        try:
+            # One C-level itemgetter call per fact, then transpose the tuples into columns
+            extracted = zip(*map(itemgetter(*required), facts)) if len(required) > 1 else \
+                [list(map(itemgetter(required[0]), facts))]
+            for field, values in zip(required, extracted):
+                self.columns[field].extend(values)
+            optional = [field for field in self.columns if field in OPTIONAL_FIELDS]
+        except KeyError:
+            for field in required:
+                del self.columns[field][self.length:]
+            optional = list(self.columns)
+        for field in optional:
+            self.columns[field].extend(map(dict.get, facts, repeat(field), repeat(np.nan)))
+        self.metric.extend([metric] * count)
+        self.length += count
+
+    def to_frame(self):
+        """
+        Build the DataFrame.
+        Returns:
+            pd.DataFrame: EntityName, CIK, Metric followed by the fact fields in order of first appearance.
+        """
+        if not self.length:
+            return pd.DataFrame()
+        data = {
+            'EntityName': np.full(self.length, self.entity_name, dtype=object),
+            'CIK': np.full(self.length, self.cik),
+            'Metric': np.array(self.metric, dtype=object),
+        }
+        for field, values in self.columns.items():
+            data[field] = _to_array(field, values)
+        return pd.DataFrame(data, copy=False)
+
+    def _register_fields(self, facts):
+        new_fields = set().union(*facts).difference(self.columns)
+        if not new_fields:
+            return
+        # Keep pandas' list-of-dicts column order: fields in order of first appearance
+        for fact in facts:
+            for field in fact:
+                if field in new_fields:
+                    self.columns[field] = [np.nan] * self.length
+                    new_fields.discard(field)
+            if not new_fields:
+                break
+
+
+class LongFactColumns(FactColumns):
+    def __init__(self, entity_name, cik):
+        """
+        Accumulate facts of every taxonomy and unit, keeping taxonomy, metric and unit as categorical codes.
+        """
+        super().__init__(entity_name, cik)
+        self.columns = {field: [] for field in FACT_FIELDS}
+        self.codes = {'taxonomy': [], 'Metric': [], 'unit': []}
+        self.categories = {'taxonomy': {}, 'Metric': {}, 'unit': {}}
+
+    def add_unit_facts(self, taxonomy, metric, unit, facts):
+        """
+        Append the facts reported for one taxonomy/concept/unit combination.
+        """
+        count = len(facts)
+        if not count:
+            return
+        for key, label in (('taxonomy', taxonomy), ('Metric', metric), ('unit', unit)):
+            code = self.categories[key].setdefault(label, len(self.categories[key]))
+            self.codes[key].extend([code] * count)
+        self.add_facts(metric, facts)
+
+    def to_frame(self):
+        """
+        Build the long-format DataFrame with compact dtypes.
+        Returns:
+            pd.DataFrame: EntityName, CIK, taxonomy, Metric, unit followed by the fact fields.
+        """
+        data = {
+            'EntityName': pd.Categorical.from_codes(np.zeros(self.length, dtype=np.int8), [self.entity_name]),
+            'CIK': np.full(self.length, self.cik, dtype=np.int64),
+        }
+        for key in ('taxonomy', 'Metric', 'unit'):
+            data[key] = pd.Categorical.from_codes(np.array(self.codes[key], dtype=np.int32),
+                                                  list(self.categories[key]))
+        for field, values in self.columns.items():
+            if field in DATE_FIELDS:
+                data[field] = pd.to_datetime(pd.Series(values, dtype=object), format='%Y-%m-%d', errors='coerce')
+            elif field == 'val':
+                data[field] = np.array(values, dtype=np.float64)
+            elif field == 'fy':
+                data[field] = pd.array(np.array(values, dtype=np.float64), dtype='Int16')
+            elif field == 'frame':
+                data[field] = np.array(values, dtype=object)
+            else:
+                data[field] = pd.Categorical(values)
+        return pd.DataFrame(data, index=pd.RangeIndex(self.length))
+
+
+def _to_array(field, values):
+    if field in NUMERIC_FIELDS:
+        array = np.array(values)
+        if array.dtype.kind in 'if':
+            return array
+    else:
+        array = np.array(values, dtype=object)
+        if any(isinstance(value, str) for value in values[:1]):
+            return array
+    # Mixed or unexpected content: let pandas infer the dtype exactly as the list-of-dicts path would
+    return pd.Series(values).to_numpy()
+
+
+def flatten_company_facts(response, metrics=None):
+    """
+    Flatten the USD-denominated us-gaap facts of a companyfacts payload.
+    Args:
+        response (dict): The raw companyfacts JSON.
+        metrics (iterable of str): Only flatten these concepts; all others are skipped before any row is built.
+                                   All concepts if None.
+    Returns:
+        pd.DataFrame: One row per fact.
+    """
+    columns = FactColumns(response['entityName'], response['cik'])
+    concepts = response['facts']['us-gaap']
+    if metrics is not None:
+        metrics = set(metrics)
+        concepts = {key: concepts[key] for key in concepts if key in metrics}
+    for metric_key, metric_data in concepts.items():
+        if 'units' in metric_data and 'USD' in metric_data['units']:
+            columns.add_facts(metric_key, metric_data['units']['USD'])
+    return columns.to_frame()
+
+
+def concat_fact_frames(frames):
+    """
+    Concatenate DataFrame chunks of flattened facts, keeping categorical columns categorical
+    (plain pd.concat falls back to object dtype when the chunks' categories differ).
+    Returns:
+        pd.DataFrame: The concatenated frame.
+    """
+    frames = [frame for frame in frames if not frame.empty]
+    if not frames:
+        return pd.DataFrame()
+    combined = pd.concat(frames, ignore_index=True)
+    for column, dtype in frames[0].dtypes.items():
+        if isinstance(dtype, pd.CategoricalDtype) and column in combined:
+            combined[column] = pd.api.types.union_categoricals([frame[column] for frame in frames])
+    return combined
+
+
+def flatten_company_facts_long(response, metrics=None, taxonomies=None, units=None):
+    """
+    Flatten the facts of every taxonomy (us-gaap, dei, ...) and unit (USD, USD/shares, shares, ...)
+    of a companyfacts payload into one long-format table with compact dtypes.
+    Args:
+        response (dict): The raw companyfacts JSON.
+        metrics (iterable of str): Only flatten these concepts. All concepts if None.
+        taxonomies (iterable of str): Only flatten these taxonomies. All taxonomies if None.
+        units (iterable of str): Only flatten these units. All units if None.
+    Returns:
+        pd.DataFrame: One row per fact, with 'taxonomy' and 'unit' columns.
+    """
+    columns = LongFactColumns(response['entityName'], response['cik'])
+    metrics = set(metrics) if metrics is not None else None
+    units = set(units) if units is not None else None
+    for taxonomy, concepts in response['facts'].items():
+        if taxonomies is not None and taxonomy not in taxonomies:
+            continue
+        add_concept_facts(columns, taxonomy, concepts, metrics, units)
+    return columns.to_frame()
+
+
+def add_concept_facts(columns, taxonomy, concepts, metrics=None, units=None):
+    """
+    Add the facts of a taxonomy's concepts to a LongFactColumns accumulator.
+    """
+    for metric_key, metric_data in concepts.items():
+        if metrics is not None and metric_key not in metrics:
+            continue
+        for unit, facts in metric_data.get('units', {}).items():
+            if units is None or unit in units:
+                columns.add_unit_facts(taxonomy, metric_key, unit, facts)
@@ -0,0 +1,156 @@
+'''
+This module provides a streaming parser for SEC companyfacts JSON documents.
+The document is read incrementally from a file-like object and walked along facts -> taxonomy -> concept;
+only one concept is decoded at a time, so peak memory is bounded by the largest concept and the rows
+of the chunk being built rather than by the size of the whole payload.
+Example usage:
+    with open('CIK0000012927.json', 'rb') as body:
+        for df in iter_company_facts_chunks(body, metrics={'Revenues', 'NetIncomeLoss'}):
+            ...
+'''
+import io
+import json
+
+from .facts_flattener import FactColumns, LongFactColumns
+
+DEFAULT_READ_SIZE = 1 << 16
+DEFAULT_CHUNK_ROWS = 50000
+WHITESPACE = ' \t\n\r'
+
+
+class CompanyFactsStreamParser:
+    def __init__(self, stream, read_size=DEFAULT_READ_SIZE):
+        """
+        Initialize the parser.
+        Args:
+            stream (file object): Binary or text stream over a companyfacts JSON document.
+            read_size (int): Number of characters read from the stream at a time.
+        """
+        self.stream = stream if isinstance(stream, io.TextIOBase) else io.TextIOWrapper(stream, encoding='utf-8')
+        self.read_size = read_size
+        self.decoder = json.JSONDecoder()
+        self.buffer = ''
+        self.pos = 0
+        self.eof = False
+        self.entity_name = None
+        self.cik = None
+
+    def iter_concepts(self):
+        """
+        Walk the document and yield every concept as soon as it has been decoded.
+        Top-level 'cik' and 'entityName' are recorded on the parser as they are encountered.
+        Yields:
+            tuple: (taxonomy, concept, concept_data) where concept_data is the concept's dict (label, units, ...).
+        """
+        self._expect('{')
+        for key in self._iter_object_keys():
+            if key == 'facts':
+                yield from self._iter_facts()
+            elif key == 'cik':
+                self.cik = self._decode_value()
+            elif key == 'entityName':
+                self.entity_name = self._decode_value()
+            else:
+                self._decode_value()
+
+    def _iter_facts(self):
+        self._expect('{')
+        for taxonomy in self._iter_object_keys():
+            self._expect('{')
+            for concept in self._iter_object_keys():
+                yield taxonomy, concept, self._decode_value()
+
+    def _iter_object_keys(self):
+        """
+        Iterate over the keys of the object whose '{' has just been consumed.
+        The caller must consume each key's value before asking for the next key.
+        """
+        if self._peek() == '}':
+            self.pos += 1
+            return
+        while True:
+            key = self._decode_value()
+            self._expect(':')
+            yield key
+            separator = self._peek()
+            self.pos += 1
+            if separator == '}':
+                return
+            if separator != ',':
+                raise ValueError(f"Expected ',' or '}}' in companyfacts JSON, found {separator!r}")
+
+    def _decode_value(self):
+        self._peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.pos)
+                # A number touching the end of the buffer may continue in the next read
+                if end < len(self.buffer) or self.eof:
+                    self.pos = end
+                    return value
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            # Grow reads geometrically so that decoding a large value stays linear
+            self._fill(max(self.read_size, len(self.buffer) - self.pos))
+
+    def _peek(self):
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if self.eof:
+                return ''
+            self._fill(self.read_size)
+
+    def _expect(self, char):
+        found = self._peek()
+        if found != char:
+            raise ValueError(f"Expected {char!r} in companyfacts JSON, found {found!r}")
+        self.pos += 1
+
+    def _fill(self, size):
+        data = self.stream.read(size)
+        if not data:
+            self.eof = True
+        self.buffer = self.buffer[self.pos:] + data
+        self.pos = 0
+
+
+def iter_company_facts_chunks(stream, metrics=None, chunk_rows=DEFAULT_CHUNK_ROWS, read_size=DEFAULT_READ_SIZE,
+                              all_units=False):
+    """
+    Stream the USD-denominated us-gaap facts of a companyfacts document as DataFrame chunks.
+    Args:
+        stream (file object): Binary or text stream over the companyfacts JSON.
+        metrics (iterable of str): Only emit these concepts. All concepts if None.
+        chunk_rows (int): Emit a DataFrame once at least this many facts have been collected.
+        read_size (int): Number of characters read from the stream at a time.
+        all_units (bool): Emit every taxonomy and unit in the long, compact format of flatten_company_facts_long.
+    Yields:
+        pd.DataFrame: Chunks with the same columns as flatten_company_facts (or flatten_company_facts_long).
+    """
+    metrics = set(metrics) if metrics is not None else None
+    parser = CompanyFactsStreamParser(stream, read_size)
+    columns = None
+    for taxonomy, concept, concept_data in parser.iter_concepts():
+        if metrics is not None and concept not in metrics:
+            continue
+        units = concept_data.get('units', {})
+        if all_units:
+            if columns is None:
+                columns = LongFactColumns(parser.entity_name, parser.cik)
+            for unit, facts in units.items():
+                columns.add_unit_facts(taxonomy, concept, unit, facts)
+        elif taxonomy == 'us-gaap' and 'USD' in units:
+            if columns is None:
+                columns = FactColumns(parser.entity_name, parser.cik)
+            columns.add_facts(concept, units['USD'])
+        else:
+            continue
+        if columns is not None and columns.length >= chunk_rows:
+            yield columns.to_frame()
+            columns = None
+    if columns is not None and columns.length:
+        yield columns.to_frame()
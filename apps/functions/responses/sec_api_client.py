@@ -1,12 +1,13 @@
 '''
 This file contains the enhanced implementation of the SECAPIClient class.
-# TODO: Implement advanced rate limiting strategy for SEC API limits.
-# TODO: Complete parsing logic implementation for submissions data and ticker endpoint.
-# TODO: Develop a caching mechanism for frequently accessed data -more advanced.
+# TODO: Complete parsing logic implementation for ticker endpoint.
 # TODO: Optimize request headers, making User-Agent dynamic or configurable.
 # TODO: Create unit tests for all public methods.
 # TODO: Expand documentation with detailed method descriptions and examples
 '''
+import asyncio
+import json
+
 from cachetools import TTLCache
 import requests
 import time
@@ -14,19 +15,29 @@ import pandas as pd
 
 from apps.functions.managers import LoggingManager
 from apps.types import BASE_URL
-from apps.utils import Roster
+from apps.utils import HttpCache, RetryPolicy, Roster, get_rate_limiter, throttled_get
+from .async_sec_api_client import AsyncSECAPIClient
+from .facts_flattener import flatten_company_facts, flatten_company_facts_long
+from .facts_stream import DEFAULT_CHUNK_ROWS, iter_company_facts_chunks
+from .submissions_parser import parse_submissions
 
 
 class SECAPIClient:
-    def __init__(self, base_url=None):
+    def __init__(self, base_url=None, http_cache=None, use_http_cache=True):
         """
         Initialize the SECAPIClient with an optional base URL.
         If no base URL is provided, the default URL from SECEndpoints is used.
+        Args:
+            base_url (str): Base URL of the API.
+            http_cache (HttpCache): Persistent response cache. Defaults to an HttpCache under data/.
+            use_http_cache (bool): Set to False to disable the persistent cache entirely.
         """
         self.base_url = base_url if base_url else BASE_URL
         self.error_handler = LoggingManager()
-        self.rate_limit = None
+        self.rate_limiter = get_rate_limiter()
+        self.retry_policy = RetryPolicy()
         self.cache = TTLCache(maxsize=100, ttl=3600)  # Cache for 1 hour
+        self.http_cache = (http_cache if http_cache else HttpCache()) if use_http_cache else None
         self.roster = Roster()
 
     def fetch_company_tickers(self):
@@ -62,15 +73,16 @@ class SECAPIClient:
         Args:
             cik_number (str): The CIK number of the company.
         Returns:
-            dict: The response from the API.
+            pd.DataFrame or dict: The company's recent filings (see parse_submissions), newest first,
+                                  or a dict in case of error.
         """
         key = f'submissions_{cik_number}'
-        cached_data = self._get_from_cache(key)
-        if cached_data:
-            return cached_data
+        cached_response = self._get_from_cache(key)
+        if cached_response:
+            return self._parse_response(cached_response, 'submissions')
         url = self.roster.recruit_cik(cik_number).api_endpoints["submissions"]
         response = self._send_get_request(url)
-        if response:
+        if response and 'error' not in response:
             self._store_in_cache(key, response, expiry=3600)  # Cache for 1 hour
 
             parsed_data = self._parse_response(response, 'submissions')
@@ -79,19 +91,37 @@ class SECAPIClient:
             else:
                 return {'error': 'Failed to parse company submissions'}
 
-    def fetch_company_facts(self, cik_number):
+        return response if response else {'error': 'Failed to fetch company submissions'}
+
+    def fetch_submissions_many(self, cik_numbers, max_concurrency=8):
+        """
+        Fetch the submissions of many CIK numbers concurrently over one shared connection pool.
+        Results are yielded as they complete, not in input order.
+        Args:
+            cik_numbers (iterable of str): The CIK numbers of the companies.
+            max_concurrency (int): Maximum number of requests kept in flight.
+        Yields:
+            tuple: (cik_number, pd.DataFrame or dict) - the parsed filings, or a dict in case of error.
+        """
+        yield from self._fetch_many(cik_numbers, 'submissions', 'submissions', max_concurrency)
+
+    def fetch_company_facts(self, cik_number, metrics=None, all_units=False):
         """
         Fetch company facts from the SEC API.
         Args:
             cik_number (str): The CIK number of the company.
+            metrics (iterable of str): Only parse these concepts. All concepts if None.
+            all_units (bool): Extract every taxonomy and unit into a long table with 'taxonomy' and 'unit'
+                              columns and compact dtypes, instead of only USD us-gaap facts.
         Returns:
             pd.DataFrame or dict: The response from the API as a DataFrame, or a dict in case of error.
         """
         key = f'company_facts_{cik_number}'
+        response_type = 'company_facts_all' if all_units else 'company_facts'
         cached_response = self._get_from_cache(key)
         if cached_response:
             # Parse the cached response and return
-            return self._parse_response(cached_response, 'company_facts')
+            return self._parse_response(cached_response, response_type, metrics)
 
         url = self.roster.recruit_cik(cik_number).api_endpoints["company_facts"]
         response = self._send_get_request(url)
@@ -100,7 +130,7 @@ class SECAPIClient:
             self._store_in_cache(key, response, expiry=3600)  # Cache for 1 hour
 
             # Parse the response and return
-            parsed_data = self._parse_response(response, 'company_facts')
+            parsed_data = self._parse_response(response, response_type, metrics)
             if isinstance(parsed_data, pd.DataFrame):
                 return parsed_data
             else:
@@ -108,6 +138,77 @@ class SECAPIClient:
 
         return {'error': 'Failed to fetch company facts'}
 
+    def iter_company_facts(self, cik_number, metrics=None, chunk_rows=DEFAULT_CHUNK_ROWS, all_units=False):
+        """
+        Stream company facts from the SEC API as DataFrame chunks without materializing the whole JSON.
+        The body is spooled to the persistent HTTP cache (or read straight off the socket if the cache
+        is disabled) and parsed incrementally, one concept at a time.
+        Args:
+            cik_number (str): The CIK number of the company.
+            metrics (iterable of str): Only emit these concepts. All concepts if None.
+            chunk_rows (int): Approximate number of facts per emitted DataFrame.
+            all_units (bool): Emit every taxonomy and unit in the long, compact format.
+        Yields:
+            pd.DataFrame: Chunks of the flattened company facts.
+        Raises:
+            requests.exceptions.RequestException: If the company facts could not be fetched.
+        """
+        url = self.roster.recruit_cik(cik_number).api_endpoints["company_facts"]
+        body = self._open_body_stream(url)
+        with body:
+            yield from iter_company_facts_chunks(body, metrics=metrics, chunk_rows=chunk_rows, all_units=all_units)
+
+    def fetch_company_facts_many(self, cik_numbers, max_concurrency=8, metrics=None, all_units=False):
+        """
+        Fetch company facts for many CIK numbers concurrently over one shared connection pool.
+        Results are yielded as they complete, not in input order.
+        Args:
+            cik_numbers (iterable of str): The CIK numbers of the companies.
+            max_concurrency (int): Maximum number of requests kept in flight.
+            metrics (iterable of str): Only parse these concepts. All concepts if None.
+            all_units (bool): Extract every taxonomy and unit in the long, compact format.
+        Yields:
+            tuple: (cik_number, pd.DataFrame or dict) - the parsed facts, or a dict in case of error.
+        """
+        response_type = 'company_facts_all' if all_units else 'company_facts'
+        yield from self._fetch_many(cik_numbers, 'company_facts', response_type, max_concurrency, metrics)
+
+    def _fetch_many(self, cik_numbers, endpoint, response_type, max_concurrency, metrics=None):
+        pending = []
+        for cik in cik_numbers:
+            cached_response = self._get_from_cache(f'{endpoint}_{cik}')
+            if cached_response:
+                yield cik, self._parse_response(cached_response, response_type, metrics)
+            else:
+                pending.append(cik)
+        if not pending:
+            return
+
+        async_client = AsyncSECAPIClient(base_url=self.base_url, max_concurrency=max_concurrency,
+                                         retry_policy=self.retry_policy, http_cache=self.http_cache)
+        fetch_many = (async_client.fetch_submissions_many if endpoint == 'submissions'
+                      else async_client.fetch_company_facts_many)
+        results = fetch_many(pending)
+        loop = asyncio.new_event_loop()
+        try:
+            while True:
+                try:
+                    cik, response = loop.run_until_complete(results.__anext__())
+                except StopAsyncIteration:
+                    break
+                if 'error' in response:
+                    yield cik, response
+                    continue
+                self._store_in_cache(f'{endpoint}_{cik}', response, expiry=3600)  # Cache for 1 hour
+                parsed_data = self._parse_response(response, response_type, metrics)
+                if isinstance(parsed_data, pd.DataFrame):
+                    yield cik, parsed_data
+                else:
+                    yield cik, {'error': f"Failed to parse {endpoint.replace('_', ' ')}"}
+        finally:
+            loop.run_until_complete(results.aclose())
+            loop.close()
+
     def _send_get_request(self, url):
         """
         Send a GET request to the SEC API.
@@ -118,17 +219,21 @@ class SECAPIClient:
         """
         headers = {'User-Agent': 'YourName <your_email@example.com>'}
         try:
-            if self.rate_limit and self.rate_limit['remaining'] == 0:
-                cooldown_period = self.rate_limit['reset'] - time.time()
-                if cooldown_period > 0:
-                    time.sleep(cooldown_period + 1)  # Add an extra second to ensure the cooldown period has passed
-            response = requests.get(url, headers=headers)
+            cache_entry = self.http_cache.lookup(url) if self.http_cache else None
+            headers.update(HttpCache.conditional_headers(cache_entry))
+            response = throttled_get(url, headers=headers, rate_limiter=self.rate_limiter,
+                                     retry_policy=self.retry_policy)
+            if response.status_code == 304 and cache_entry:
+                cached_body = self.http_cache.revalidated(url)
+                if cached_body is not None:
+                    return json.loads(cached_body)
+                # The cached body vanished between lookup and revalidation; fetch it unconditionally
+                response = throttled_get(url, headers={'User-Agent': headers['User-Agent']},
+                                         rate_limiter=self.rate_limiter, retry_policy=self.retry_policy)
             response.raise_for_status()
-            if 'X-RateLimit-Remaining' in response.headers:
-                self.rate_limit = {
-                    'remaining': int(response.headers['X-RateLimit-Remaining']),
-                    'reset': int(response.headers['X-RateLimit-Reset'])
-                }
+            if self.http_cache:
+                self.http_cache.store(url, response.content, response.headers.get('ETag'),
+                                      response.headers.get('Last-Modified'))
             return response.json()
         except requests.exceptions.RequestException as e:
             error_message = f"Error sending GET request: {str(e)}"
@@ -139,12 +244,57 @@ class SECAPIClient:
             self.error_handler.log_error(error_message)
             return {'error': error_message}
 
-    def _parse_response(self, response, response_type):
+    def _open_body_stream(self, url):
+        """
+        Open the response body of a GET request as a binary stream, going through the persistent cache.
+        Returns:
+            file object: A binary stream over the (decompressed) body.
+        """
+        headers = {'User-Agent': 'YourName <your_email@example.com>'}
+        cache_entry = self.http_cache.lookup(url) if self.http_cache else None
+        headers.update(HttpCache.conditional_headers(cache_entry))
+        response = throttled_get(url, headers=headers, rate_limiter=self.rate_limiter,
+                                 retry_policy=self.retry_policy, stream=True)
+        if response.status_code == 304 and cache_entry and self.http_cache.mark_revalidated(url):
+            response.close()
+            return self.http_cache.open_body(url)
+        if response.status_code == 304:
+            response.close()
+            response = throttled_get(url, headers={'User-Agent': headers['User-Agent']},
+                                     rate_limiter=self.rate_limiter, retry_policy=self.retry_policy, stream=True)
+        response.raise_for_status()
+        if not self.http_cache:
+            response.raw.decode_content = True
+            return response.raw
+        with response:
+            self.http_cache.store_stream(url, response.iter_content(chunk_size=1 << 16),
+                                         response.headers.get('ETag'), response.headers.get('Last-Modified'))
+        return self.http_cache.open_body(url)
+
+    def get_request_stats(self):
+        """
+        Get the counters of the process-wide SEC rate limiter.
+        Returns:
+            dict: Requests sent, throttled waits, seconds spent throttled and retries.
+        """
+        return self.rate_limiter.get_stats()
+
+    def get_cache_stats(self):
+        """
+        Get the statistics of the persistent HTTP cache.
+        Returns:
+            dict: Hits, misses, bytes saved, evictions, entries and stored bytes, or an empty dict if disabled.
+        """
+        return self.http_cache.get_stats() if self.http_cache else {}
+
+    def _parse_response(self, response, response_type, metrics=None):
         """
         Parse the raw JSON response based on the type of data.
         Args:
             response (dict): The raw JSON response from the SEC API.
-            response_type (str): The type of data (e.g., 'tickers', 'submissions', 'company_facts').
+            response_type (str): The type of data (e.g., 'tickers', 'submissions', 'company_facts',
+                                 'company_facts_all' for every taxonomy and unit).
+            metrics (iterable of str): For company facts, only parse these concepts. All concepts if None.
         Returns:
             pd.DataFrame or None: The parsed response as a DataFrame, or None in case of error.
         """
@@ -153,28 +303,11 @@ class SECAPIClient:
                 # Specific parsing logic for tickers
                 pass
             elif response_type == 'submissions':
-                # Specific parsing logic for submissions
-                pass
+                return parse_submissions(response)
             elif response_type == 'company_facts':
-                entityname, cik = response['entityName'], response['cik']
-                all_flattened_data = []
-
-                for metric_key, metric_data in response['facts']['us-gaap'].items():
-                    if 'units' in metric_data and 'USD' in metric_data['units']:
-                        usd_data = metric_data['units']['USD']
-
-                        flattened_data = [
-                            {
-                                'EntityName': entityname,
-                                'CIK': cik,
-                                'Metric': metric_key,
-                                **item  # Spread the individual item fields
-                            }
-                            for item in usd_data
-                        ]
-                        all_flattened_data.extend(flattened_data)
-
-                return pd.DataFrame(all_flattened_data)
+                return flatten_company_facts(response, metrics)
+            elif response_type == 'company_facts_all':
+                return flatten_company_facts_long(response, metrics)
             else:
                 self.error_handler.log_error(f"Unknown response type: {response_type}")
                 return None
@@ -0,0 +1,55 @@
+'''
+This module parses the SEC submissions feed (/submissions/CIK##########.json) into a filings table.
+The feed lists a company's most recent filings column-wise under filings.recent, newest first; parse_submissions
+turns those columns into one row per filing and latest_filing picks the newest filing of the periodic
+report forms (10-K/10-Q and their amendments) that change the company facts.
+Example usage:
+    filings = parse_submissions(client_response)
+    accession = latest_filing(filings)['accessionNumber']
+'''
+import pandas as pd
+
+# Filings that add or restate the XBRL financial data behind companyfacts
+PERIODIC_FORMS = ('10-K', '10-Q', '10-K/A', '10-Q/A')
+FILING_COLUMNS = ['accessionNumber', 'filingDate', 'reportDate', 'acceptanceDateTime', 'form', 'primaryDocument']
+
+
+def parse_submissions(response, forms=None):
+    """
+    Parse a submissions response into one row per filing.
+    Args:
+        response (dict): The raw JSON response of the submissions endpoint.
+        forms (iterable of str, optional): Only keep filings of these form types. All filings if None.
+    Returns:
+        pd.DataFrame: Columns CIK, EntityName and FILING_COLUMNS (plus any other column of the feed),
+                      newest filing first; filingDate and reportDate as datetimes.
+    """
+    recent = response.get('filings', {}).get('recent', {})
+    filings = pd.DataFrame({column: values for column, values in recent.items() if isinstance(values, list)})
+    for column in FILING_COLUMNS:
+        if column not in filings.columns:
+            filings[column] = pd.Series(dtype=object)
+    if forms is not None:
+        filings = filings[filings['form'].isin(list(forms))]
+
+    filings.insert(0, 'EntityName', response.get('name'))
+    filings.insert(0, 'CIK', int(response['cik']) if response.get('cik') else None)
+    for column in ('filingDate', 'reportDate'):
+        filings[column] = pd.to_datetime(filings[column].replace('', None), errors='coerce')
+    return filings.sort_values(['acceptanceDateTime', 'accessionNumber'], ascending=False, ignore_index=True)
+
+
+def latest_filing(filings, forms=PERIODIC_FORMS):
+    """
+    Get the newest filing of the given forms.
+    Args:
+        filings (pd.DataFrame): Parsed submissions, as returned by parse_submissions.
+        forms (iterable of str, optional): Form types to consider. All forms if None.
+    Returns:
+        dict or None: The filing's columns, or None if the company has no such filing.
+    """
+    if forms is not None:
+        filings = filings[filings['form'].isin(list(forms))]
+    if filings.empty:
+        return None
+    return filings.iloc[0].to_dict()
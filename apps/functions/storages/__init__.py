@@ -1,7 +1,18 @@
 # In apps/functions/storages/__init__.py
 
 from .sw_flake import SnowflakeDataManager
-from .local_data_storage import DataStorageManager
+from .local_data_storage import COLUMNAR_STORAGE_FORMATS, DataStorageManager
+from .storage_formats import read_frame
+from .retention import RetentionPolicy, StorageCompactor
+from .snowflake_bulk_loader import SnowflakeBulkLoader
+from .snowflake_pool import SnowflakeConnectionPool, get_connection_pool
 
 __all__ = ['SnowflakeDataManager',
-           'DataStorageManager']
+           'COLUMNAR_STORAGE_FORMATS',
+           'DataStorageManager',
+           'read_frame',
+           'RetentionPolicy',
+           'SnowflakeBulkLoader',
+           'SnowflakeConnectionPool',
+           'StorageCompactor',
+           'get_connection_pool']
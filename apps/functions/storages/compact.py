@@ -0,0 +1,36 @@
+'''
+Command line entry point of the storage compaction: archives the versions of the local store that fall
+outside a retention policy (see retention.py).
+Usage:
+    python -m apps.functions.storages.compact --storage-dir data --keep-last 5 --max-age-days 90
+    python -m apps.functions.storages.compact --storage-dir data --cik 0000012927 --dry-run
+'''
+import argparse
+
+from .retention import RetentionPolicy, StorageCompactor
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Archive old versions of the local store.")
+    parser.add_argument('--storage-dir', default='data')
+    parser.add_argument('--cik', action='append', help="Compact only this CIK (repeatable). All CIKs by default.")
+    parser.add_argument('--keep-last', type=int, default=5)
+    parser.add_argument('--max-age-days', type=float, default=None)
+    parser.add_argument('--dry-run', action='store_true')
+    args = parser.parse_args()
+
+    compactor = StorageCompactor(args.storage_dir, RetentionPolicy(args.keep_last, args.max_age_days))
+    if args.cik:
+        results = {cik: compactor.compact(cik, dry_run=args.dry_run) for cik in args.cik}
+    else:
+        results = compactor.compact_all(dry_run=args.dry_run)
+    for cik, result in results.items():
+        if 'error' in result:
+            print(f"{cik}: error: {result['error']}")
+        else:
+            action = 'would archive' if args.dry_run else 'archived'
+            print(f"{cik}: {action} {len(result['archived'])} versions")
+
+
+if __name__ == '__main__':
+    main()
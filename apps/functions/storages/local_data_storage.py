@@ -1,29 +1,122 @@
 import os
 import json
 from apps.functions.managers import LoggingManager
-from apps.utils import now
+from apps.utils import FileLock, atomic_write, frame_hash, json_hash, latest_entry, latest_file, new_version_id, normalize_cik, update_latest
+from .storage_formats import get_storage_format, read_frame
+
+# Every storage type is CSV unless the caller opts into a columnar format for it
+DEFAULT_STORAGE_FORMATS = {}
+# Opt-in: columnar, compressed storage for the stages the queries and the dashboard read back (needs pyarrow)
+COLUMNAR_STORAGE_FORMATS = {
+    'preprocessed_data': 'parquet',
+    'processed_data': 'parquet',
+}
 
 
 class DataStorageManager:
-    def __init__(self, local_storage_dir, cik_number):
+    def __init__(self, local_storage_dir, cik_number, storage_formats=None, default_format='csv'):
+        """
+        Initialize the DataStorageManager.
+        Args:
+            local_storage_dir (str): Root directory of the local store.
+            cik_number (str): The company whose data is stored.
+            storage_formats (dict, optional): Storage type -> format name ('csv', 'parquet' or 'feather'),
+                                              e.g. COLUMNAR_STORAGE_FORMATS. Defaults to CSV for every type.
+            default_format (str): Format of the storage types not listed in storage_formats.
+        """
         self.local_storage_dir = local_storage_dir
         self.cik_number = cik_number
+        self.storage_formats = dict(DEFAULT_STORAGE_FORMATS if storage_formats is None else storage_formats)
+        self.default_format = default_format
         self.error_handler = LoggingManager()
         self._setup_local_storage()
 
     def _setup_local_storage(self):
         if not os.path.exists(self.local_storage_dir):
-            os.makedirs(self.local_storage_dir)
+            os.makedirs(self.local_storage_dir, exist_ok=True)
             self.error_handler.log(f"Created local storage directory at {self.local_storage_dir}", "INFO")
 
     def store_data(self, data, storage_type, category_name=None):
-        timestamp = now()
         dir_path = self._get_dir_path(storage_type, category_name)
-        file_name = f"{self.cik_number}_{category_name.replace(' ', '_') if category_name else 'data'}_{timestamp}"
-        file_path = os.path.join(dir_path, f"{file_name}.csv")  # Adding .csv here
-        if not os.path.exists(file_path):
-            self._store_data_to_csv(data, dir_path, file_name)  # file_name without .csv
-        return f"{file_name}.csv"
+        storage_format = self._storage_format(storage_type)
+        content_hash = frame_hash(data)
+        # Versions are taken under the CIK lock so that they are also the order in which files become latest
+        with self.cik_lock():
+            unchanged = self._unchanged_latest(dir_path, content_hash, storage_format.extension)
+            if unchanged:
+                return unchanged
+            version = new_version_id()
+            file_name = f"{self.cik_number}_{category_name.replace(' ', '_') if category_name else 'data'}_{version}"
+            file_path = os.path.join(dir_path, f"{file_name}{storage_format.extension}")
+            if not self._store_data_to_file(data, file_path, storage_format, content_hash):
+                return None
+        return f"{file_name}{storage_format.extension}"
+
+    def _unchanged_latest(self, dir_path, content_hash, extension):
+        """
+        Get the latest version of a directory if it already holds this content.
+        Returns:
+            str: Its file name, or None if the content is new.
+        """
+        latest_path, latest_hash = latest_entry(dir_path)
+        if latest_hash != content_hash or not latest_path.endswith(extension):
+            return None
+        self.error_handler.log(f"Content unchanged, keeping {latest_path}", "INFO")
+        return os.path.basename(latest_path)
+
+    def content_hash(self, storage_type, category_name, sub_category=None, cik_number=None):
+        """
+        Get the content hash of the latest version stored for a category.
+        Args:
+            storage_type (str): The storage type, e.g. 'preprocessed_data'.
+            category_name (str): The category.
+            sub_category (str, optional): The chart type of a store_json_data category.
+            cik_number (str, optional): Look up another company than the manager's own CIK.
+        Returns:
+            str: The hash, or None if nothing (or a version without a recorded hash) is stored.
+        """
+        dir_path = os.path.join(self._cik_dir(cik_number), storage_type, category_name.replace(' ', '_'))
+        if sub_category is not None:
+            dir_path = os.path.join(dir_path, sub_category.replace(' ', '_'))
+        return latest_entry(dir_path)[1]
+
+    def cik_lock(self, cik_number=None, timeout=None):
+        """
+        Inter-process lock serialising writes to one company's part of the store.
+        Args:
+            cik_number (str, optional): Lock another company than the manager's own CIK.
+            timeout (float, optional): Seconds to wait for the lock. Waits indefinitely if None.
+        Returns:
+            FileLock: Use as a context manager.
+        """
+        return FileLock(os.path.join(self._cik_dir(cik_number), '.lock'), timeout)
+
+    def get_file_path(self, storage_type, category_name, file_name, sub_category=None):
+        """
+        Get the path of a file returned by store_data (or store_json_data when sub_category is given).
+        """
+        if sub_category is not None:
+            return os.path.join(self._get_extended_dir_path(storage_type, category_name, sub_category), file_name)
+        return os.path.join(self._get_dir_path(storage_type, category_name), file_name)
+
+    def read_data(self, file_path, columns=None):
+        """
+        Read a stored DataFrame, whatever format it was written in.
+        Args:
+            file_path (str): Path of the stored file.
+            columns (list of str, optional): Only load these columns.
+        Returns:
+            DataFrame: The stored data.
+        """
+        return read_frame(file_path, columns=columns)
+
+    def _storage_format(self, storage_type):
+        storage_format = get_storage_format(self.storage_formats.get(storage_type, self.default_format))
+        if not storage_format.available:
+            self.error_handler.log(f"{storage_format.name} storage requires pyarrow; storing {storage_type} as CSV.",
+                                   "WARNING")
+            storage_format = get_storage_format('csv')
+        return storage_format
 
     def store_json_data(self, json_data, storage_type, category_name=None, sub_category=None):
         """
@@ -33,53 +126,68 @@ class DataStorageManager:
             storage_type: Type of storage (e.g., 'processed_json')
             category_name: Main category name (e.g., 'Profitability')
             sub_category: Sub-category or chart type (e.g., 'bar_chart')
+        Returns:
+            str: The stored file name; the latest existing file if its content is identical.
         """
-        timestamp = now()
         dir_path = self._get_extended_dir_path(storage_type, category_name, sub_category)
-        file_name = f"{self.cik_number}_{category_name.replace(' ', '_') if category_name else 'data'}_{sub_category}_{timestamp}.json"
-        file_path = os.path.join(dir_path, file_name)
-
-        with open(file_path, 'w') as json_file:
-            json.dump(json_data, json_file, indent=4)
+        content_hash = json_hash(json_data)
+        with self.cik_lock():
+            unchanged = self._unchanged_latest(dir_path, content_hash, '.json')
+            if unchanged:
+                return unchanged
+            version = new_version_id()
+            file_name = f"{self.cik_number}_{category_name.replace(' ', '_') if category_name else 'data'}_{sub_category}_{version}.json"
+            file_path = os.path.join(dir_path, file_name)
+
+            with atomic_write(file_path) as tmp_path:
+                with open(tmp_path, 'w') as json_file:
+                    json.dump(json_data, json_file, indent=4)
+            update_latest(dir_path, file_name, content_hash)
 
         return file_name
 
+    def _cik_dir(self, cik_number=None):
+        # Zero-padded, so '12927' and '0000012927' share one directory
+        return os.path.join(self.local_storage_dir, normalize_cik(cik_number or self.cik_number))
+
     def _get_dir_path(self, storage_type, category_name):
-        formatted_cik = f"{int(self.cik_number):010d}"
-        dir_path = os.path.join(self.local_storage_dir, formatted_cik, storage_type,
+        dir_path = os.path.join(self._cik_dir(), storage_type,
                                 category_name.replace(' ', '_') if category_name else '')
-        if not os.path.exists(dir_path):
-            os.makedirs(dir_path)
+        os.makedirs(dir_path, exist_ok=True)
         return dir_path
 
     def _get_extended_dir_path(self, storage_type, category_name, sub_category):
         """
         Create an extended directory path based on category and sub-category.
         """
-        base_dir = os.path.join(self.local_storage_dir, str(self.cik_number), storage_type)
+        base_dir = os.path.join(self._cik_dir(), storage_type)
         if category_name:
             base_dir = os.path.join(base_dir, category_name.replace(' ', '_'))
         if sub_category:
             base_dir = os.path.join(base_dir, sub_category.replace(' ', '_'))
 
-        if not os.path.exists(base_dir):
-            os.makedirs(base_dir)
+        os.makedirs(base_dir, exist_ok=True)
 
         return base_dir
 
-    def _store_data_to_csv(self, data, dir_path, file_name):
-        file_path = os.path.join(dir_path, f"{file_name}.csv")
+    def _store_data_to_file(self, data, file_path, storage_format, content_hash=None):
         try:
-            data.to_csv(file_path, index=False)
+            # Readers (and the latest pointer) never see a partially written file
+            with atomic_write(file_path) as tmp_path:
+                storage_format.write(data, tmp_path)
+            update_latest(os.path.dirname(file_path), os.path.basename(file_path), content_hash)
             self.error_handler.log(f"Data stored locally at {file_path}", "INFO")
+            return True
         except Exception as e:
             self.error_handler.log_error(e, "ERROR")
+            return False
 
-    def get_processed_data_file_path(self, query_name):
+    def get_processed_data_file_path(self, query_name, cik_number=None):
         """
         Get the path of the latest file for a specific query in processed_data.
         Args:
             query_name (str): The name of the query.
+            cik_number (str, optional): Look up another company than the manager's own CIK.
         Returns:
             str: The path of the latest file, or None if no file is found.
         """
@@ -98,28 +206,26 @@ class DataStorageManager:
             self.error_handler.log(f"No folder mapping found for query {query_name}.", "ERROR")
             return None
 
-        dir_path = os.path.join(self.local_storage_dir, str(self.cik_number), 'preprocessed_data', folder_name)
+        dir_path = os.path.join(self._cik_dir(cik_number), 'preprocessed_data', folder_name)
         if not os.path.isdir(dir_path):
             self.error_handler.log(f"Directory not found for query {query_name}.", "ERROR")
             return None
 
         try:
-            files = [os.path.join(dir_path, f) for f in os.listdir(dir_path)]
-            if not files:
+            latest_path = latest_file(dir_path)
+            if not latest_path:
                 self.error_handler.log(f"No files found for query {query_name}.", "WARNING")
-                return None
-
-            files.sort(key=lambda x: os.path.getmtime(x), reverse=True)
-            return files[0]
+            return latest_path
         except Exception as e:
             self.error_handler.log_error(e, "ERROR")
             return None
 
-    def get_latest_processed_data_file_path(self, query_name):
+    def get_latest_processed_data_file_path(self, query_name, cik_number=None):
         """
         Get the path of the latest processed data file for a specific query.
         Args:
             query_name (str): The name of the query.
+            cik_number (str, optional): Look up another company than the manager's own CIK.
         Returns:
             str: The path of the latest file, or None if no file is found.
         """
@@ -133,19 +239,16 @@ class DataStorageManager:
             self.error_handler.log(f"No folder mapping found for query {query_name}.", "ERROR")
             return None
 
-        dir_path = os.path.join(self.local_storage_dir, str(self.cik_number), 'processed_data', folder_name)
+        dir_path = os.path.join(self._cik_dir(cik_number), 'processed_data', folder_name)
         if not os.path.isdir(dir_path):
             self.error_handler.log(f"Directory not found for query {query_name}.", "ERROR")
             return None
 
         try:
-            files = [os.path.join(dir_path, f) for f in os.listdir(dir_path)]
-            if not files:
+            latest_path = latest_file(dir_path)
+            if not latest_path:
                 self.error_handler.log(f"No files found for query {query_name}.", "WARNING")
-                return None
-
-            files.sort(key=lambda x: os.path.getmtime(x), reverse=True)
-            return files[0]
+            return latest_path
         except Exception as e:
             self.error_handler.log_error(e, "ERROR")
             return None
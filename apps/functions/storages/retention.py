@@ -0,0 +1,172 @@
+'''
+This module provides the retention policy of the local store and the StorageCompactor applying it.
+Every pipeline run adds a new version per category (and chart type) of a CIK; the compactor keeps the versions
+the policy asks for and folds all older ones into a single compressed archive per CIK
+(<local_storage_dir>/<cik>/archive.zip), so the version directories, the manifest lookups and the latest
+pointers stay small however long the store has been running. The latest version of a directory is never archived.
+Example usage:
+    compactor = StorageCompactor('data', RetentionPolicy(keep_last=5, max_age_days=90))
+    compactor.compact('0000012927')
+    python -m apps.functions.storages.compact --storage-dir data --keep-last 5 --max-age-days 90
+'''
+import os
+import shutil
+import time
+import zipfile
+
+from apps.functions.managers import LoggingManager
+from apps.utils import FileLock, ManifestStore, atomic_write, latest_file, normalize_cik
+
+ARCHIVE_NAME = 'archive.zip'
+# Files of the store that are not versions of a category
+_NON_VERSION_FILES = ('index.md',)
+
+
+class RetentionPolicy:
+    def __init__(self, keep_last=5, max_age_days=None):
+        """
+        Which versions of a category stay in the store.
+        A version is kept if it is one of the newest keep_last versions or younger than max_age_days.
+        Args:
+            keep_last (int): Number of newest versions to keep per directory; at least 1.
+            max_age_days (float, optional): Also keep every version younger than this. Ignored if None.
+        """
+        if keep_last < 1:
+            raise ValueError("keep_last must be at least 1 so that the latest version is kept")
+        self.keep_last = keep_last
+        self.max_age_days = max_age_days
+
+    def expired(self, file_names, now=None):
+        """
+        Select the versions of one directory that fall outside the policy.
+        Args:
+            file_names (list of str): Version file names of the directory.
+            now (float, optional): Reference time (epoch seconds). Defaults to the current time.
+        Returns:
+            list of str: The file names to archive, oldest first.
+        """
+        ordered = sorted(file_names, key=version_of)
+        candidates = ordered[:-self.keep_last]
+        if self.max_age_days is None:
+            return candidates
+        cutoff = (now or time.time()) - self.max_age_days * 86400
+        return [file_name for file_name in candidates if (version_time(file_name) or 0) < cutoff]
+
+
+def version_of(file_name):
+    """
+    Returns:
+        str: The version id of a stored file: the suffix after its last underscore.
+    """
+    return os.path.splitext(file_name)[0].split('_')[-1]
+
+
+def version_time(file_name):
+    """
+    Returns:
+        float or None: The epoch time encoded in the leading timestamp of a file's version id.
+    """
+    try:
+        return time.mktime(time.strptime(version_of(file_name)[:14], '%Y%m%d%H%M%S'))
+    except ValueError:
+        return None
+
+
+class StorageCompactor:
+    def __init__(self, local_storage_dir, policy=None, manifest=None):
+        """
+        Initialize the StorageCompactor.
+        Args:
+            local_storage_dir (str): Root directory of the local store.
+            policy (RetentionPolicy, optional): Defaults to RetentionPolicy().
+            manifest (ManifestStore, optional): Manifest to update; defaults to the store's manifest.
+        """
+        self.local_storage_dir = local_storage_dir
+        self.policy = policy or RetentionPolicy()
+        self.manifest = manifest or ManifestStore(local_storage_dir)
+        self.error_handler = LoggingManager()
+
+    def compact(self, cik_number, dry_run=False):
+        """
+        Archive the versions of a CIK that fall outside the retention policy.
+        Args:
+            cik_number (str): The company.
+            dry_run (bool): Only report what would be archived.
+        Returns:
+            dict: 'archived' (list of archived paths) and 'archive' (path of the CIK's archive),
+                  or {'error': message}.
+        """
+        formatted_cik = normalize_cik(cik_number)
+        cik_dir = os.path.join(self.local_storage_dir, formatted_cik)
+        archive_path = os.path.join(cik_dir, ARCHIVE_NAME)
+        try:
+            # Same lock as DataStorageManager.cik_lock: no version is written while the CIK is compacted
+            with FileLock(os.path.join(cik_dir, '.lock')):
+                expired = self._expired_files(cik_dir)
+                if expired and not dry_run:
+                    self._append_to_archive(archive_path, expired)
+                    self.manifest.mark_archived([path for path, _ in expired], archive_path)
+                    for path, _ in expired:
+                        os.remove(path)
+        except Exception as e:
+            self.error_handler.log_error(e, "ERROR")
+            return {'error': str(e)}
+
+        archived = [path for path, _ in expired]
+        if archived and not dry_run:
+            self.error_handler.log(f"Archived {len(archived)} versions of CIK {formatted_cik} into {archive_path}",
+                                   "INFO")
+        return {'archived': archived, 'archive': archive_path}
+
+    def compact_all(self, dry_run=False):
+        """
+        Compact every CIK of the store.
+        Returns:
+            dict: CIK number -> result of compact().
+        """
+        ciks = sorted(name for name in os.listdir(self.local_storage_dir)
+                      if name.isdigit() and os.path.isdir(os.path.join(self.local_storage_dir, name)))
+        results = {}
+        for cik in ciks:
+            formatted_cik = normalize_cik(cik)
+            if formatted_cik not in results:
+                results[formatted_cik] = self.compact(formatted_cik, dry_run=dry_run)
+        return results
+
+    def _expired_files(self, cik_dir):
+        """
+        Returns:
+            list of tuple: (path, archive member name) of every version to archive.
+        """
+        expired = []
+        now = time.time()
+        for dir_path, dir_names, file_names in os.walk(cik_dir):
+            dir_names[:] = [name for name in dir_names if not name.startswith('.')]
+            if dir_path == cik_dir:
+                continue  # Lock file and archive, no versions
+            versions = [name for name in file_names
+                        if not name.startswith('.') and name not in _NON_VERSION_FILES]
+            if not versions:
+                continue
+            latest = latest_file(dir_path)
+            for file_name in self.policy.expired(versions, now):
+                path = os.path.join(dir_path, file_name)
+                if latest and os.path.samefile(path, latest):
+                    continue
+                member = os.path.relpath(path, self.local_storage_dir).replace(os.sep, '/')
+                expired.append((path, member))
+        return expired
+
+    @staticmethod
+    def _append_to_archive(archive_path, files):
+        # Append to a copy and swap it in, so a crash never leaves a truncated archive behind
+        with atomic_write(archive_path) as tmp_path:
+            if os.path.exists(archive_path):
+                shutil.copyfile(archive_path, tmp_path)
+            with zipfile.ZipFile(tmp_path, 'a', compression=zipfile.ZIP_DEFLATED, compresslevel=9) as archive:
+                members = set(archive.namelist())
+                for path, member in files:
+                    # Already archived by an earlier run that stopped before deleting the original
+                    if member not in members:
+                        archive.write(path, member)
+
@@ -0,0 +1,144 @@
+'''
+This module provides the SnowflakeBulkLoader class, which loads DataFrames into a Snowflake table through its
+table stage without a shared scratch file:
+the frames are split into chunks written as compressed files (Snappy Parquet, or gzipped CSV without pyarrow)
+into a private temp directory, the chunks are PUT in parallel threads under a stage prefix unique to the load,
+and a single COPY loads that prefix (purging it afterwards). Concurrent loads therefore never clobber each
+other's files, and nothing is compressed twice.
+Frames are first mapped onto the table's columns (the pipeline's 'end'/'val' become 'End'/'Value', columns the
+table does not have are left out), so every column is loaded by name and none is silently skipped.
+Example usage:
+    loader = SnowflakeBulkLoader(connection, chunk_rows=250000, max_workers=4)
+    loader.load([liquidity_df, profitability_df], 'FACTS')
+'''
+import os
+import shutil
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+from apps.functions.managers import LoggingManager
+from apps.types import FACT_COLUMN_ALIASES, FACT_TABLE_COLUMNS
+from apps.utils import new_version_id
+from .storage_formats import PYARROW_AVAILABLE
+
+DEFAULT_CHUNK_ROWS = 250000
+
+
+def to_table_columns(frame, table_columns=FACT_TABLE_COLUMNS, aliases=FACT_COLUMN_ALIASES):
+    """
+    Rename a frame's columns to the table's column names and leave out the columns the table does not have.
+    Args:
+        frame (pd.DataFrame): The data, e.g. a preprocessed frame with 'end' and 'val' columns.
+        table_columns (iterable of str): The table's columns.
+        aliases (dict): Frame column name -> table column name, for names that differ by more than case.
+    Returns:
+        pd.DataFrame: The frame with table column names only.
+    Raises:
+        ValueError: If two columns map to the same table column, or none maps to any.
+    """
+    by_lower_name = {column.lower(): column for column in table_columns}
+    renames = {}
+    for column in frame.columns:
+        table_column = by_lower_name.get(aliases.get(column, column).lower())
+        if table_column is None:
+            continue
+        if table_column in renames.values():
+            raise ValueError(f"Several columns map to table column {table_column}")
+        renames[column] = table_column
+    if not renames:
+        raise ValueError(f"None of the columns {list(frame.columns)} are table columns")
+    return frame[list(renames)].rename(columns=renames)
+
+
+class SnowflakeBulkLoader:
+    def __init__(self, connection, chunk_rows=DEFAULT_CHUNK_ROWS, max_workers=4, file_format=None,
+                 table_columns=FACT_TABLE_COLUMNS):
+        """
+        Initialize the SnowflakeBulkLoader.
+        Args:
+            connection: An open Snowflake connection (or any DB-API connection with the same cursor interface).
+            chunk_rows (int): Rows per staged file.
+            max_workers (int): Number of parallel PUT threads.
+            file_format (str, optional): 'parquet' or 'csv'. Defaults to Parquet when pyarrow is installed.
+            table_columns (iterable of str, optional): Columns of the target tables; frames are mapped onto them
+                                                       with to_table_columns. None loads the frames as they are.
+        """
+        self.connection = connection
+        self.chunk_rows = chunk_rows
+        self.max_workers = max_workers
+        self.file_format = file_format or ('parquet' if PYARROW_AVAILABLE else 'csv')
+        self.table_columns = table_columns
+        self.error_handler = LoggingManager()
+
+    def load(self, frames, table_name, match_columns=False):
+        """
+        Load one or more DataFrames into a table with one COPY.
+        Args:
+            frames (pd.DataFrame or list of pd.DataFrame): The data; every frame has the same columns.
+            table_name (str): The target table; its table stage (@%table) is used for the upload.
+            match_columns (bool): Load the frames' columns into the table columns of the same name. Always the
+                                  case with table_columns; otherwise CSV chunks are loaded by position.
+        Returns:
+            dict: 'rows', 'files' and 'stage_path' of the load, or {'error': message}.
+        """
+        frames = [frames] if hasattr(frames, 'columns') else list(frames)
+        frames = [frame for frame in frames if not frame.empty]
+        if not frames:
+            return {'rows': 0, 'files': 0, 'stage_path': None}
+
+        # The prefix keeps concurrent loads into the same table stage apart
+        stage_path = f"@%{table_name}/bulk_{new_version_id()}/"
+        tmp_dir = tempfile.mkdtemp(prefix='snowflake_bulk_')
+        try:
+            if self.table_columns is not None:
+                frames = [to_table_columns(frame, self.table_columns) for frame in frames]
+                match_columns = True
+            file_paths = self._write_chunks(frames, tmp_dir)
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                list(executor.map(lambda file_path: self._put(file_path, stage_path), file_paths))
+            self._copy(table_name, stage_path, list(frames[0].columns) if match_columns else None)
+        except Exception as e:
+            self.error_handler.log(f"Error bulk loading into {table_name}: {e}", "ERROR")
+            return {'error': str(e)}
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+        rows = sum(len(frame) for frame in frames)
+        self.error_handler.log(f"Loaded {rows} rows in {len(file_paths)} files into {table_name}", "INFO")
+        return {'rows': rows, 'files': len(file_paths), 'stage_path': stage_path}
+
+    def _write_chunks(self, frames, tmp_dir):
+        file_paths = []
+        for frame in frames:
+            for start in range(0, len(frame), self.chunk_rows):
+                chunk = frame.iloc[start:start + self.chunk_rows]
+                file_path = os.path.join(tmp_dir, f"chunk_{len(file_paths):05d}{self._extension()}")
+                if self.file_format == 'parquet':
+                    chunk.to_parquet(file_path, index=False, compression='snappy')
+                else:
+                    chunk.to_csv(file_path, index=False, compression='gzip')
+                file_paths.append(file_path)
+        return file_paths
+
+    def _extension(self):
+        return '.parquet' if self.file_format == 'parquet' else '.csv.gz'
+
+    def _put(self, file_path, stage_path):
+        # Chunks are compressed already; one cursor per thread
+        file_url = 'file://' + os.path.abspath(file_path).replace('\\', '/')
+        with self.connection.cursor() as cursor:
+            cursor.execute(f"PUT '{file_url}' {stage_path} AUTO_COMPRESS=FALSE OVERWRITE=TRUE")
+
+    def _copy(self, table_name, stage_path, columns=None):
+        if self.file_format == 'parquet':
+            file_format = "FILE_FORMAT = (TYPE = 'PARQUET') MATCH_BY_COLUMN_NAME = CASE_INSENSITIVE"
+        else:
+            file_format = ("FILE_FORMAT = (TYPE = 'CSV' COMPRESSION = 'GZIP' "
+                           "FIELD_OPTIONALLY_ENCLOSED_BY = '\"' SKIP_HEADER = 1)")
+        source = stage_path
+        if columns and self.file_format != 'parquet':
+            # CSV has no column names to match on: map the file columns explicitly
+            table_name = f"{table_name} ({', '.join(columns)})"
+            source = f"(SELECT {', '.join(f'${position}' for position in range(1, len(columns) + 1))} FROM {stage_path})"
+        with self.connection.cursor() as cursor:
+            cursor.execute(f"COPY INTO {table_name} FROM {source} {file_format} PURGE = TRUE")
@@ -0,0 +1,207 @@
+'''
+This module provides a process-wide pool of Snowflake connections, so that the SnowflakeDataManager of every
+pipeline (one per CIK in multi-company runs) borrows an authenticated session instead of opening a new one.
+Connections are opened lazily on first checkout, checked on every checkout (closed connections are dropped, and
+connections idle for longer than ping_after are pinged with SELECT 1 first), kept alive server-side with
+client_session_keep_alive, and bounded: callers wait for a free connection once max_size are in use.
+The connect function is injectable, so the pool can run against a fake connector.
+Example usage:
+    pool = get_connection_pool(SnowflakeConfig())
+    with pool.connection() as connection:
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT 1')
+'''
+import atexit
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from snowflake import connector
+
+from apps.functions.managers import LoggingManager
+
+DEFAULT_POOL_SIZE = 4
+DEFAULT_PING_AFTER = 300
+
+
+class SnowflakeConnectionPool:
+    def __init__(self, connect, max_size=DEFAULT_POOL_SIZE, ping_after=DEFAULT_PING_AFTER, timeout=None):
+        """
+        Initialize the SnowflakeConnectionPool.
+        Args:
+            connect (callable): Opens a new connection, e.g. a snowflake.connector.connect partial.
+            max_size (int): Maximum number of open connections.
+            ping_after (float): Ping connections idle for longer than this many seconds before handing them out.
+            timeout (float): Seconds to wait for a free connection. Waits indefinitely if None.
+        """
+        self._connect = connect
+        self.max_size = max_size
+        self.ping_after = ping_after
+        self.timeout = timeout
+        self.error_handler = LoggingManager()
+        self._idle = []  # (connection, returned_at), most recently returned last
+        self._size = 0
+        self._pid = os.getpid()
+        self._condition = threading.Condition()
+        self.stats = {'connects': 0, 'checkouts': 0, 'reuses': 0, 'discarded': 0, 'waits': 0}
+
+    @contextmanager
+    def connection(self):
+        """
+        Borrow a connection for the duration of a with block.
+        Yields:
+            A healthy connection; it returns to the pool afterwards.
+        """
+        connection = self.acquire()
+        try:
+            yield connection
+        finally:
+            # Also after a failed statement: a broken session is caught by the health check on checkout
+            self.release(connection)
+
+    def acquire(self):
+        deadline = None if self.timeout is None else time.monotonic() + self.timeout
+        with self._condition:
+            self.stats['checkouts'] += 1
+        while True:
+            with self._condition:
+                self._reset_after_fork()
+                while not self._idle and self._size >= self.max_size:
+                    self.stats['waits'] += 1
+                    remaining = None if deadline is None else deadline - time.monotonic()
+                    if remaining is not None and remaining <= 0:
+                        raise TimeoutError("Timed out waiting for a Snowflake connection")
+                    self._condition.wait(remaining)
+                if self._idle:
+                    connection, returned_at = self._idle.pop()
+                else:
+                    connection, returned_at = None, None
+                    self._size += 1  # Reserve the slot before connecting outside the lock
+
+            if connection is None:
+                try:
+                    connection = self._connect()
+                except BaseException:
+                    self._forget()
+                    raise
+                self.stats['connects'] += 1
+                return connection
+            if self._healthy(connection, returned_at):
+                self.stats['reuses'] += 1
+                return connection
+            self.stats['discarded'] += 1
+            self._close(connection)
+            self._forget()
+
+    def release(self, connection, discard=False):
+        if discard:
+            self._close(connection)
+            self._forget()
+            return
+        with self._condition:
+            if os.getpid() != self._pid:
+                return  # Borrowed before a fork; the new process owns no connections
+            self._idle.append((connection, time.monotonic()))
+            self._condition.notify()
+
+    def close_all(self):
+        """
+        Close the idle connections. Connections currently borrowed return to the pool as usual.
+        """
+        with self._condition:
+            idle, self._idle = self._idle, []
+            self._size -= len(idle)
+        for connection, _ in idle:
+            self._close(connection)
+
+    def get_stats(self):
+        """
+        Returns:
+            dict: Connects, checkouts, reuses, discarded connections, waits, and open/idle connection counts.
+        """
+        with self._condition:
+            return dict(self.stats, open=self._size, idle=len(self._idle))
+
+    def _healthy(self, connection, returned_at):
+        is_closed = getattr(connection, 'is_closed', None)
+        if callable(is_closed) and is_closed():
+            return False
+        if time.monotonic() - returned_at < self.ping_after:
+            return True
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT 1')
+            return True
+        except Exception as e:
+            self.error_handler.log(f"Dropping unhealthy Snowflake connection: {e}", "WARNING")
+            return False
+
+    def _forget(self):
+        with self._condition:
+            self._size -= 1
+            self._condition.notify()
+
+    def _reset_after_fork(self):
+        # Sessions must not be shared with a forked child; it starts with an empty pool
+        if os.getpid() != self._pid:
+            self._pid = os.getpid()
+            self._idle = []
+            self._size = 0
+
+    def _close(self, connection):
+        try:
+            connection.close()
+        except Exception as e:
+            self.error_handler.log(f"Error closing Snowflake connection: {e}", "WARNING")
+
+
+_POOLS = {}
+_POOLS_LOCK = threading.Lock()
+
+
+def get_connection_pool(config, connect=None, max_size=DEFAULT_POOL_SIZE):
+    """
+    Get the process-wide pool of a Snowflake account, user and session context.
+    Args:
+        config (SnowflakeConfig): Connection settings.
+        connect (callable, optional): Opens a connection. Defaults to snowflake.connector.connect with the config.
+        max_size (int): Maximum number of open connections, used when the pool is created.
+    Returns:
+        SnowflakeConnectionPool: The same pool for every caller with the same settings.
+    """
+    key = (config.account, config.user, config.role, config.warehouse, config.database, config.schema)
+    with _POOLS_LOCK:
+        pool = _POOLS.get(key)
+        if pool is None:
+            pool = SnowflakeConnectionPool(connect or (lambda: _connect(config)), max_size=max_size)
+            _POOLS[key] = pool
+        return pool
+
+
+def close_connection_pools():
+    """
+    Close the idle connections of every pool; registered to run at interpreter exit.
+    """
+    with _POOLS_LOCK:
+        pools = list(_POOLS.values())
+    for pool in pools:
+        pool.close_all()
+
+
+def _connect(config):
+    return connector.connect(
+        user=config.user,
+        password=config.password,
+        account=config.account,
+        warehouse=config.warehouse,
+        database=config.database,
+        schema=config.schema,
+        port=config.port,
+        role=config.role,
+        # Keeps pooled sessions from expiring while idle
+        client_session_keep_alive=True,
+    )
+
+
+atexit.register(close_connection_pools)
@@ -0,0 +1,99 @@
+'''
+This module provides the file formats DataStorageManager can store DataFrames in.
+CSV is always available; Parquet and Feather are columnar, compressed and keep dtypes (integers, dates,
+categoricals) across a round trip, and let readers load only the columns they need. They require pyarrow,
+which is an optional dependency: without it the columnar formats report themselves unavailable.
+Example usage:
+    storage_format = get_storage_format('parquet')
+    storage_format.write(df, 'data/0000012927/processed_data/Profitability/file.parquet')
+    df = read_frame('data/0000012927/processed_data/Profitability/file.parquet', columns=['end', 'Revenues'])
+'''
+import importlib.util
+import os
+
+import pandas as pd
+
+PYARROW_AVAILABLE = importlib.util.find_spec('pyarrow') is not None
+
+
+class CsvFormat:
+    name = 'csv'
+    extension = '.csv'
+    available = True
+
+    def write(self, df, file_path):
+        df.to_csv(file_path, index=False)
+
+    def read(self, file_path, columns=None):
+        return pd.read_csv(file_path, usecols=columns)
+
+
+class ParquetFormat:
+    name = 'parquet'
+    extension = '.parquet'
+    available = PYARROW_AVAILABLE
+
+    def __init__(self, compression='zstd'):
+        self.compression = compression
+
+    def write(self, df, file_path):
+        df.to_parquet(file_path, engine='pyarrow', compression=self.compression, index=False)
+
+    def read(self, file_path, columns=None):
+        return pd.read_parquet(file_path, engine='pyarrow', columns=columns)
+
+
+class FeatherFormat:
+    name = 'feather'
+    extension = '.feather'
+    available = PYARROW_AVAILABLE
+
+    def __init__(self, compression='zstd'):
+        self.compression = compression
+
+    def write(self, df, file_path):
+        # Feather requires a default RangeIndex
+        df.reset_index(drop=True).to_feather(file_path, compression=self.compression)
+
+    def read(self, file_path, columns=None):
+        return pd.read_feather(file_path, columns=columns)
+
+
+STORAGE_FORMATS = {storage_format.name: storage_format
+                   for storage_format in (CsvFormat(), ParquetFormat(), FeatherFormat())}
+EXTENSIONS = {storage_format.extension: storage_format for storage_format in STORAGE_FORMATS.values()}
+
+
+def get_storage_format(name):
+    """
+    Get a storage format by name.
+    Args:
+        name (str): 'csv', 'parquet' or 'feather'.
+    Returns:
+        The storage format.
+    Raises:
+        ValueError: If the format is unknown.
+    """
+    try:
+        return STORAGE_FORMATS[name]
+    except KeyError:
+        raise ValueError(f"Unknown storage format '{name}'. Expected one of {sorted(STORAGE_FORMATS)}.")
+
+
+def format_for_path(file_path):
+    """
+    Get the storage format of a stored file from its extension (CSV for unknown extensions).
+    """
+    return EXTENSIONS.get(os.path.splitext(file_path)[1].lower(), STORAGE_FORMATS['csv'])
+
+
+def read_frame(file_path, columns=None):
+    """
+    Read a stored DataFrame in whatever format it was written.
+    Args:
+        file_path (str): The stored file.
+        columns (list of str, optional): Only load these columns.
+    Returns:
+        pd.DataFrame: The stored data.
+    """
+    return format_for_path(file_path).read(file_path, columns=columns)
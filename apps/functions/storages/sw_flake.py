@@ -1,6 +1,6 @@
 """
 This class manages connections and data operations with Snowflake.
-It handles establishing a connection to Snowflake, uploading data,
+It handles borrowing connections from the process-wide Snowflake connection pool, uploading data,
 executing queries, including those from SQL files, and closing the connection.
 """
 # TODO: Dynamic Handling of Stage and Table Names
@@ -11,23 +11,39 @@ executing queries, including those from SQL files, and closing the connection.
 # TODO: Enhanced error handling
 #  This class is our humble attempt to bring data to the table (quite literally).
 
-import os
+from contextlib import contextmanager
+
 import pandas as pd
 from snowflake import connector
+from snowflake.connector.errors import MissingDependencyError, NotSupportedError, ProgrammingError
 
 from apps.configs import SnowflakeConfig
 from apps.functions.managers import LoggingManager
-from apps.types import CSV_FILE_PATH, DEFAULT_TABLE_NAME
-from apps.utils import dataframe_to_csv
+from apps.types import DEFAULT_TABLE_NAME
+from apps.utils import new_version_id
+from .snowflake_bulk_loader import DEFAULT_CHUNK_ROWS, SnowflakeBulkLoader, to_table_columns
+from .snowflake_pool import get_connection_pool
+
+
+# Rows per batch when results are fetched as tuples (Arrow batches follow the result chunks of the server)
+DEFAULT_FETCH_ROWS = 100000
+# Table columns identifying one reported fact (a period is its start and end); upsert_data uses those in the data
+MERGE_KEY_COLUMNS = ('CIK', 'Metric', 'start', 'End')
 
 
 class SnowflakeDataManager:
-    def __init__(self, config: SnowflakeConfig, custom_table_name=None, custom_stage_name=None):
+    def __init__(self, config: SnowflakeConfig, custom_table_name=None, custom_stage_name=None, connection=None,
+                 upload_chunk_rows=DEFAULT_CHUNK_ROWS, upload_workers=4, pool=None):
         """
         Initializes the SnowflakeDataManager class.
+        No connection is opened here: operations borrow one from the pool when they run.
         Args:
             custom_table_name (str): Custom table name provided by the user.
             custom_stage_name (str): Custom stage name provided by the user.
+            connection: An already open connection to use instead of the pool.
+            pool (SnowflakeConnectionPool): Pool to borrow from. Defaults to the process-wide pool of the config.
+            upload_chunk_rows (int): Rows per file staged by upload_data.
+            upload_workers (int): Number of parallel PUT threads of upload_data.
         """
         self.user = config.user
         self.password = config.password
@@ -37,9 +53,11 @@ class SnowflakeDataManager:
         self.schema = config.schema
         self.port = config.port
         self.role = config.role
-        # Establish a connection
-        self.connection = None
-        self.connect_to_snowflake()
+        # A dedicated connection (injected or from connect_to_snowflake) takes precedence over the pool
+        self.connection = connection
+        self.pool = pool or get_connection_pool(config)
+        self.upload_chunk_rows = upload_chunk_rows
+        self.upload_workers = upload_workers
         # Initialize other classes
         self.error_handler = LoggingManager()
         # Set custom table and stage names
@@ -48,7 +66,7 @@ class SnowflakeDataManager:
 
     def connect_to_snowflake(self):
         """
-        Establishes a connection to Snowflake using environment variables for credentials.
+        Establishes a dedicated connection to Snowflake, used instead of the pool from then on.
         Raises:
             Exception: If there is an error in connecting to Snowflake.
         """
@@ -67,45 +85,134 @@ class SnowflakeDataManager:
             print(f"Error connecting to Snowflake: {e}")
             raise
 
+    @contextmanager
+    def _connection(self):
+        """
+        Yields:
+            The dedicated connection if there is one, otherwise a connection borrowed from the pool.
+        """
+        if self.connection is not None:
+            yield self.connection
+        else:
+            with self.pool.connection() as connection:
+                yield connection
+
     def upload_data(self, data, table_name=None):
         """
-        Converts a pandas DataFrame to CSV and uploads it to Snowflake.
+        Uploads one or more pandas DataFrames to a Snowflake table.
+        The data is staged as compressed chunk files in parallel and loaded with a single COPY,
+        see SnowflakeBulkLoader.
 
         Args:
-            data (pd.DataFrame): The DataFrame to upload.
+            data (pd.DataFrame or list of pd.DataFrame): The data to upload.
             table_name (str): The name of the Snowflake table. If None, uses the default table name.
+        Returns:
+            dict: 'rows', 'files' and 'stage_path' of the load, or {'error': message}.
         """
-        if self.connection is None or data.empty:
-            self.error_handler.log("No connection to Snowflake or data is empty.", "ERROR")
-            return
+        frames = [data] if isinstance(data, pd.DataFrame) else list(data)
+        if all(frame.empty for frame in frames):
+            self.error_handler.log("Data is empty.", "ERROR")
+            return {'error': 'Data is empty'}
 
         try:
-            # Convert DataFrame to CSV
-            dataframe_to_csv(data, CSV_FILE_PATH)
+            with self._connection() as connection:
+                loader = SnowflakeBulkLoader(connection, chunk_rows=self.upload_chunk_rows,
+                                             max_workers=self.upload_workers)
+                return loader.load(frames, table_name or DEFAULT_TABLE_NAME)
+        except Exception as e:
+            self.error_handler.log(f"Error in upload process: {e}", "ERROR")
+            return {'error': str(e)}
 
-            # Determine the table name
-            table_name = table_name or DEFAULT_TABLE_NAME
+    def upsert_data(self, data, table_name=None, key_columns=None):
+        """
+        Upserts a pandas DataFrame into a Snowflake table, so that reloading the same facts does not duplicate them.
+        The data is bulk loaded into a transient staging table and MERGEd into the target on the key columns:
+        new facts are inserted, facts whose values changed are updated and unchanged facts are left untouched.
+
+        Args:
+            data (pd.DataFrame): The data to upsert, e.g. a preprocessed frame. Its columns are mapped onto the
+                                 table's columns ('end' -> End, 'val' -> Value) and the others are left out.
+            table_name (str): The name of the Snowflake table. If None, uses the default table name.
+            key_columns (list of str): Table columns identifying a fact. Defaults to those of MERGE_KEY_COLUMNS
+                                       present in the data.
+        Returns:
+            dict: 'rows' staged, 'inserted' and 'updated' counts, or {'error': message}.
+        """
+        if data.empty:
+            self.error_handler.log("Data is empty.", "ERROR")
+            return {'error': 'Data is empty'}
 
-            # Generate the stage name for PUT command
-            put_stage_name = self._generate_stage_name(table_name, 'PUT')
+        table_name = table_name or DEFAULT_TABLE_NAME
+        try:
+            data = to_table_columns(data)
+        except ValueError as e:
+            self.error_handler.log(f"Cannot upsert into {table_name}: {e}", "ERROR")
+            return {'error': str(e)}
+        columns = list(data.columns)
+        key_columns = key_columns or [key for key in MERGE_KEY_COLUMNS if key in columns]
+        missing = [key for key in key_columns if key not in columns]
+        if not key_columns or missing:
+            self.error_handler.log(f"Merge key columns {missing or list(MERGE_KEY_COLUMNS)} are not in the data.",
+                                   "ERROR")
+            return {'error': 'Merge key columns missing from the data'}
 
-            # Upload CSV to Snowflake Stage
-            self.put_file_to_stage(CSV_FILE_PATH, put_stage_name)
+        # Later rows win, like the latest filing of a restated fact
+        data = data.drop_duplicates(subset=key_columns, keep='last')
+        staging_table = f"{table_name}_STAGING_{new_version_id().replace('-', '_')}"
+        try:
+            with self._connection() as connection:
+                try:
+                    with connection.cursor() as cursor:
+                        cursor.execute(f"CREATE TRANSIENT TABLE {staging_table} LIKE {table_name}")
+                    loader = SnowflakeBulkLoader(connection, chunk_rows=self.upload_chunk_rows,
+                                                 max_workers=self.upload_workers)
+                    load = loader.load(data, staging_table, match_columns=True)
+                    if 'error' in load:
+                        return load
+                    with connection.cursor() as cursor:
+                        cursor.execute(self._merge_statement(table_name, staging_table, columns, key_columns))
+                        counts = cursor.fetchone() or (0, 0)
+                finally:
+                    self._drop_table(connection, staging_table)
+        except Exception as e:
+            self.error_handler.log(f"Error upserting into {table_name}: {e}", "ERROR")
+            return {'error': str(e)}
 
-            # Delete the local CSV file after upload
-            try:
-                os.remove(CSV_FILE_PATH)
-                print(f"Temporary file {CSV_FILE_PATH} deleted successfully.")
-            except Exception as e:
-                self.error_handler.log(f"Error deleting temporary file: {e}", "ERROR")
+        inserted, updated = (list(counts) + [0, 0])[:2]
+        self.error_handler.log(f"Upserted {len(data)} rows into {table_name}: {inserted} inserted, "
+                               f"{updated} updated.", "INFO")
+        return {'rows': len(data), 'inserted': inserted, 'updated': updated}
 
-            # Generate the stage name for COPY command
-            copy_stage_name = self._generate_stage_name(table_name, 'COPY')
+    @staticmethod
+    def _merge_statement(table_name, staging_table, columns, key_columns):
+        """
+        Build the MERGE of a staging table into its target; NULL keys (e.g. an instant fact without start) match NULL.
+        """
+        value_columns = [column for column in columns if column not in key_columns]
+        order_by = next((column for column in columns if column.lower() == 'filed'), key_columns[0])
+        on = ' AND '.join(f"EQUAL_NULL(t.{column}, s.{column})" for column in key_columns)
+        changed = ' OR '.join(f"NOT EQUAL_NULL(t.{column}, s.{column})" for column in value_columns)
+        updates = ', '.join(f"t.{column} = s.{column}" for column in value_columns)
+        merge = f"""
+            MERGE INTO {table_name} AS t
+            USING (
+                SELECT {', '.join(columns)} FROM {staging_table}
+                QUALIFY ROW_NUMBER() OVER (PARTITION BY {', '.join(key_columns)} ORDER BY {order_by} DESC) = 1
+            ) AS s
+            ON {on}"""
+        if value_columns:
+            merge += f"""
+            WHEN MATCHED AND ({changed}) THEN UPDATE SET {updates}"""
+        return merge + f"""
+            WHEN NOT MATCHED THEN INSERT ({', '.join(columns)}) VALUES ({', '.join(f's.{column}' for column in columns)})
+        """
 
-            # Copy data from stage to table
-            self.copy_data_from_stage_to_table(copy_stage_name, table_name)
+    def _drop_table(self, connection, table_name):
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute(f"DROP TABLE IF EXISTS {table_name}")
         except Exception as e:
-            self.error_handler.log(f"Error in upload process: {e}", "ERROR")
+            self.error_handler.log(f"Error dropping staging table {table_name}: {e}", "ERROR")
 
     def put_file_to_stage(self, file_path, stage_name=None):
         """
@@ -116,15 +223,11 @@ class SnowflakeDataManager:
             stage_name (str): The name of the Snowflake stage to upload the file to.
                               If None, a stage name is generated.
         """
-        if self.connection is None:
-            self.error_handler.log("No connection to Snowflake.", "ERROR")
-            return
-
         try:
             # Generate the stage name using the provided or default table name
             stage_name = stage_name or self._generate_stage_name(DEFAULT_TABLE_NAME, 'PUT')
 
-            with self.connection.cursor() as cursor:
+            with self._connection() as connection, connection.cursor() as cursor:
                 put_command = f"PUT file://{file_path} {stage_name} AUTO_COMPRESS=FALSE OVERWRITE=TRUE"
                 cursor.execute(put_command)
                 print(f"File {file_path} uploaded to stage {stage_name}")
@@ -139,10 +242,6 @@ class SnowflakeDataManager:
             stage_name (str): The name of the Snowflake stage. If None, a stage name is generated.
             table_name (str): The name of the Snowflake table. If None, uses the default table name.
         """
-        if self.connection is None:
-            self.error_handler.log("No connection to Snowflake.", "ERROR")
-            return
-
         try:
             # Generate the stage name using the provided or default table name
             stage_name = stage_name or self._generate_stage_name(table_name, 'COPY')
@@ -150,7 +249,7 @@ class SnowflakeDataManager:
             # Use the provided or default table name
             table_name = table_name or DEFAULT_TABLE_NAME
 
-            with self.connection.cursor() as cursor:
+            with self._connection() as connection, connection.cursor() as cursor:
                 copy_command = f"COPY INTO {table_name} FROM {stage_name} FILE_FORMAT = (TYPE = 'CSV' FIELD_OPTIONALLY_ENCLOSED_BY = '\"' SKIP_HEADER = 1)"
                 cursor.execute(copy_command)
                 print(f"Data copied from stage {stage_name} to table {table_name}")
@@ -160,25 +259,66 @@ class SnowflakeDataManager:
     def get_data(self, query):
         """
         Executes a SQL query in Snowflake and returns the results.
+        Results are fetched as Arrow batches when the connector supports it, see iter_data.
         Args:
             query (str): The SQL query to execute.
         Returns:
             pd.DataFrame: The results of the query as a pandas DataFrame.
         """
-        if self.connection is None:
-            self.error_handler.log("No connection to Snowflake.", "ERROR")
-            return pd.DataFrame()
         try:
-            with self.connection.cursor() as cursor:
+            with self._connection() as connection, connection.cursor() as cursor:
                 cursor.execute(query)
-                result = cursor.fetchall()
-                # Convert the result into a pandas DataFrame
-                df = pd.DataFrame(result, columns=[col[0] for col in cursor.description])
-                return df
+                frames = list(self._fetch_batches(cursor, DEFAULT_FETCH_ROWS))
+                if not frames:
+                    return pd.DataFrame(columns=[col[0] for col in cursor.description])
+                return pd.concat(frames, ignore_index=True) if len(frames) > 1 else frames[0]
         except Exception as e:
             self.error_handler.log(f"Error executing query in Snowflake: {e}", "ERROR")
             return pd.DataFrame()
 
+    def iter_data(self, query, batch_size=DEFAULT_FETCH_ROWS):
+        """
+        Executes a SQL query in Snowflake and streams the results chunk by chunk.
+        The connection is held until the iterator is exhausted or closed.
+        Args:
+            query (str): The SQL query to execute.
+            batch_size (int): Rows per chunk on the tuple path; Arrow chunks follow the server's result chunks.
+        Yields:
+            pd.DataFrame: Consecutive chunks of the result.
+        Raises:
+            Exception: If the query or the fetch fails; chunks already yielded are not retracted.
+        """
+        try:
+            with self._connection() as connection, connection.cursor() as cursor:
+                cursor.execute(query)
+                yield from self._fetch_batches(cursor, batch_size)
+        except Exception as e:
+            self.error_handler.log(f"Error streaming query results from Snowflake: {e}", "ERROR")
+            raise
+
+    def _fetch_batches(self, cursor, batch_size):
+        """
+        Yield the result of an executed cursor as DataFrames: Arrow batches via fetch_pandas_batches,
+        or fetchmany tuples when the connector, pyarrow or the result format does not support Arrow.
+        """
+        try:
+            batches = cursor.fetch_pandas_batches()
+        except (AttributeError, MissingDependencyError, NotSupportedError, ProgrammingError) as e:
+            self.error_handler.log(f"Arrow fetch unavailable ({type(e).__name__}: {e}); fetching tuples.", "INFO")
+            batches = None
+        if batches is not None:
+            for batch in batches:
+                if not batch.empty:
+                    yield batch
+            return
+
+        columns = [col[0] for col in cursor.description]
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                return
+            yield pd.DataFrame(rows, columns=columns)
+
     def execute_query_from_file(self, query_filename):
         """
         Executes a SQL query from a file.
@@ -193,10 +333,11 @@ class SnowflakeDataManager:
 
     def close_connection(self):
         """
-        Closes the connection to Snowflake.
+        Closes the dedicated connection to Snowflake. Pooled connections stay open for the next borrower.
         """
         if self.connection:
             self.connection.close()
+            self.connection = None
             print("Connection to Snowflake closed successfully.")
 
     def create_table(self, table_name):
@@ -206,25 +347,26 @@ class SnowflakeDataManager:
             table_name (str): The name of the table to create.
         """
         try:
-            cursor = self.connection.cursor()
-            sql = f"""
-                   CREATE TABLE {self.schema}.{table_name} (
-                       EntityName VARCHAR(255),
-                       CIK INT,
-                       Metric VARCHAR(255),
-                       End DATE,
-                       Value FLOAT,
-                       accn VARCHAR(255),
-                       fy INT,
-                       fp VARCHAR(10),
-                       form VARCHAR(10),
-                       filed DATE,
-                       frame VARCHAR(50),
-                       start DATE
-                   )
-                   """
-            cursor.execute(sql)
-            self.connection.commit()
+            with self._connection() as connection:
+                cursor = connection.cursor()
+                sql = f"""
+                       CREATE TABLE {self.schema}.{table_name} (
+                           EntityName VARCHAR(255),
+                           CIK INT,
+                           Metric VARCHAR(255),
+                           End DATE,
+                           Value FLOAT,
+                           accn VARCHAR(255),
+                           fy INT,
+                           fp VARCHAR(10),
+                           form VARCHAR(10),
+                           filed DATE,
+                           frame VARCHAR(50),
+                           start DATE
+                       )
+                       """
+                cursor.execute(sql)
+                connection.commit()
             print(f"Table {table_name} created successfully with specific columns.")
         except Exception as e:
             self.error_handler.log(f"Error creating table: {e}", "ERROR")
@@ -1,6 +1,9 @@
 import json
 
+from apps.utils import atomic_write
+
 
 def save_json(json_data, file_path):
-    with open(file_path, 'w') as file:
-        json.dump(json_data, file, indent=4)
\ No newline at end of file
+    with atomic_write(file_path) as tmp_path:
+        with open(tmp_path, 'w') as file:
+            json.dump(json_data, file, indent=4)
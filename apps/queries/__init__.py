@@ -1 +1,3 @@
 from .query_tables import ASSET_LIABILITIES, CASH_FLOW, DEBT_MANAGEMENT, LIQUIDITY, MARKET_VALUATION, OPERATIONAL_EFFICIENCY, PROFITABILITY, QUERY_FILES
+from .sql_engine import LocalSQLEngine
+from .result_cache import QueryResultCache
@@ -0,0 +1,93 @@
+'''
+This module provides the shared pivot/ratio engine used by the query_tables functions.
+A long-format fact table (one row per Metric value) is pivoted once with a grouped aggregation,
+ratios are computed as masked NumPy divisions over whole columns and quarter labels are derived
+from the 'end' dates in one vectorized pass, so no query relies on row-wise DataFrame.apply.
+Example usage:
+    pivot_df = pivot_metrics(df, ['EntityName', 'CIK', 'end'], ['AssetsCurrent', 'LiabilitiesCurrent'])
+    pivot_df['CurrentRatio'] = safe_divide(pivot_df['AssetsCurrent'], pivot_df['LiabilitiesCurrent'],
+                                           positive_only=True)
+'''
+import numpy as np
+import pandas as pd
+
+MILLION = 1000000
+
+# Older Snowflake-shaped exports use 'End'/'Value'; the pipeline stores 'end'/'val'
+COLUMN_ALIASES = {'End': 'end', 'Value': 'val'}
+
+
+def normalize_columns(df):
+    """
+    Rename the legacy 'End'/'Value' columns to the pipeline's 'end'/'val'.
+    Args:
+        df (pd.DataFrame): A long-format fact table.
+    Returns:
+        pd.DataFrame: The same table with canonical column names.
+    """
+    renames = {old: new for old, new in COLUMN_ALIASES.items() if old in df.columns and new not in df.columns}
+    return df.rename(columns=renames) if renames else df
+
+
+def pivot_metrics(df, index, metrics, aggfunc='mean', fill_value=None, value_column='val'):
+    """
+    Pivot a long-format fact table so that each metric becomes a column.
+    Args:
+        df (pd.DataFrame): Long-format facts with a 'Metric' column.
+        index (list of str): Columns identifying an output row.
+        metrics (list of str): Metrics to keep; metrics absent from df still get a column.
+        aggfunc (str): Aggregation applied to duplicate (row, metric) values, e.g. 'mean' or 'sum'.
+        fill_value (float): Value for missing (row, metric) cells. NaN if None.
+        value_column (str): Column holding the fact values.
+    Returns:
+        pd.DataFrame: One row per index combination, index columns first and then one column per metric.
+    """
+    df = normalize_columns(df)
+    facts = df.loc[df['Metric'].isin(metrics), list(index) + ['Metric', value_column]]
+    if isinstance(facts['Metric'].dtype, pd.CategoricalDtype):
+        facts = facts.assign(Metric=facts['Metric'].astype(object))
+    grouped = facts.groupby(list(index) + ['Metric'], observed=True, sort=True)[value_column].agg(aggfunc)
+    pivot_df = grouped.unstack('Metric').reindex(columns=list(metrics))
+    if fill_value is not None:
+        pivot_df = pivot_df.fillna(fill_value)
+    pivot_df.columns.name = None
+    return pivot_df.reset_index()
+
+
+def safe_divide(numerator, denominator, positive_only=False):
+    """
+    Divide two columns element-wise, yielding NaN wherever the division is undefined.
+    Args:
+        numerator (array-like): Dividend values.
+        denominator (array-like): Divisor values.
+        positive_only (bool): Only divide where the denominator is strictly positive (otherwise where it is non-zero).
+    Returns:
+        np.ndarray: float64 ratios, NaN where either operand is missing or the denominator is masked out.
+    """
+    numerator = np.asarray(numerator, dtype=np.float64)
+    denominator = np.asarray(denominator, dtype=np.float64)
+    valid = ~np.isnan(numerator) & ~np.isnan(denominator)
+    valid &= denominator > 0 if positive_only else denominator != 0
+    result = np.full(numerator.shape, np.nan)
+    np.divide(numerator, denominator, out=result, where=valid)
+    return result
+
+
+def to_millions(values, decimals=None):
+    """
+    Convert raw USD values to millions, optionally rounded.
+    """
+    values = np.asarray(values, dtype=np.float64) / MILLION
+    return np.round(values, decimals) if decimals is not None else values
+
+
+def quarter_label(dates):
+    """
+    Label dates with their calendar quarter, e.g. 2008-06-28 -> 'Q2-2008'.
+    Args:
+        dates (pd.Series): Dates or 'YYYY-MM-DD' strings.
+    Returns:
+        pd.Series: The labels, aligned with dates.
+    """
+    dates = pd.to_datetime(dates)
+    return 'Q' + dates.dt.quarter.astype(str) + '-' + dates.dt.year.astype(str)
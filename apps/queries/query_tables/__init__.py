@@ -1,4 +1,6 @@
 # queries/query/__init__.py
+import os
+
 from .assets_liabilities_ import assets_liability_query
 from .cash_flow_query_ import cash_flow_query
 from .debt_management_query_ import debt_management_query
@@ -14,14 +16,15 @@ LIQUIDITY = liquidity_query
 MARKET_VALUATION = market_valuation_query
 PROFITABILITY = profitability_query
 OPERATIONAL_EFFICIENCY = operational_efficiency_query
+QUERY_DIR = os.path.dirname(os.path.abspath(__file__))
 QUERY_FILES = {
-    "Assets Liabilities": "apps/queries/assets_liabilities.sql",
-    "Cash Flow": "apps/queries/cash_flow_query.sql",
-    "Debt Management": "apps/queries/debt_management_query.sql",
-    "Liquidity": "apps/queries/liquidity_query.sql",
-    "Market Valuation": "apps/queries/market_valuation_query.sql",
-    "Operational Efficiency": "apps/queries/operational_efficiency_query.sql",
-    "Profitability": "apps/queries/profitability_query.sql"
+    "Assets Liabilities": os.path.join(QUERY_DIR, "assets_liabilities.sql"),
+    "Cash Flow": os.path.join(QUERY_DIR, "cash_flow_query.sql"),
+    "Debt Management": os.path.join(QUERY_DIR, "debt_management_query.sql"),
+    "Liquidity": os.path.join(QUERY_DIR, "liquidity_query.sql"),
+    "Market Valuation": os.path.join(QUERY_DIR, "market_valuation_query.sql"),
+    "Operational Efficiency": os.path.join(QUERY_DIR, "operational_efficiency_query.sql"),
+    "Profitability": os.path.join(QUERY_DIR, "profitability_query.sql")
 }
 
 __all__ = [
@@ -1,18 +1,20 @@
-def cash_flow_query(df):
-    filtered_df = df[df['Metric'].isin(['NetCashProvidedByUsedInOperatingActivities',
-                                        'NetCashProvidedByUsedInInvestingActivities',
-                                        'NetCashProvidedByUsedInFinancingActivities'])]
+from ..pivot_engine import pivot_metrics, quarter_label, to_millions
+
+CASH_FLOW_METRICS = {
+    'CashFlow_Operating': 'NetCashProvidedByUsedInOperatingActivities',
+    'CashFlow_Investing': 'NetCashProvidedByUsedInInvestingActivities',
+    'CashFlow_Financing': 'NetCashProvidedByUsedInFinancingActivities',
+}
 
-    grouped_df = filtered_df.groupby(['EntityName', 'CIK', 'End'])
 
-    result_df = grouped_df.agg({
-        'Value': {
-            'CashFlow_Operating': lambda x: round(x[df['Metric'] == 'NetCashProvidedByUsedInOperatingActivities'].sum() / 1000000, 2),
-            'CashFlow_Investing': lambda x: round(x[df['Metric'] == 'NetCashProvidedByUsedInInvestingActivities'].sum() / 1000000, 2),
-            'CashFlow_Financing': lambda x: round(x[df['Metric'] == 'NetCashProvidedByUsedInFinancingActivities'].sum() / 1000000, 2),
-        }
-    })
+def cash_flow_query(df):
+    pivot_df = pivot_metrics(df, ['EntityName', 'CIK', 'end'], list(CASH_FLOW_METRICS.values()),
+                             aggfunc='sum', fill_value=0)
+
+    result_df = pivot_df[['EntityName', 'CIK', 'end']].copy()
+    for column, metric in CASH_FLOW_METRICS.items():
+        result_df[column] = to_millions(pivot_df[metric], decimals=2)
 
-    result_df['Quarter'] = result_df.index.get_level_values('End').map(lambda date: f"Q{((date.month-1)//3)+1}-{date.year}")
+    result_df['Quarter'] = quarter_label(result_df['end'])
 
-    return result_df.reset_index()
+    return result_df
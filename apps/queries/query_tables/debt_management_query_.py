@@ -1,22 +1,19 @@
-def debt_management_query(df):
-    filtered_df = df[df['Metric'].isin(['ShortTermDebt', 'LongTermDebt'])]
+import numpy as np
+
+from ..pivot_engine import pivot_metrics, quarter_label, safe_divide, to_millions
 
-    grouped_df = filtered_df.groupby(['EntityName', 'CIK', 'End'])
 
-    result_df = grouped_df.agg({
-        'Value': {
-            'ShortTermDebt': lambda x: round(x[df['Metric'] == 'ShortTermDebt'].sum() / 1000000, 2),
-            'LongTermDebt': lambda x: round(x[df['Metric'] == 'LongTermDebt'].sum() / 1000000, 2),
-        }
-    })
+def debt_management_query(df):
+    pivot_df = pivot_metrics(df, ['EntityName', 'CIK', 'end'], ['ShortTermDebt', 'LongTermDebt'],
+                             aggfunc='sum', fill_value=0)
+
+    result_df = pivot_df[['EntityName', 'CIK', 'end']].copy()
+    result_df['ShortTermDebt'] = to_millions(pivot_df['ShortTermDebt'], decimals=2)
+    result_df['LongTermDebt'] = to_millions(pivot_df['LongTermDebt'], decimals=2)
 
-    result_df['DebtStructureRatio'] = result_df.apply(
-        lambda row: round(row['Value']['ShortTermDebt'] / row['Value']['LongTermDebt'], 2)
-        if row['Value']['LongTermDebt'] > 0 else None, axis=1
-    )
+    result_df['DebtStructureRatio'] = np.round(
+        safe_divide(result_df['ShortTermDebt'], result_df['LongTermDebt'], positive_only=True), 2)
 
-    result_df['Quarter'] = result_df.index.get_level_values('End').map(
-        lambda date: f"Q{((date.month-1)//3)+1}-{date.year}"
-    )
+    result_df['Quarter'] = quarter_label(result_df['end'])
 
-    return result_df.reset_index()
+    return result_df
@@ -1,30 +1,29 @@
+import numpy as np
+import pandas as pd
+
+from ..pivot_engine import normalize_columns, pivot_metrics, quarter_label, safe_divide, to_millions
+
+
 def market_valuation_query(df, stock_price_df=None):
-    filtered_df = df[df['Metric'].isin(['MarketCapitalization', 'EarningsPerShareBasic', 'EarningsPerShareDiluted'])]
+    df = normalize_columns(df)
+    index = ['EntityName', 'CIK', 'end']
+    market_cap = pivot_metrics(df, index, ['MarketCapitalization'], aggfunc='sum', fill_value=0)
+    eps = pivot_metrics(df, index, ['EarningsPerShareBasic', 'EarningsPerShareDiluted'])
+    result_df = pd.merge(market_cap, eps, on=index, how='outer')
+
+    result_df['MarketCap'] = to_millions(result_df.pop('MarketCapitalization').fillna(0), decimals=2)
+    result_df = result_df.rename(columns={'EarningsPerShareBasic': 'EPS_Basic', 'EarningsPerShareDiluted': 'EPS_Diluted'})
 
     if stock_price_df is not None:
-        merged_df = pd.merge(filtered_df, stock_price_df, left_on=['CIK', 'End'], right_on=['CIK', 'Date'], how='left')
+        prices = stock_price_df.groupby(['CIK', 'Date'], as_index=False)['StockPrice'].mean()
+        result_df = pd.merge(result_df, prices, left_on=['CIK', 'end'], right_on=['CIK', 'Date'], how='left')
+        result_df = result_df.drop(columns=['Date'])
     else:
-        merged_df = filtered_df
-        merged_df['StockPrice'] = None  # Placeholder if stock price data is not available
-
-    grouped_df = merged_df.groupby(['EntityName', 'CIK', 'End'])
-
-    result_df = grouped_df.agg({
-        'Value': {
-            'MarketCap': lambda x: round(x[df['Metric'] == 'MarketCapitalization'].sum() / 1000000, 2),
-            'EPS_Basic': lambda x: x[df['Metric'] == 'EarningsPerShareBasic'].mean(),
-            'EPS_Diluted': lambda x: x[df['Metric'] == 'EarningsPerShareDiluted'].mean(),
-        },
-        'StockPrice': 'mean'
-    })
-
-    result_df['PE_Ratio'] = result_df.apply(
-        lambda row: round(row['StockPrice'] / row['Value']['EPS_Diluted'], 2)
-        if row['Value']['EPS_Diluted'] > 0 else None, axis=1
-    )
-
-    result_df['Quarter'] = result_df.index.get_level_values('End').map(
-        lambda date: f"Q{((date.month-1)//3)+1}-{date.year}"
-    )
-
-    return result_df.reset_index()
+        result_df['StockPrice'] = np.nan  # Placeholder if stock price data is not available
+
+    result_df['PE_Ratio'] = np.round(
+        safe_divide(result_df['StockPrice'], result_df['EPS_Diluted'], positive_only=True), 2)
+
+    result_df['Quarter'] = quarter_label(result_df['end'])
+
+    return result_df[index + ['MarketCap', 'EPS_Basic', 'EPS_Diluted', 'StockPrice', 'PE_Ratio', 'Quarter']]
@@ -1,38 +1,24 @@
-import pandas as pd
+import numpy as np
 
-def operational_efficiency_query(df):
-    filtered_df = df[df['Metric'].isin(['CostOfGoodsSold', 'OperatingExpenses', 'Revenues'])]
+from ..pivot_engine import pivot_metrics, quarter_label, safe_divide, to_millions
 
-    # Pivot the data
-    pivoted_df = filtered_df.pivot_table(
-        index=['EntityName', 'CIK', 'End'],
-        columns='Metric',
-        values='Value',
-        aggfunc='sum'
-    )
 
-    # Ensure all required columns are present
+def operational_efficiency_query(df):
+    # Pivot the data; missing metrics count as 0
     required_metrics = ['CostOfGoodsSold', 'OperatingExpenses', 'Revenues']
-    pivoted_df = pivoted_df.reindex(columns=required_metrics, fill_value=0)
+    pivoted_df = pivot_metrics(df, ['EntityName', 'CIK', 'end'], required_metrics, aggfunc='sum', fill_value=0)
 
     # Perform the calculations
-    result_df = pd.DataFrame({
-        'COGS': round(pivoted_df['CostOfGoodsSold'] / 1000000, 2),
-        'OperatingExpenses': round(pivoted_df['OperatingExpenses'] / 1000000, 2),
-        'Revenues': round(pivoted_df['Revenues'] / 1000000, 2)
-    })
+    result_df = pivoted_df[['EntityName', 'CIK', 'end']].copy()
+    result_df['COGS'] = to_millions(pivoted_df['CostOfGoodsSold'], decimals=2)
+    result_df['OperatingExpenses'] = to_millions(pivoted_df['OperatingExpenses'], decimals=2)
+    result_df['Revenues'] = to_millions(pivoted_df['Revenues'], decimals=2)
 
     # Calculate Operational Efficiency Ratio
-    result_df['OperationalEfficiencyRatio'] = round(
-        (result_df['OperatingExpenses'] + result_df['COGS']) / result_df['Revenues'], 2
-    )
-    result_df['OperationalEfficiencyRatio'] = result_df['OperationalEfficiencyRatio'].where(result_df['Revenues'] > 0)
+    result_df['OperationalEfficiencyRatio'] = np.round(
+        safe_divide(result_df['OperatingExpenses'] + result_df['COGS'], result_df['Revenues'], positive_only=True), 2)
 
     # Calculate Quarter
-    result_df['Quarter'] = result_df.index.get_level_values('End').map(
-        lambda date_str: f"Q{((pd.to_datetime(date_str).month - 1) // 3) + 1}-{pd.to_datetime(date_str).year}"
-    )
-
-    return result_df.reset_index()
-
+    result_df['Quarter'] = quarter_label(result_df['end'])
 
+    return result_df
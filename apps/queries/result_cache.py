@@ -0,0 +1,174 @@
+'''
+This module provides the QueryResultCache class, a two-tier cache of query results: an in-memory LRU of the
+most recent results in front of pickled results on disk, which survive restarts and are shared by every
+process using the same store (e.g. the dashboards and the pipeline).
+Entries are keyed by a hash of the query text and the version of the data it reads, so a result is never
+served once new data has been uploaded or stored: the key changes and the stale entry ages out of both tiers.
+Every entry remembers how long the query took, so the cache can report the execution time it saved.
+Example usage:
+    cache = QueryResultCache('data/query_cache')
+    key = cache.key('Liquidity', query_text, data_version, cik_numbers=['0000012927'])
+    df = cache.get(key)
+    if df is None:
+        df = run_query()
+        cache.put(key, df, elapsed)
+'''
+import hashlib
+import os
+import pickle
+import threading
+
+from cachetools import LRUCache
+
+from apps.utils import atomic_write
+
+DEFAULT_MEMORY_ENTRIES = 64
+DEFAULT_DISK_ENTRIES = 512
+
+
+class QueryResultCache:
+    def __init__(self, cache_dir=None, max_entries=DEFAULT_MEMORY_ENTRIES, max_disk_entries=DEFAULT_DISK_ENTRIES):
+        """
+        Initialize the QueryResultCache.
+        Args:
+            cache_dir (str, optional): Directory of the on-disk tier. Memory only if None.
+            max_entries (int): Number of results kept in memory.
+            max_disk_entries (int): Number of results kept on disk; the least recently used are removed first.
+        """
+        self.cache_dir = cache_dir
+        self.max_disk_entries = max_disk_entries
+        self._memory = LRUCache(maxsize=max_entries)
+        self._lock = threading.Lock()
+        self.stats = {'memory_hits': 0, 'disk_hits': 0, 'misses': 0, 'saved_seconds': 0.0}
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    @staticmethod
+    def key(query_name, query_text, data_version, cik_numbers=None, backend=''):
+        """
+        Build the cache key of a query run.
+        Args:
+            query_name (str): The query (category) name.
+            query_text (str): The SQL (or other definition) of the query; edits to it invalidate its results.
+            data_version (str): Version of the data the query reads.
+            cik_numbers (list of str, optional): Companies the result is restricted to.
+            backend (str): Where the query runs, e.g. 'snowflake'; results of different engines are kept apart.
+        Returns:
+            str: The key, or None if the data version is unknown (the result must not be cached).
+        """
+        if not data_version:
+            return None
+        ciks = ','.join(sorted(str(int(cik)) if str(cik).isdigit() else str(cik) for cik in cik_numbers or []))
+        parts = (backend, query_name, hashlib.sha256(query_text.encode()).hexdigest(), data_version, ciks)
+        return hashlib.sha256('\n'.join(parts).encode()).hexdigest()
+
+    def get(self, key):
+        """
+        Look a result up, in memory first and then on disk.
+        Returns:
+            DataFrame: A copy of the cached result, or None on a miss.
+        """
+        if key is None:
+            return None
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                self.stats['memory_hits'] += 1
+                self.stats['saved_seconds'] += entry[1]
+                return entry[0].copy()
+        entry = self._read(key)
+        with self._lock:
+            if entry is None:
+                self.stats['misses'] += 1
+                return None
+            self._memory[key] = entry
+            self.stats['disk_hits'] += 1
+            self.stats['saved_seconds'] += entry[1]
+        return entry[0].copy()
+
+    def put(self, key, result, elapsed=0.0):
+        """
+        Cache a query result.
+        Args:
+            key (str): Key from key(); nothing is cached if it is None.
+            result (DataFrame): The result. None results are not cached.
+            elapsed (float): Seconds the query took, credited as saved on every hit.
+        """
+        if key is None or result is None:
+            return
+        entry = (result.copy(), elapsed)
+        with self._lock:
+            self._memory[key] = entry
+        if self.cache_dir:
+            self._write(key, entry)
+
+    def clear(self):
+        """
+        Drop every cached result from both tiers.
+        """
+        with self._lock:
+            self._memory.clear()
+        for file_path in self._disk_files():
+            self._remove(file_path)
+
+    def get_stats(self):
+        """
+        Returns:
+            dict: Memory and disk hits, misses, hit rate, saved execution seconds and the entries per tier.
+        """
+        with self._lock:
+            stats = dict(self.stats, memory_entries=len(self._memory))
+        lookups = stats['memory_hits'] + stats['disk_hits'] + stats['misses']
+        stats['hit_rate'] = (stats['memory_hits'] + stats['disk_hits']) / lookups if lookups else 0.0
+        stats['disk_entries'] = len(self._disk_files())
+        return stats
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.pkl")
+
+    def _read(self, key):
+        if not self.cache_dir:
+            return None
+        file_path = self._path(key)
+        try:
+            with open(file_path, 'rb') as file:
+                entry = pickle.load(file)
+            os.utime(file_path)  # The modification time orders the disk tier's evictions
+            return entry
+        except FileNotFoundError:
+            return None
+        except Exception:
+            # Truncated or incompatible entry: drop it and run the query again
+            self._remove(file_path)
+            return None
+
+    def _write(self, key, entry):
+        with atomic_write(self._path(key)) as tmp_path:
+            with open(tmp_path, 'wb') as file:
+                pickle.dump(entry, file, protocol=pickle.HIGHEST_PROTOCOL)
+        files = self._disk_files()
+        if len(files) > self.max_disk_entries:
+            files.sort(key=lambda file_path: self._mtime(file_path))
+            for file_path in files[:len(files) - self.max_disk_entries]:
+                self._remove(file_path)
+
+    def _disk_files(self):
+        if not self.cache_dir or not os.path.isdir(self.cache_dir):
+            return []
+        return [os.path.join(self.cache_dir, name) for name in os.listdir(self.cache_dir)
+                if name.endswith('.pkl') and not name.startswith('.')]
+
+    @staticmethod
+    def _mtime(file_path):
+        try:
+            return os.path.getmtime(file_path)
+        except FileNotFoundError:
+            return 0.0
+
+    @staticmethod
+    def _remove(file_path):
+        try:
+            os.remove(file_path)
+        except FileNotFoundError:
+            pass
+
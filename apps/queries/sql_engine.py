@@ -0,0 +1,166 @@
+'''
+This module provides the LocalSQLEngine class, an embedded SQLite engine that runs the QUERY_FILES locally.
+Company facts are loaded into a table with the same name and columns as the Snowflake table, indexed on
+(CIK, Metric, End), so the Snowflake SQL files run unchanged apart from a small dialect translation
+(CAST(... AS DATE), EXTRACT(... FROM ...) and CONCAT). Translations are cached by SQL text, so an edited
+query file is translated afresh, and the connection keeps its own compiled statement cache.
+Example usage:
+    engine = LocalSQLEngine('data/local_sql.sqlite')
+    engine.load_data(company_facts_df)
+    df = engine.execute_query_from_file(QUERY_FILES['Liquidity'], cik_numbers=['0000012927'])
+'''
+import re
+import sqlite3
+import threading
+from functools import lru_cache
+
+import pandas as pd
+
+from apps.types import DEFAULT_TABLE_NAME, FACT_COLUMN_ALIASES
+
+# Same columns as SnowflakeDataManager.create_table
+TABLE_COLUMNS = {
+    'EntityName': 'TEXT',
+    'CIK': 'INTEGER',
+    'Metric': 'TEXT',
+    'End': 'TEXT',
+    'Value': 'REAL',
+    'accn': 'TEXT',
+    'fy': 'INTEGER',
+    'fp': 'TEXT',
+    'form': 'TEXT',
+    'filed': 'TEXT',
+    'frame': 'TEXT',
+    'start': 'TEXT',
+}
+# Pipeline column names that differ from the table's
+COLUMN_ALIASES = FACT_COLUMN_ALIASES
+DATE_COLUMNS = ('End', 'filed', 'start')
+
+CAST_DATE = re.compile(r'CAST\(\s*(\w+)\s+AS\s+DATE\s*\)', re.IGNORECASE)
+EXTRACT = re.compile(r'EXTRACT\(\s*(YEAR|MONTH|DAY)\s+FROM\s+(\w+)\s*\)', re.IGNORECASE)
+EXTRACT_FORMATS = {'YEAR': '%Y', 'MONTH': '%m', 'DAY': '%d'}
+
+
+def to_sqlite(sql):
+    """
+    Translate the Snowflake constructs used by the query files into SQLite.
+    Args:
+        sql (str): Snowflake SQL.
+    Returns:
+        str: Equivalent SQLite SQL.
+    """
+    sql = CAST_DATE.sub(r'DATE(\1)', sql)
+    return EXTRACT.sub(lambda match: f"CAST(strftime('{EXTRACT_FORMATS[match.group(1).upper()]}', {match.group(2)}) AS INTEGER)",
+                       sql)
+
+
+_translate = lru_cache(maxsize=64)(to_sqlite)
+
+
+def _concat(*values):
+    return ''.join('' if value is None else str(value) for value in values)
+
+
+class LocalSQLEngine:
+    def __init__(self, db_path=':memory:', table_name=DEFAULT_TABLE_NAME, cached_statements=256):
+        """
+        Initialize the LocalSQLEngine.
+        Args:
+            db_path (str): SQLite database file, or ':memory:' for a throwaway engine.
+            table_name (str): Name of the facts table, matching the Snowflake table the query files select from.
+            cached_statements (int): Number of compiled statements kept by the connection.
+        """
+        self.db_path = db_path
+        self.table_name = table_name
+        self._lock = threading.RLock()
+        self.connection = sqlite3.connect(db_path, cached_statements=cached_statements, check_same_thread=False)
+        self.connection.create_function('CONCAT', -1, _concat, deterministic=True)
+        self._create_table()
+
+    def _create_table(self):
+        columns = ', '.join(f'"{column}" {column_type}' for column, column_type in TABLE_COLUMNS.items())
+        with self._lock, self.connection:
+            self.connection.execute(f'CREATE TABLE IF NOT EXISTS {self.table_name} ({columns})')
+            self.connection.execute(f'CREATE INDEX IF NOT EXISTS idx_{self.table_name}_cik_metric_end '
+                                    f'ON {self.table_name} (CIK, Metric, "End")')
+
+    def load_data(self, df, replace=True):
+        """
+        Load company facts into the facts table.
+        Args:
+            df (pd.DataFrame): Flattened company facts ('end'/'val' or 'End'/'Value' columns); missing columns are NULL.
+            replace (bool): Delete the rows already loaded for the companies in df first.
+        Returns:
+            int: Number of rows loaded.
+        """
+        if df is None or df.empty:
+            return 0
+        data = df.rename(columns={old: new for old, new in COLUMN_ALIASES.items() if old in df.columns})
+        data = data.reindex(columns=list(TABLE_COLUMNS))
+        for column in DATE_COLUMNS:
+            if pd.api.types.is_datetime64_any_dtype(data[column]):
+                data[column] = data[column].dt.strftime('%Y-%m-%d')
+        data = data.astype(object).where(data.notna(), None)
+        rows = data.itertuples(index=False, name=None)
+        placeholders = ', '.join('?' * len(TABLE_COLUMNS))
+        with self._lock, self.connection:
+            if replace:
+                ciks = [int(cik) for cik in pd.unique(data['CIK'].dropna())]
+                self.connection.executemany(f'DELETE FROM {self.table_name} WHERE CIK = ?', [(cik,) for cik in ciks])
+            self.connection.executemany(f'INSERT INTO {self.table_name} VALUES ({placeholders})', rows)
+        return len(data)
+
+    def query(self, sql, params=(), cik_numbers=None):
+        """
+        Run a SQLite query.
+        Args:
+            sql (str): The query.
+            params (tuple): Bound parameters.
+            cik_numbers (list of str, optional): Restrict the facts table to these companies for this query.
+        Returns:
+            pd.DataFrame: The result set.
+        """
+        with self._lock:
+            if cik_numbers:
+                self._restrict_to(cik_numbers)
+            try:
+                cursor = self.connection.execute(sql, params)
+                columns = [column[0] for column in cursor.description]
+                return pd.DataFrame(cursor.fetchall(), columns=columns)
+            finally:
+                if cik_numbers:
+                    self.connection.execute(f'DROP VIEW IF EXISTS temp.{self.table_name}')
+
+    def execute_query_from_file(self, query_filename, cik_numbers=None):
+        """
+        Execute a Snowflake SQL file locally.
+        Args:
+            query_filename (str): The path to the SQL file containing the query.
+            cik_numbers (list of str, optional): Restrict the query to these companies.
+        Returns:
+            pd.DataFrame: The results of the SQL query.
+        """
+        with open(query_filename, 'r') as file:
+            return self.execute_snowflake_query(file.read(), cik_numbers)
+
+    def execute_snowflake_query(self, sql, cik_numbers=None):
+        """
+        Execute Snowflake SQL (such as the text of a query file) locally.
+        Args:
+            sql (str): Snowflake SQL.
+            cik_numbers (list of str, optional): Restrict the query to these companies.
+        Returns:
+            pd.DataFrame: The results of the SQL query.
+        """
+        return self.query(_translate(sql), cik_numbers=cik_numbers)
+
+    def _restrict_to(self, cik_numbers):
+        # A temp view shadows the main table for unqualified names, so the query files need no rewriting
+        ciks = ', '.join(str(int(cik)) for cik in cik_numbers)
+        self.connection.execute(f'DROP VIEW IF EXISTS temp.{self.table_name}')
+        self.connection.execute(f'CREATE TEMP VIEW {self.table_name} AS '
+                                f'SELECT * FROM main.{self.table_name} WHERE CIK IN ({ciks})')
+
+    def close(self):
+        self.connection.close()
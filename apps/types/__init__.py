@@ -2,6 +2,7 @@
 
 from .types import SECEndpoints
 from .file_paths import FilePaths
+from .fact_table import FACT_COLUMN_ALIASES, FACT_TABLE_COLUMNS
 
 BASE_URL = SECEndpoints.BASE_URL.value
 COMPANY_TICKERS = SECEndpoints.COMPANY_TICKERS.value
@@ -23,7 +24,9 @@ __all__ = [
     'DEFAULT_STAGE_NAME',
     'DEFAULT_TABLE_NAME',
     'CSV_DIRECTORY',
-    'CSV_FILE_PATH'
+    'CSV_FILE_PATH',
+    'FACT_COLUMN_ALIASES',
+    'FACT_TABLE_COLUMNS'
 ]
 
 
@@ -0,0 +1,5 @@
+# Columns of the company facts table, in table order (see SnowflakeDataManager.create_table)
+FACT_TABLE_COLUMNS = ('EntityName', 'CIK', 'Metric', 'End', 'Value', 'accn', 'fy', 'fp', 'form', 'filed', 'frame',
+                      'start')
+# Pipeline column names that differ from the table's
+FACT_COLUMN_ALIASES = {'end': 'End', 'val': 'Value', 'value': 'Value'}
@@ -1,13 +1,39 @@
 # In apps/utils/__init__.py
 
 from .utils import now, dataframe_to_csv
+from .atomic_files import FileLock, atomic_write, new_version_id
+from .sqlite_connection import ClosingConnection
+from .http_cache import HttpCache
+from .content_hash import combine_hashes, frame_hash, json_hash
+from .latest_pointer import latest_entry, latest_file, update_latest
+from .rate_limiter import RetryPolicy, TokenBucketRateLimiter, configure_rate_limiter, get_rate_limiter, throttled_get
 from .roster import Roster
 from .file_version_control import FileVersionManager
+from .manifest_store import MANIFEST_FILE, ManifestStore, normalize_cik
 
 __all__ = [
+    'ClosingConnection',
+    'FileLock',
     'FileVersionManager',
+    'HttpCache',
+    'latest_entry',
+    'latest_file',
+    'MANIFEST_FILE',
+    'ManifestStore',
+    'atomic_write',
+    'combine_hashes',
+    'frame_hash',
+    'json_hash',
+    'new_version_id',
+    'normalize_cik',
     'now',
     'dataframe_to_csv',
     'Roster',
+    'RetryPolicy',
+    'TokenBucketRateLimiter',
+    'configure_rate_limiter',
+    'get_rate_limiter',
+    'throttled_get',
+    'update_latest',
     'now'
 ]
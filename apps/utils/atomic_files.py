@@ -0,0 +1,123 @@
+'''
+This module provides the building blocks for crash-safe, concurrent writes to the local store:
+atomic_write writes to a hidden temp file in the target directory and renames it into place, so readers
+never see a half-written file; FileLock is an inter-process lock on a lock file (one per CIK in the store);
+new_version_id generates sortable version identifiers that do not collide between parallel writers.
+Example usage:
+    with FileLock(os.path.join(cik_dir, '.lock')):
+        with atomic_write(file_path) as tmp_path:
+            df.to_csv(tmp_path, index=False)
+'''
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+def new_version_id():
+    """
+    Generate a version identifier: a microsecond timestamp followed by a random suffix.
+    Identifiers sort chronologically, contain no underscores and are unique across processes.
+    Returns:
+        str: e.g. '20240101120000123456-1f3a9c2e'
+    """
+    timestamp = time.time()
+    microseconds = int(timestamp * 1e6) % 1000000
+    return f"{time.strftime('%Y%m%d%H%M%S', time.localtime(timestamp))}{microseconds:06d}-{uuid.uuid4().hex[:8]}"
+
+
+@contextmanager
+def atomic_write(file_path):
+    """
+    Write a file atomically.
+    Yields:
+        str: A temp path next to file_path to write to; it replaces file_path when the block succeeds
+             and is removed when it fails.
+    """
+    directory, file_name = os.path.split(file_path)
+    tmp_path = os.path.join(directory, f".{file_name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        yield tmp_path
+        os.replace(tmp_path, file_path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except FileNotFoundError:
+            pass
+        raise
+
+
+class FileLock:
+    # flock locks belong to the open file description, so threads of one process also need a lock
+    _thread_locks = {}
+    _registry_lock = threading.Lock()
+
+    def __init__(self, lock_path, timeout=None):
+        """
+        Inter-process (and inter-thread) exclusive lock on a lock file.
+        Args:
+            lock_path (str): The lock file; created if missing.
+            timeout (float): Seconds to wait for the lock. Waits indefinitely if None.
+        """
+        self.lock_path = os.path.abspath(lock_path)
+        self.timeout = timeout
+        self._file = None
+        with FileLock._registry_lock:
+            self._thread_lock = FileLock._thread_locks.setdefault(self.lock_path, threading.Lock())
+
+    def acquire(self):
+        if not self._thread_lock.acquire(timeout=-1 if self.timeout is None else self.timeout):
+            raise TimeoutError(f"Timed out waiting for {self.lock_path}")
+        try:
+            os.makedirs(os.path.dirname(self.lock_path), exist_ok=True)
+            self._file = open(self.lock_path, 'a+')
+            deadline = None if self.timeout is None else time.monotonic() + self.timeout
+            while not self._try_lock():
+                if deadline is not None and time.monotonic() >= deadline:
+                    raise TimeoutError(f"Timed out waiting for {self.lock_path}")
+                time.sleep(0.01)
+        except BaseException:
+            self._close()
+            self._thread_lock.release()
+            raise
+        return self
+
+    def release(self):
+        try:
+            if fcntl:
+                fcntl.flock(self._file, fcntl.LOCK_UN)
+            else:
+                self._file.seek(0)
+                msvcrt.locking(self._file.fileno(), msvcrt.LK_UNLCK, 1)
+        finally:
+            self._close()
+            self._thread_lock.release()
+
+    def _try_lock(self):
+        try:
+            if fcntl:
+                fcntl.flock(self._file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            else:
+                self._file.seek(0)
+                msvcrt.locking(self._file.fileno(), msvcrt.LK_NBLCK, 1)
+            return True
+        except OSError:
+            return False
+
+    def _close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self):
+        return self.acquire()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.release()
@@ -0,0 +1,46 @@
+'''
+This module computes content hashes of the pipeline's outputs, so that an unchanged result can be detected
+before it is written and the stages downstream of an unchanged input can be skipped.
+Hashes depend on the content only: the same DataFrame (columns, dtypes and values) or the same JSON document
+always hashes the same, whatever file format or version it is eventually stored as.
+Example usage:
+    content_hash = frame_hash(df)
+    input_hash = combine_hashes(frame_hash(assets), frame_hash(liabilities))
+'''
+import hashlib
+import json
+
+import pandas as pd
+
+
+def frame_hash(df):
+    """
+    Returns:
+        str: The SHA-256 hex digest of a DataFrame's columns, dtypes and values (the index is ignored).
+    """
+    digest = hashlib.sha256()
+    digest.update(repr([(str(column), str(dtype)) for column, dtype in df.dtypes.items()]).encode())
+    try:
+        digest.update(pd.util.hash_pandas_object(df, index=False).values.tobytes())
+    except TypeError:
+        # Unhashable cell values (lists, dicts): hash their text form instead
+        digest.update(df.to_csv(index=False).encode())
+    return digest.hexdigest()
+
+
+def json_hash(data):
+    """
+    Returns:
+        str: The SHA-256 hex digest of a JSON-serialisable document, independent of key order.
+    """
+    return hashlib.sha256(json.dumps(data, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def combine_hashes(*hashes):
+    """
+    Returns:
+        str: One digest for several inputs, or None if any input hash is unknown.
+    """
+    if not hashes or any(content_hash is None for content_hash in hashes):
+        return None
+    return hashlib.sha256('\n'.join(hashes).encode()).hexdigest()
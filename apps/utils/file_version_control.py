@@ -1,44 +1,49 @@
 import os
 
+from .manifest_store import ManifestStore, normalize_cik
+
 
 class FileVersionManager:
-    def __init__(self, base_dir):
+    def __init__(self, base_dir, export_markdown=False):
+        """
+        Keep track of the stored file versions in the manifest store.
+        Args:
+            base_dir (str): Root of the local store.
+            export_markdown (bool): Also rewrite the markdown index.md of a stage after every update.
+        """
         self.base_dir = base_dir
-
-    def update_index(self, cik_number, category, file_name, storage_type):
-        index_path = os.path.join(self.base_dir, cik_number, storage_type, 'index.md')
-        self._write_to_index(index_path, cik_number, category, file_name, storage_type)
-
-    def _write_to_index(self, index_path, cik_number, category, file_name, storage_type):
-        # Ensure the directory for the index file exists
-        os.makedirs(os.path.dirname(index_path), exist_ok=True)
-
-        index_content = self._read_index(index_path)
-        formatted_category = category.replace(' ', '_')
-        relative_path = f"data/{cik_number}/{storage_type}/{formatted_category}/{file_name}"
-        index_content[f"### {category}"] = f"- [{category} {file_name.split('_')[-1].split('.')[0]}]({relative_path})\n"
-        self._save_index(index_path, cik_number,storage_type, index_content)
-
-    def _read_index(self, index_path):
-        if not os.path.exists(index_path):
-            return {}
-
-        with open(index_path, 'r') as file:
-            lines = file.readlines()
-
-        index_content = {}
-        current_category = None
-        for line in lines:
-            if line.startswith('### '):  # Category line
-                current_category = line.strip()
-                index_content[current_category] = ''
-            elif current_category and line.strip():
-                # Append file entry to current category
-                index_content[current_category] += line
-        return index_content
-
-    def _save_index(self, index_path, cik_number, storage_type, index_content):
-        with open(index_path, 'w') as file:
-            file.write(f"---\ntitle: CIK {cik_number} Data\nslug: /data/{cik_number}/{storage_type}/\n---\n\n")
-            for category, entry in index_content.items():
-                file.write(f"{category}\n{entry}\n")
+        self.manifest = ManifestStore(base_dir)
+        self.export_markdown = export_markdown
+
+    def update_index(self, cik_number, category, file_name, storage_type, file_path=None, row_count=None,
+                     checksum=None, sub_category=None, input_hash=None):
+        """
+        Record a stored file.
+        Args:
+            cik_number (str): The company.
+            category (str): Category name.
+            file_name (str): Name of the stored file.
+            storage_type (str): Storage type (stage) the file was stored under.
+            file_path (str): Path of the stored file; defaults to <base_dir>/<cik>/<storage_type>/<category>/<file_name>.
+            row_count (int): Number of rows stored, if known.
+            checksum (str): Content checksum; computed from the file if omitted.
+            sub_category (str): Sub-category such as a chart type.
+            input_hash (str): Content hash of the inputs the file was derived from.
+        Returns:
+            dict: The recorded artifact.
+        """
+        if file_path is None:
+            file_path = os.path.join(self.base_dir, normalize_cik(cik_number), storage_type,
+                                     category.replace(' ', '_'), file_name)
+        artifact = self.manifest.record(cik_number, storage_type, category, file_name, file_path,
+                                        row_count=row_count, checksum=checksum, sub_category=sub_category,
+                                        input_hash=input_hash)
+        if self.export_markdown:
+            self.export_index(cik_number, storage_type)
+        return artifact
+
+    def export_index(self, cik_number, storage_type):
+        """
+        Write the markdown index.md of a CIK and storage type from the manifest.
+        """
+        return self.manifest.export_markdown(cik_number, storage_type)
@@ -0,0 +1,250 @@
+'''
+This module provides the HttpCache class, a persistent on-disk cache for SEC API responses.
+Bodies are stored gzip-compressed, one file per URL, and indexed in a small SQLite database together with
+their ETag / Last-Modified validators so that unchanged resources can be revalidated with a conditional GET.
+The cache is bounded by total compressed size and evicts least recently used entries first.
+Example usage:
+    cache = HttpCache()
+    entry = cache.lookup(url)
+    headers.update(cache.conditional_headers(entry))
+    ...
+    if response.status_code == 304:
+        body = cache.revalidated(url)
+    else:
+        cache.store(url, response.content, response.headers.get('ETag'), response.headers.get('Last-Modified'))
+'''
+import gzip
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+from .sqlite_connection import ClosingConnection
+
+DEFAULT_HTTP_CACHE_DIR = os.path.join('data', 'http_cache')
+DEFAULT_HTTP_CACHE_MAX_BYTES = 2 * 1024 ** 3
+
+
+class HttpCache:
+    def __init__(self, cache_dir=DEFAULT_HTTP_CACHE_DIR, max_bytes=DEFAULT_HTTP_CACHE_MAX_BYTES, compresslevel=6):
+        """
+        Initialize the HttpCache.
+        Args:
+            cache_dir (str): Directory holding the index database and the compressed bodies.
+            max_bytes (int): Maximum total size of the compressed bodies before LRU eviction kicks in.
+            compresslevel (int): gzip compression level used for stored bodies.
+        """
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.compresslevel = compresslevel
+        self.index_path = os.path.join(cache_dir, 'index.sqlite')
+        self._stats_lock = threading.Lock()
+        self.reset_stats()
+        os.makedirs(cache_dir, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS entries (
+                    url TEXT PRIMARY KEY,
+                    file_name TEXT NOT NULL,
+                    etag TEXT,
+                    last_modified TEXT,
+                    body_bytes INTEGER NOT NULL,
+                    stored_bytes INTEGER NOT NULL,
+                    last_access REAL NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_entries_last_access ON entries (last_access)")
+
+    def lookup(self, url):
+        """
+        Get the cache entry for a URL.
+        Returns:
+            dict or None: The entry (etag, last_modified, body_bytes, ...) or None if the URL is not cached.
+        """
+        with self._connect() as conn:
+            row = conn.execute("SELECT * FROM entries WHERE url = ?", (url,)).fetchone()
+        if row is None:
+            return None
+        entry = dict(row)
+        if not os.path.exists(self._body_path(entry['file_name'])):
+            self._delete(url)
+            return None
+        return entry
+
+    @staticmethod
+    def conditional_headers(entry):
+        """
+        Build the revalidation headers for a cache entry.
+        Returns:
+            dict: If-None-Match / If-Modified-Since headers, empty if there is nothing to revalidate.
+        """
+        headers = {}
+        if entry:
+            if entry.get('etag'):
+                headers['If-None-Match'] = entry['etag']
+            if entry.get('last_modified'):
+                headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def revalidated(self, url):
+        """
+        Mark a cached URL as confirmed unchanged by the server (HTTP 304) and return its body.
+        Returns:
+            bytes or None: The cached body, or None if the entry disappeared meanwhile.
+        """
+        body = self.read_body(url)
+        if body is None:
+            return None
+        self.mark_revalidated(url)
+        return body
+
+    def mark_revalidated(self, url):
+        """
+        Record a 304 for a cached URL without reading its body, for callers that stream it with open_body.
+        Returns:
+            dict or None: The cache entry, or None if the URL is not cached.
+        """
+        entry = self.lookup(url)
+        if entry is None:
+            return None
+        self._touch(url)
+        self._count('hits')
+        self._count('bytes_saved', entry['body_bytes'])
+        return entry
+
+    def read_body(self, url):
+        """
+        Read the full decompressed body of a cached URL.
+        Returns:
+            bytes or None: The body, or None if the URL is not cached.
+        """
+        body_file = self.open_body(url)
+        if body_file is None:
+            return None
+        with body_file:
+            return body_file.read()
+
+    def open_body(self, url):
+        """
+        Open the decompressed body of a cached URL as a binary stream.
+        Returns:
+            file object or None: A gzip stream over the body, or None if the URL is not cached.
+        """
+        entry = self.lookup(url)
+        if entry is None:
+            return None
+        return gzip.open(self._body_path(entry['file_name']), 'rb')
+
+    def store(self, url, body, etag=None, last_modified=None):
+        """
+        Store a freshly downloaded body together with its validators and evict old entries if needed.
+        Args:
+            url (str): The requested URL.
+            body (bytes): The raw response body.
+            etag (str): Value of the ETag response header.
+            last_modified (str): Value of the Last-Modified response header.
+        """
+        file_name = f"{hashlib.sha256(url.encode('utf-8')).hexdigest()}.json.gz"
+        body_path = self._body_path(file_name)
+        tmp_path = f"{body_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with gzip.open(tmp_path, 'wb', compresslevel=self.compresslevel) as body_file:
+            body_file.write(body)
+        os.replace(tmp_path, body_path)
+        self._register(url, file_name, etag, last_modified, len(body))
+        self._count('misses')
+
+    def store_stream(self, url, chunks, etag=None, last_modified=None):
+        """
+        Store a body delivered as an iterable of byte chunks without holding it in memory.
+        Returns:
+            int: Number of uncompressed bytes stored.
+        """
+        file_name = f"{hashlib.sha256(url.encode('utf-8')).hexdigest()}.json.gz"
+        body_path = self._body_path(file_name)
+        tmp_path = f"{body_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        body_bytes = 0
+        with gzip.open(tmp_path, 'wb', compresslevel=self.compresslevel) as body_file:
+            for chunk in chunks:
+                body_file.write(chunk)
+                body_bytes += len(chunk)
+        os.replace(tmp_path, body_path)
+        self._register(url, file_name, etag, last_modified, body_bytes)
+        self._count('misses')
+        return body_bytes
+
+    def get_stats(self):
+        """
+        Returns:
+            dict: Hits (304 revalidations served from disk), misses (full downloads stored),
+                  bytes_saved (uncompressed bytes not downloaded thanks to the cache), evictions,
+                  plus the current number of entries and their total compressed size.
+        """
+        with self._connect() as conn:
+            entries, stored_bytes = conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(stored_bytes), 0) FROM entries").fetchone()
+        with self._stats_lock:
+            stats = dict(self._stats)
+        stats.update({'entries': entries, 'stored_bytes': stored_bytes})
+        return stats
+
+    def reset_stats(self):
+        with self._stats_lock:
+            self._stats = {'hits': 0, 'misses': 0, 'bytes_saved': 0, 'evictions': 0}
+
+    def clear(self):
+        with self._connect() as conn:
+            urls = [row['url'] for row in conn.execute("SELECT url FROM entries")]
+        for url in urls:
+            self._delete(url)
+
+    def _register(self, url, file_name, etag, last_modified, body_bytes):
+        stored_bytes = os.path.getsize(self._body_path(file_name))
+        with self._connect() as conn:
+            conn.execute("""
+                INSERT OR REPLACE INTO entries (url, file_name, etag, last_modified, body_bytes, stored_bytes, last_access)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            """, (url, file_name, etag, last_modified, body_bytes, stored_bytes, time.time()))
+        self._evict()
+
+    def _evict(self):
+        with self._connect() as conn:
+            total = conn.execute("SELECT COALESCE(SUM(stored_bytes), 0) FROM entries").fetchone()[0]
+            if total <= self.max_bytes:
+                return
+            victims = []
+            for row in conn.execute("SELECT url, stored_bytes FROM entries ORDER BY last_access ASC"):
+                if total <= self.max_bytes:
+                    break
+                victims.append(row['url'])
+                total -= row['stored_bytes']
+        for url in victims:
+            self._delete(url)
+            self._count('evictions')
+
+    def _touch(self, url):
+        with self._connect() as conn:
+            conn.execute("UPDATE entries SET last_access = ? WHERE url = ?", (time.time(), url))
+
+    def _delete(self, url):
+        with self._connect() as conn:
+            row = conn.execute("SELECT file_name FROM entries WHERE url = ?", (url,)).fetchone()
+            conn.execute("DELETE FROM entries WHERE url = ?", (url,))
+        if row is not None:
+            try:
+                os.remove(self._body_path(row['file_name']))
+            except FileNotFoundError:
+                pass
+
+    def _count(self, key, amount=1):
+        with self._stats_lock:
+            self._stats[key] += amount
+
+    def _body_path(self, file_name):
+        return os.path.join(self.cache_dir, file_name)
+
+    def _connect(self):
+        conn = sqlite3.connect(self.index_path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        return ClosingConnection(conn)
+
@@ -0,0 +1,70 @@
+'''
+This module maintains a "latest version" pointer in every directory that accumulates timestamped files.
+The pointer is a small hidden file naming the newest version (and, when known, the content hash of that
+version); it is replaced atomically on every write, so finding the latest file is one small read instead of a
+listdir plus a stat of every version, and an unchanged output can be recognised without reading it back.
+Directories written before pointers existed (or whose pointer names a removed file) are scanned instead; lookups
+never write, so only writers, under their CIK lock, move a pointer and read-only callers leave the store untouched.
+Example usage:
+    update_latest(dir_path, '0000012927_Profitability_20240101120000.csv')
+    file_path = latest_file(dir_path)
+    file_path, content_hash = latest_entry(dir_path)
+'''
+import os
+
+from .atomic_files import atomic_write
+
+LATEST_POINTER = '.latest'
+
+
+def update_latest(dir_path, file_name, content_hash=None):
+    """
+    Point the directory's latest pointer at a file.
+    Args:
+        dir_path (str): Directory holding the versions.
+        file_name (str): Name of the newest version, relative to dir_path.
+        content_hash (str, optional): Content hash of the newest version.
+    """
+    with atomic_write(os.path.join(dir_path, LATEST_POINTER)) as tmp_path:
+        with open(tmp_path, 'w') as pointer_file:
+            pointer_file.write(file_name if content_hash is None else f"{file_name}\n{content_hash}")
+
+
+def latest_file(dir_path):
+    """
+    Get the newest version in a directory.
+    Args:
+        dir_path (str): Directory holding the versions.
+    Returns:
+        str: Path of the newest version, or None if the directory is missing or empty.
+    """
+    return latest_entry(dir_path)[0]
+
+
+def latest_entry(dir_path):
+    """
+    Get the newest version in a directory and its content hash.
+    Args:
+        dir_path (str): Directory holding the versions.
+    Returns:
+        tuple: (path, content hash) of the newest version. The hash is None if it was not recorded;
+               both are None if the directory is missing or empty.
+    """
+    try:
+        with open(os.path.join(dir_path, LATEST_POINTER), 'r') as pointer_file:
+            file_name, _, content_hash = pointer_file.read().strip().partition('\n')
+        file_path = os.path.join(dir_path, file_name)
+        if os.path.exists(file_path):
+            return file_path, content_hash or None
+    except FileNotFoundError:
+        pass
+    return _scan_latest(dir_path), None
+
+
+def _scan_latest(dir_path):
+    if not os.path.isdir(dir_path):
+        return None
+    entries = [entry for entry in os.scandir(dir_path) if not entry.name.startswith('.')]
+    if not entries:
+        return None
+    return max(entries, key=lambda entry: entry.stat().st_mtime).path
@@ -0,0 +1,321 @@
+'''
+This module provides the ManifestStore class, a SQLite catalogue of every artifact written to the local store.
+Each stored file is one row (CIK, stage, category, sub-category, version, path, row count, checksum), indexed
+for the lookups the pipeline and the UI make: the categories of a CIK, the versions of a category and the
+latest version. It also keeps the newest filing each company was refreshed from, for incremental refreshes,
+and a version per data source (e.g. the Snowflake tables) that is bumped whenever new data is loaded into it.
+Writers use short IMMEDIATE transactions on a WAL database, so several processes can record artifacts
+concurrently. The markdown index.md files can still be exported for documentation.
+Example usage:
+    manifest = ManifestStore('data')
+    manifest.record('0000012927', 'processed_data', 'Profitability', file_name, path, row_count=120)
+    manifest.categories('0000012927', 'processed_json')
+'''
+import hashlib
+import os
+import sqlite3
+import time
+import urllib.parse
+
+from .atomic_files import new_version_id
+from .sqlite_connection import ClosingConnection
+
+MANIFEST_FILE = 'manifest.sqlite'
+
+
+def normalize_cik(cik_number):
+    """
+    Zero-pad numeric CIK numbers to ten digits so '12927' and '0000012927' are the same company.
+    """
+    cik = str(cik_number)
+    return f"{int(cik):010d}" if cik.isdigit() else cik
+
+
+def file_checksum(file_path, chunk_size=1 << 20):
+    """
+    Returns:
+        str: The SHA-256 hex digest of a file's content.
+    """
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as file:
+        for chunk in iter(lambda: file.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ManifestStore:
+    def __init__(self, base_dir, read_only=False):
+        """
+        Initialize the ManifestStore.
+        Args:
+            base_dir (str): Root of the local store; the manifest database lives at its top level.
+            read_only (bool): Only read an existing manifest, e.g. from the dashboard: nothing is created or
+                              migrated, and writes fail.
+        """
+        self.base_dir = base_dir
+        self.db_path = os.path.join(base_dir, MANIFEST_FILE)
+        self.read_only = read_only
+        if read_only:
+            return
+        os.makedirs(base_dir, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS artifacts (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    cik TEXT NOT NULL,
+                    stage TEXT NOT NULL,
+                    category TEXT NOT NULL,
+                    sub_category TEXT NOT NULL DEFAULT '',
+                    version TEXT NOT NULL,
+                    file_name TEXT NOT NULL,
+                    path TEXT NOT NULL UNIQUE,
+                    row_count INTEGER,
+                    checksum TEXT,
+                    created_at REAL NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_artifacts_lookup "
+                         "ON artifacts (cik, stage, category, sub_category, version)")
+            # Newest periodic filing seen per company, for incremental refreshes
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS refresh_state (
+                    cik TEXT PRIMARY KEY,
+                    accession TEXT NOT NULL,
+                    filing_date TEXT,
+                    refreshed_at REAL NOT NULL
+                )
+            """)
+            # Bumped on every load into a data source the manifest has no artifacts for, e.g. Snowflake tables
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS data_versions (
+                    source TEXT PRIMARY KEY,
+                    version TEXT NOT NULL,
+                    updated_at REAL NOT NULL
+                )
+            """)
+            columns = {row['name'] for row in conn.execute("PRAGMA table_info(artifacts)")}
+            # archive: set when the version was folded into the CIK's compacted archive
+            # input_hash: content hash of the inputs the artifact was derived from
+            for column in ('archive', 'input_hash'):
+                if column not in columns:
+                    conn.execute(f"ALTER TABLE artifacts ADD COLUMN {column} TEXT")
+
+    def record(self, cik_number, stage, category, file_name, path, version=None, row_count=None, checksum=None,
+               sub_category=None, input_hash=None):
+        """
+        Record a stored artifact, replacing any earlier record of the same path.
+        Args:
+            cik_number (str): The company.
+            stage (str): Storage type, e.g. 'preprocessed_data', 'processed_data' or 'processed_json'.
+            category (str): Category name, e.g. 'Profitability'.
+            file_name (str): Name of the stored file.
+            path (str): Path of the stored file.
+            version (str): Version id; defaults to the timestamp suffix of the file name.
+            row_count (int): Number of rows stored, if known.
+            checksum (str): Content checksum; computed from the file if omitted and the file exists.
+            sub_category (str): Sub-category such as a chart type.
+            input_hash (str): Content hash of the inputs the artifact was derived from.
+        Returns:
+            dict: The recorded artifact.
+        """
+        version = version or os.path.splitext(file_name)[0].split('_')[-1]
+        if checksum is None and os.path.exists(path):
+            checksum = file_checksum(path)
+        artifact = {
+            'cik': normalize_cik(cik_number), 'stage': stage, 'category': category,
+            'sub_category': sub_category or '', 'version': version, 'file_name': file_name, 'path': os.path.normpath(path),
+            'row_count': row_count, 'checksum': checksum, 'input_hash': input_hash, 'created_at': time.time(),
+        }
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute("""
+                INSERT OR REPLACE INTO artifacts
+                    (cik, stage, category, sub_category, version, file_name, path, row_count, checksum, input_hash,
+                     created_at)
+                VALUES (:cik, :stage, :category, :sub_category, :version, :file_name, :path, :row_count, :checksum,
+                        :input_hash, :created_at)
+            """, artifact)
+        return artifact
+
+    def categories(self, cik_number, stage):
+        """
+        Returns:
+            list of str: The categories stored for a CIK and stage, sorted by name.
+        """
+        with self._connect() as conn:
+            rows = conn.execute("SELECT DISTINCT category FROM artifacts WHERE cik = ? AND stage = ? ORDER BY category",
+                                (normalize_cik(cik_number), stage)).fetchall()
+        return [row['category'] for row in rows]
+
+    def ciks(self, stage=None):
+        """
+        Returns:
+            list of str: The CIK numbers with stored artifacts (in a stage, if given).
+        """
+        query, params = "SELECT DISTINCT cik FROM artifacts", ()
+        if stage:
+            query, params = query + " WHERE stage = ?", (stage,)
+        with self._connect() as conn:
+            return [row['cik'] for row in conn.execute(query + " ORDER BY cik", params)]
+
+    def versions(self, cik_number, stage, category, sub_category=None, include_archived=False):
+        """
+        Returns:
+            list of dict: The artifacts of a category, newest version first.
+        """
+        archived = "" if include_archived else "AND archive IS NULL"
+        with self._connect() as conn:
+            rows = conn.execute(f"""
+                SELECT * FROM artifacts
+                WHERE cik = ? AND stage = ? AND category = ? AND sub_category = ? {archived}
+                ORDER BY version DESC, id DESC
+            """, (normalize_cik(cik_number), stage, category, sub_category or '')).fetchall()
+        return [dict(row) for row in rows]
+
+    def latest(self, cik_number, stage, category, sub_category=None):
+        """
+        Returns:
+            dict or None: The newest artifact of a category, or None if nothing is stored.
+        """
+        with self._connect() as conn:
+            row = conn.execute("""
+                SELECT * FROM artifacts
+                WHERE cik = ? AND stage = ? AND category = ? AND sub_category = ? AND archive IS NULL
+                ORDER BY version DESC, id DESC LIMIT 1
+            """, (normalize_cik(cik_number), stage, category, sub_category or '')).fetchone()
+        return dict(row) if row else None
+
+    def is_current(self, cik_number, stage, category, input_hash, sub_categories=None):
+        """
+        Check whether the latest artifacts of a category were derived from the given inputs.
+        Args:
+            cik_number (str): The company.
+            stage (str): The storage type of the derived artifacts.
+            category (str): Category name.
+            input_hash (str): Content hash of the current inputs.
+            sub_categories (list of str, optional): Sub-categories that must all be current. Defaults to the
+                                                    plain category, or to every stored sub-category if it has none.
+        Returns:
+            bool: True if there is something stored and all of it is up to date.
+        """
+        if input_hash is None:
+            return False
+        with self._connect() as conn:
+            rows = conn.execute("""
+                SELECT sub_category, input_hash FROM artifacts AS a
+                WHERE cik = ? AND stage = ? AND category = ? AND archive IS NULL AND version = (
+                    SELECT MAX(version) FROM artifacts AS b
+                    WHERE b.cik = a.cik AND b.stage = a.stage AND b.category = a.category
+                      AND b.sub_category = a.sub_category AND b.archive IS NULL)
+            """, (normalize_cik(cik_number), stage, category)).fetchall()
+        latest_inputs = {row['sub_category']: row['input_hash'] for row in rows}
+        if sub_categories is None:
+            sub_categories = [''] if '' in latest_inputs else list(latest_inputs)
+        return bool(sub_categories) and all(latest_inputs.get(sub_category or '') == input_hash
+                                            for sub_category in sub_categories)
+
+    def last_accessions(self, cik_numbers=None):
+        """
+        Get the newest filing each company's stored data was refreshed from.
+        Args:
+            cik_numbers (iterable of str, optional): Restrict to these companies. All companies if None.
+        Returns:
+            dict: Ten-digit CIK -> accession number.
+        """
+        with self._connect() as conn:
+            rows = conn.execute("SELECT cik, accession FROM refresh_state").fetchall()
+        accessions = {row['cik']: row['accession'] for row in rows}
+        if cik_numbers is None:
+            return accessions
+        ciks = {normalize_cik(cik) for cik in cik_numbers}
+        return {cik: accession for cik, accession in accessions.items() if cik in ciks}
+
+    def record_accession(self, cik_number, accession, filing_date=None):
+        """
+        Record the newest filing a company's stored data was refreshed from.
+        Args:
+            cik_number (str): The company.
+            accession (str): Accession number of the filing.
+            filing_date (str, optional): Filing date, for reference.
+        """
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute("INSERT OR REPLACE INTO refresh_state (cik, accession, filing_date, refreshed_at) "
+                         "VALUES (?, ?, ?, ?)",
+                         (normalize_cik(cik_number), accession, filing_date, time.time()))
+
+    def data_version(self, source):
+        """
+        Returns:
+            str: The current version of a data source, or '' if nothing was ever loaded into it.
+        """
+        with self._connect() as conn:
+            row = conn.execute("SELECT version FROM data_versions WHERE source = ?", (source,)).fetchone()
+        return row['version'] if row else ''
+
+    def bump_data_version(self, source):
+        """
+        Record that new data was loaded into a data source.
+        Args:
+            source (str): The data source, e.g. 'snowflake'.
+        Returns:
+            str: The new version.
+        """
+        version = new_version_id()
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute("INSERT OR REPLACE INTO data_versions (source, version, updated_at) VALUES (?, ?, ?)",
+                         (source, version, time.time()))
+        return version
+
+    def mark_archived(self, paths, archive_path):
+        """
+        Record that stored files were moved into a compacted archive.
+        Args:
+            paths (iterable of str): Paths of the archived files.
+            archive_path (str): The archive now holding them.
+        """
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.executemany("UPDATE artifacts SET archive = ? WHERE path = ?",
+                             [(archive_path, os.path.normpath(path)) for path in paths])
+
+    def remove(self, path):
+        """
+        Forget an artifact, e.g. after its file was deleted.
+        """
+        with self._connect() as conn:
+            conn.execute("DELETE FROM artifacts WHERE path = ?", (os.path.normpath(path),))
+
+    def export_markdown(self, cik_number, stage, index_path=None):
+        """
+        Write the legacy index.md of a CIK and stage: the latest version of every category.
+        Args:
+            cik_number (str): The company.
+            stage (str): The storage type.
+            index_path (str): Where to write; defaults to <base_dir>/<cik>/<stage>/index.md.
+        Returns:
+            str: The path of the written index.
+        """
+        cik = normalize_cik(cik_number)
+        index_path = index_path or os.path.join(self.base_dir, cik, stage, 'index.md')
+        os.makedirs(os.path.dirname(index_path), exist_ok=True)
+        with open(index_path, 'w') as file:
+            file.write(f"---\ntitle: CIK {cik} Data\nslug: /data/{cik}/{stage}/\n---\n\n")
+            for category in self.categories(cik, stage):
+                artifact = self.latest(cik, stage, category)
+                if artifact is None:
+                    continue  # Only sub-categorised artifacts (e.g. chart JSON) in this category
+                relative_path = f"data/{cik}/{stage}/{category.replace(' ', '_')}/{artifact['file_name']}"
+                file.write(f"### {category}\n- [{category} {artifact['version']}]({relative_path})\n\n")
+        return index_path
+
+    def _connect(self):
+        if self.read_only:
+            uri = f"file:{urllib.parse.quote(os.path.abspath(self.db_path))}?mode=ro"
+            conn = sqlite3.connect(uri, uri=True, timeout=30, isolation_level=None)
+        else:
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        return ClosingConnection(conn)
@@ -0,0 +1,209 @@
+'''
+This module provides process-wide throttling and retry handling for requests sent to the SEC.
+SEC fair-access rules allow at most 10 requests per second per client; every caller in the process
+(SECAPIClient, AsyncSECAPIClient and Roster) draws from the same token bucket returned by get_rate_limiter().
+Example usage:
+    configure_rate_limiter(requests_per_second=8, burst=4)
+    response = throttled_get(url, headers={'User-Agent': 'Name <email@example.com>'})
+    print(get_rate_limiter().get_stats())
+'''
+import asyncio
+import email.utils
+import random
+import threading
+import time
+
+import requests
+
+SEC_MAX_REQUESTS_PER_SECOND = 10
+
+
+class TokenBucketRateLimiter:
+    def __init__(self, requests_per_second=SEC_MAX_REQUESTS_PER_SECOND, burst=SEC_MAX_REQUESTS_PER_SECOND):
+        """
+        Initialize the token bucket.
+        Args:
+            requests_per_second (float): Sustained rate at which tokens are refilled.
+            burst (int): Bucket capacity, i.e. how many requests may be sent back to back after an idle period.
+        """
+        self._lock = threading.Lock()
+        self.requests_per_second = float(requests_per_second)
+        self.burst = int(burst)
+        self._tokens = float(burst)
+        self._last_refill = time.monotonic()
+        self.reset_stats()
+
+    def configure(self, requests_per_second=None, burst=None):
+        """
+        Change the rate and/or burst size of the bucket at runtime.
+        """
+        with self._lock:
+            self._refill()
+            if requests_per_second is not None:
+                self.requests_per_second = float(requests_per_second)
+            if burst is not None:
+                self.burst = int(burst)
+                self._tokens = min(self._tokens, self.burst)
+
+    def acquire(self):
+        """
+        Block until a request may be sent.
+        """
+        delay = self._reserve()
+        if delay > 0:
+            time.sleep(delay)
+
+    async def acquire_async(self):
+        """
+        Wait, without blocking the event loop, until a request may be sent.
+        """
+        delay = self._reserve()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def record_retry(self):
+        with self._lock:
+            self._stats['retries'] += 1
+
+    def get_stats(self):
+        """
+        Returns:
+            dict: Counters for requests sent, throttled waits (and total seconds spent waiting) and retries.
+        """
+        with self._lock:
+            return dict(self._stats)
+
+    def reset_stats(self):
+        with self._lock:
+            self._stats = {'requests_sent': 0, 'throttled_waits': 0, 'throttled_seconds': 0.0, 'retries': 0}
+
+    def _reserve(self):
+        """
+        Take a token, letting the balance go negative so that concurrent callers queue up fairly.
+        Returns:
+            float: Seconds the caller has to wait before sending its request.
+        """
+        with self._lock:
+            self._refill()
+            self._tokens -= 1
+            self._stats['requests_sent'] += 1
+            if self._tokens >= 0:
+                return 0.0
+            delay = -self._tokens / self.requests_per_second
+            self._stats['throttled_waits'] += 1
+            self._stats['throttled_seconds'] += delay
+            return delay
+
+    def _refill(self):
+        current = time.monotonic()
+        elapsed = current - self._last_refill
+        self._last_refill = current
+        self._tokens = min(self.burst, self._tokens + elapsed * self.requests_per_second)
+
+
+class RetryPolicy:
+    def __init__(self, max_retries=5, backoff_factor=0.5, max_backoff=60.0, retry_statuses=(429, 500, 502, 503, 504)):
+        """
+        Initialize the retry policy.
+        Args:
+            max_retries (int): Maximum number of retries after the first attempt.
+            backoff_factor (float): Base delay in seconds, doubled on every retry.
+            max_backoff (float): Upper bound for a single delay, including Retry-After values.
+            retry_statuses (tuple of int): HTTP status codes that are retried.
+        """
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.max_backoff = max_backoff
+        self.retry_statuses = frozenset(retry_statuses)
+
+    def should_retry(self, status_code, attempt):
+        return attempt < self.max_retries and status_code in self.retry_statuses
+
+    def get_delay(self, attempt, retry_after=None):
+        """
+        Compute the delay before the next attempt.
+        Args:
+            attempt (int): Zero-based number of the attempt that just failed.
+            retry_after (str): Value of the Retry-After response header, if any.
+        Returns:
+            float: Seconds to wait.
+        """
+        server_delay = parse_retry_after(retry_after)
+        if server_delay is not None:
+            return min(server_delay, self.max_backoff)
+        delay = min(self.max_backoff, self.backoff_factor * (2 ** attempt))
+        return random.uniform(delay / 2, delay)
+
+
+def parse_retry_after(value):
+    """
+    Parse a Retry-After header given either as delta-seconds or as an HTTP date.
+    Returns:
+        float or None: Seconds to wait, or None if the header is missing or malformed.
+    """
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at is None:
+        return None
+    return max(0.0, retry_at.timestamp() - time.time())
+
+
+_RATE_LIMITER = TokenBucketRateLimiter()
+DEFAULT_RETRY_POLICY = RetryPolicy()
+
+
+def get_rate_limiter():
+    """
+    Returns:
+        TokenBucketRateLimiter: The limiter shared by every SEC caller in this process.
+    """
+    return _RATE_LIMITER
+
+
+def configure_rate_limiter(requests_per_second=None, burst=None):
+    _RATE_LIMITER.configure(requests_per_second, burst)
+    return _RATE_LIMITER
+
+
+def throttled_get(url, headers=None, rate_limiter=None, retry_policy=None, **kwargs):
+    """
+    Send a GET request through the shared rate limiter, retrying 429/5xx responses and connection errors
+    with exponential backoff and jitter, honouring Retry-After.
+    Args:
+        url (str): The URL to request.
+        headers (dict): Request headers.
+        rate_limiter (TokenBucketRateLimiter): Limiter to draw from. Defaults to the process-wide limiter.
+        retry_policy (RetryPolicy): Retry policy. Defaults to DEFAULT_RETRY_POLICY.
+        **kwargs: Passed through to requests.get.
+    Returns:
+        requests.Response: The last response received.
+    Raises:
+        requests.exceptions.RequestException: If the last attempt failed without a response.
+    """
+    rate_limiter = rate_limiter or _RATE_LIMITER
+    retry_policy = retry_policy or DEFAULT_RETRY_POLICY
+    attempt = 0
+    while True:
+        rate_limiter.acquire()
+        try:
+            response = requests.get(url, headers=headers, **kwargs)
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+            if attempt >= retry_policy.max_retries:
+                raise
+            delay = retry_policy.get_delay(attempt)
+        else:
+            if not retry_policy.should_retry(response.status_code, attempt):
+                return response
+            delay = retry_policy.get_delay(attempt, response.headers.get('Retry-After'))
+            response.close()
+        rate_limiter.record_retry()
+        time.sleep(delay)
+        attempt += 1
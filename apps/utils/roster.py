@@ -1,41 +1,84 @@
-import requests
+import threading
+import time
+from functools import lru_cache
 
 from apps.types import SECEndpoints, COMPANY_TICKERS, SUBMISSIONS,COMPANY_FACTS
+from .rate_limiter import throttled_get
+
+CIK_ENDPOINTS = {
+    "submissions": SECEndpoints.SUBMISSIONS,
+    "company_facts": SECEndpoints.COMPANY_FACTS,
+}
+
+
+@lru_cache(maxsize=8192)
+def _cik_endpoint_urls(cik):
+    # Templates are only read here, never mutated, so every CIK gets its own URLs
+    return tuple((key, endpoint.full_url().format(cik)) for key, endpoint in CIK_ENDPOINTS.items())
 
 
 class Roster:
-    def __init__(self):
+    # Health check results are shared by every Roster in the process
+    _health_lock = threading.Lock()
+    _last_health_check = None
+
+    def __init__(self, check_health=False, health_check_interval=300):
+        """
+        Build SEC API endpoint URLs for a CIK.
+        Args:
+            check_health (bool): Run the (memoized) API health check whenever a CIK is recruited.
+            health_check_interval (int): Seconds a health check result is reused before the endpoints are probed again.
+        """
         self.cik = None
-        self.api_endpoints = {
+        self.api_endpoint_templates = {
             "company_tickers": SECEndpoints.COMPANY_TICKERS.full_url(),
             "submissions": SECEndpoints.SUBMISSIONS.full_url(),
             "company_facts": SECEndpoints.COMPANY_FACTS.full_url(),
         }
+        self.api_endpoints = dict(self.api_endpoint_templates)
         self.api_status = {}
         self.headers = {'User-Agent': "your_email@example.com"}
+        self.check_health = check_health
+        self.health_check_interval = health_check_interval
 
     def recruit_cik(self, cik: str):
         self.cik = cik
         self._update_api_endpoints(cik)
-        self.api_status = self._check_api_status()
+        if self.check_health:
+            self.api_status = self._check_api_status()
         return self
 
     def _update_api_endpoints(self, cik):
         # Only update endpoints that require a CIK
-        for key in ['submissions', 'company_facts']:
-            self.api_endpoints[key] = self.api_endpoints[key].format(cik)
-
-    def _check_api_status(self):
-        status = {}
-        for endpoint_name, endpoint_url in self.api_endpoints.items():
-            try:
-                response = requests.get(endpoint_url, headers=self.headers)
-                status[endpoint_name] = 'OK' if response.status_code == 200 else f'Failed (Status Code: {response.status_code})'
-            except Exception as e:
-                status[endpoint_name] = f'Error: {str(e)}'
-        return status
-
-    def get_api_status(self):
+        self.api_endpoints = dict(self.api_endpoint_templates)
+        self.api_endpoints.update(_cik_endpoint_urls(cik))
+
+    def _check_api_status(self, force=False):
+        """
+        Probe the endpoints at most once per health_check_interval per process.
+        Args:
+            force (bool): Ignore the memoized result and probe the endpoints again.
+        """
+        with Roster._health_lock:
+            last_check = Roster._last_health_check
+            if not force and last_check and time.monotonic() - last_check[0] < self.health_check_interval:
+                return dict(last_check[1])
+
+            status = {}
+            for endpoint_name, endpoint_url in self.api_endpoints.items():
+                if '{}' in endpoint_url:
+                    continue  # No CIK recruited yet for this endpoint
+                try:
+                    response = throttled_get(endpoint_url, headers=self.headers)
+                    status[endpoint_name] = 'OK' if response.status_code == 200 else f'Failed (Status Code: {response.status_code})'
+                except Exception as e:
+                    status[endpoint_name] = f'Error: {str(e)}'
+            Roster._last_health_check = (time.monotonic(), status)
+            return dict(status)
+
+    def get_api_status(self, force=False):
+        if force or not self.api_status:
+            self.api_status = self._check_api_status(force)
         return self.api_status
 
     def print_cik(self):
@@ -0,0 +1,28 @@
+'''
+This module provides ClosingConnection, the context manager the SQLite-backed stores (the HTTP cache index and
+the manifest) open their short-lived connections with: the transaction is committed, or rolled back on error,
+and the connection is closed when the block exits.
+Example usage:
+    with ClosingConnection(sqlite3.connect(db_path)) as conn:
+        conn.execute("INSERT INTO entries VALUES (?)", (value,))
+'''
+
+
+class ClosingConnection:
+    """
+    Commit-or-rollback and close a sqlite3 connection on exit (sqlite3's own context manager does not close).
+    """
+    def __init__(self, conn):
+        self.conn = conn
+
+    def __enter__(self):
+        return self.conn
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        try:
+            if exc_type is None:
+                self.conn.commit()
+            else:
+                self.conn.rollback()
+        finally:
+            self.conn.close()
@@ -0,0 +1,49 @@
+'''
+Benchmark parsing a companyfacts.zip bulk archive: sequential in-process parsing vs BulkArchiveReader's process pool.
+Usage:
+    python -m benchmarks.bench_bulk_ingest --companies 100 --workers 4
+'''
+import argparse
+import json
+import os
+import tempfile
+import time
+import zipfile
+
+from apps.functions import BulkArchiveReader, SECAPIClient
+from benchmarks.fixtures import write_companyfacts_zip
+
+
+def parse_sequentially(zip_path):
+    client = SECAPIClient(use_http_cache=False)
+    rows = 0
+    with zipfile.ZipFile(zip_path) as archive:
+        for name in archive.namelist():
+            with archive.open(name) as entry:
+                rows += len(client._parse_response(json.load(entry), 'company_facts'))
+    return rows
+
+
+def parse_with_pool(zip_path, workers):
+    return sum(len(df) for _, df in BulkArchiveReader(zip_path, max_workers=workers).iter_company_facts())
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--companies', type=int, default=50)
+    parser.add_argument('--concepts', type=int, default=200)
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        zip_path = write_companyfacts_zip(os.path.join(tmp_dir, 'companyfacts.zip'), args.companies, args.concepts)
+        print(f"archive: {os.path.getsize(zip_path) / 1e6:.1f} MB, {args.companies} companies")
+        for label, run in [('sequential', lambda: parse_sequentially(zip_path)),
+                           (f'pool x{args.workers}', lambda: parse_with_pool(zip_path, args.workers))]:
+            start = time.perf_counter()
+            rows = run()
+            print(f"{label:>14}: {time.perf_counter() - start:.2f}s ({rows} facts)")
+
+
+if __name__ == '__main__':
+    main()
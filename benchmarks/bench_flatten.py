@@ -0,0 +1,60 @@
+'''
+Micro-benchmark of the company facts flattener: the previous dict-per-row loop vs the columnar FactColumns path.
+Usage:
+    python -m benchmarks.bench_flatten --concepts 600 --facts 250
+'''
+import argparse
+import time
+import tracemalloc
+
+import pandas as pd
+
+from apps.functions.responses.facts_flattener import flatten_company_facts
+from benchmarks.fixtures import company_facts
+
+
+def flatten_dict_per_row(response):
+    entityname, cik = response['entityName'], response['cik']
+    all_flattened_data = []
+    for metric_key, metric_data in response['facts']['us-gaap'].items():
+        if 'units' in metric_data and 'USD' in metric_data['units']:
+            all_flattened_data.extend(
+                {'EntityName': entityname, 'CIK': cik, 'Metric': metric_key, **item}
+                for item in metric_data['units']['USD']
+            )
+    return pd.DataFrame(all_flattened_data)
+
+
+def measure(function, response, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function(response)
+        best = min(best, time.perf_counter() - start)
+    tracemalloc.start()
+    function(response)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return best, peak
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--concepts', type=int, default=600)
+    parser.add_argument('--facts', type=int, default=250)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    response = company_facts(concepts=args.concepts, facts_per_concept=args.facts)
+    pd.testing.assert_frame_equal(flatten_dict_per_row(response), flatten_company_facts(response))
+
+    old_time, old_peak = measure(flatten_dict_per_row, response, args.repeat)
+    new_time, new_peak = measure(flatten_company_facts, response, args.repeat)
+    print(f"facts: {args.concepts * args.facts}")
+    print(f"dict-per-row: {old_time:.3f}s, peak {old_peak / 1e6:.0f} MB")
+    print(f"columnar:     {new_time:.3f}s, peak {new_peak / 1e6:.0f} MB")
+    print(f"speedup: {old_time / new_time:.1f}x, peak memory: {new_peak / old_peak:.0%}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,111 @@
+'''
+Micro-benchmark of the preprocessing stage: the previous per-category, row-wise frame parsing
+(DataFrame.apply) vs the vectorized single-pass AnnualDataProcessor / QuarterlyDataProcessor.
+Usage:
+    python -m benchmarks.bench_frame_parsing --facts 1000000
+'''
+import argparse
+import time
+
+import pandas as pd
+
+from apps.functions.data import AnnualDataProcessor, QuarterlyDataProcessor
+from apps.functions.responses.facts_flattener import flatten_company_facts
+from benchmarks.fixtures import USD_CONCEPTS, company_facts
+
+QUARTERLY_CATEGORIES = {
+    'Liquidity': ['AssetsCurrent', 'LiabilitiesCurrent'],
+    'Assets and Liabilities': ['Assets', 'Liabilities', 'StockholdersEquity'],
+    'Profitability': ['OperatingIncomeLoss', 'Revenues', 'NetIncomeLoss'],
+}
+ANNUAL_CATEGORIES = {
+    'Cash Flow': ['NetCashProvidedByUsedInOperatingActivities', 'NetCashProvidedByUsedInInvestingActivities',
+                  'NetCashProvidedByUsedInFinancingActivities'],
+    'Investment Efficiency': ['CapitalExpendituresIncurredButNotYetPaid', 'NetIncomeLoss', 'Assets'],
+}
+
+
+def annual_row_wise(df, metrics):
+    df_metric = df[df['Metric'].isin(metrics)]
+    filtered_df = df_metric[df_metric['form'] == '10-K']
+    filtered_df = filtered_df[filtered_df['frame'].notna()]
+    filtered_df_cleaned = filtered_df.drop(columns=['accn', 'fy', 'fp', 'form', 'filed'])
+
+    def custom_sort_key(frame_value):
+        year = frame_value[2:6]
+        quarter_order = {'Q1': 1, 'Q2': 2, 'Q3': 3, 'Q4': 4, 'FY': 5}
+        quarter = frame_value[6:] if frame_value[6:] in quarter_order else 'FY'
+        return year, quarter_order[quarter]
+    filtered_df_cleaned[['year', 'quarter']] = filtered_df_cleaned['frame'].apply(custom_sort_key).apply(pd.Series)
+    return filtered_df_cleaned.sort_values(by=['year', 'quarter']).drop(columns=['frame'])
+
+
+def quarterly_row_wise(df, metrics):
+    df_cleaned = df[df['Metric'].isin(metrics)].drop(columns=['accn', 'form', 'filed'])
+
+    def extract_year_quarter(row):
+        if pd.notna(row['frame']) and 'Q' in row['frame']:
+            return [row['frame'][2:6], row['frame'][6:8]]
+        return [None, None]
+    df_cleaned[['year', 'quarter']] = df_cleaned.apply(extract_year_quarter, axis=1, result_type="expand")
+    df_cleaned.dropna(subset=['year', 'quarter'], inplace=True)
+    return df_cleaned.sort_values(by=['year', 'quarter']).drop(columns=['frame', 'fp', 'fy'])
+
+
+def row_wise(df):
+    results = {category: quarterly_row_wise(df, metrics) for category, metrics in QUARTERLY_CATEGORIES.items()}
+    results.update({category: annual_row_wise(df, metrics) for category, metrics in ANNUAL_CATEGORIES.items()})
+    return results
+
+
+def vectorized(df):
+    results = QuarterlyDataProcessor(df).process_categories(QUARTERLY_CATEGORIES)
+    results.update(AnnualDataProcessor(df).process_categories(ANNUAL_CATEGORIES))
+    return results
+
+
+def check_equivalent(old, new):
+    # The old code kept year as a string and the annual quarter as 1..5; rows are compared by original index
+    labels = dict(enumerate(['Q1', 'Q2', 'Q3', 'Q4', 'FY'], start=1))
+    for category, old_df in old.items():
+        new_df = new[category].sort_index()
+        old_df = old_df.sort_index()
+        assert (old_df['year'].astype(int) == new_df['year']).all(), category
+        old_quarter = old_df['quarter'].map(labels) if category in ANNUAL_CATEGORIES else old_df['quarter']
+        assert (old_quarter == new_df['quarter'].astype(str)).all(), category
+        order = new[category][['year', 'quarter']]
+        assert order.equals(order.sort_values(by=['year', 'quarter'], kind='stable')), category
+        pd.testing.assert_frame_equal(old_df.drop(columns=['year', 'quarter']),
+                                      new_df.drop(columns=['year', 'quarter']))
+
+
+def measure(function, df, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function(df)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--facts', type=int, default=1000000)
+    parser.add_argument('--repeat', type=int, default=1)
+    args = parser.parse_args()
+
+    # Only the pipeline's own metrics, so that every fact goes through the frame parsing
+    response = company_facts(concepts=len(USD_CONCEPTS), facts_per_concept=args.facts // len(USD_CONCEPTS))
+    df = flatten_company_facts(response, metrics=USD_CONCEPTS)
+
+    old_time, old_result = measure(row_wise, df, args.repeat)
+    new_time, new_result = measure(vectorized, df, args.repeat)
+    check_equivalent(old_result, new_result)
+    print(f"facts: {len(df)}")
+    print(f"row-wise:   {old_time:.3f}s")
+    print(f"vectorized: {new_time:.3f}s")
+    print(f"speedup: {old_time / new_time:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,114 @@
+'''
+Micro-benchmark of the quarterly query functions on a multi-company frame: the previous row-wise
+DataFrame.apply ratios vs the shared vectorized pivot engine.
+Usage:
+    python -m benchmarks.bench_queries --companies 50
+'''
+import argparse
+import io
+import time
+
+import pandas as pd
+
+from apps.functions.data import QuarterlyDataProcessor
+from apps.functions.responses.facts_flattener import flatten_company_facts
+from apps.queries import ASSET_LIABILITIES, LIQUIDITY, PROFITABILITY
+from benchmarks.fixtures import USD_CONCEPTS, company_facts
+
+CATEGORIES = {
+    'Liquidity': ['AssetsCurrent', 'LiabilitiesCurrent'],
+    'Assets Liabilities': ['Assets', 'Liabilities', 'StockholdersEquity'],
+    'Profitability': ['OperatingIncomeLoss', 'Revenues', 'NetIncomeLoss'],
+}
+RENAMES = {'EntityName': 'ENTITY', 'end': 'DATE', 'year': 'Year', 'quarter': 'Quarter'}
+
+
+def _pivot(df, index):
+    pivot_df = df.pivot_table(index=index, columns='Metric', values='val').reset_index()
+    pivot_df.columns.name = None
+    pivot_df['end'] = pd.to_datetime(pivot_df['end'], format='%Y-%m-%d')
+    return pivot_df
+
+
+def liquidity_row_wise(df):
+    pivot_df = _pivot(df, ['EntityName', 'CIK', 'end', 'year', 'quarter'])
+    pivot_df['CurrentAssets'] = pivot_df['AssetsCurrent'] / 1000000
+    pivot_df['CurrentLiabilities'] = pivot_df['LiabilitiesCurrent'] / 1000000
+    pivot_df['CurrentRatio'] = pivot_df.apply(
+        lambda row: row['CurrentAssets'] / row['CurrentLiabilities'] if row['CurrentLiabilities'] > 0 else None, axis=1)
+    return pivot_df[['EntityName', 'CIK', 'end', 'CurrentAssets', 'CurrentLiabilities', 'CurrentRatio', 'year',
+                     'quarter']].rename(columns=RENAMES)
+
+
+def assets_liability_row_wise(df):
+    pivot_df = _pivot(df, ['EntityName', 'CIK', 'end', 'year', 'quarter'])
+    for metric in ['Assets', 'StockholdersEquity', 'Liabilities']:
+        pivot_df[metric] /= 1000000
+    pivot_df['AssetToLiabilityRatio'] = pivot_df.apply(
+        lambda row: row['Assets'] / row['Liabilities'] if pd.notna(row['Liabilities']) else None, axis=1)
+    pivot_df['DebtToEquityRatio'] = pivot_df.apply(
+        lambda row: row['Liabilities'] / row['StockholdersEquity']
+        if pd.notna(row['Liabilities']) and pd.notna(row['StockholdersEquity']) else None, axis=1)
+    return pivot_df[['EntityName', 'CIK', 'end', 'Assets', 'Liabilities', 'StockholdersEquity', 'AssetToLiabilityRatio',
+                     'DebtToEquityRatio', 'year', 'quarter']].rename(columns=RENAMES)
+
+
+def profitability_row_wise(df):
+    pivot_df = _pivot(df, ['EntityName', 'CIK', 'end', 'year', 'quarter', 'start'])
+    for metric in ['NetIncomeLoss', 'Revenues', 'OperatingIncomeLoss']:
+        pivot_df[metric] /= 1000000
+    pivot_df['ProfitMarginPercent'] = pivot_df.apply(
+        lambda row: (row['NetIncomeLoss'] / row['Revenues']) * 100
+        if pd.notna(row['NetIncomeLoss']) and pd.notna(row['Revenues']) and row['Revenues'] != 0 else None, axis=1)
+    return pivot_df[['EntityName', 'CIK', 'end', 'NetIncomeLoss', 'Revenues', 'OperatingIncomeLoss',
+                     'ProfitMarginPercent', 'year', 'quarter']].rename(columns=RENAMES)
+
+
+QUERIES = {
+    'Liquidity': (liquidity_row_wise, LIQUIDITY),
+    'Assets Liabilities': (assets_liability_row_wise, ASSET_LIABILITIES),
+    'Profitability': (profitability_row_wise, PROFITABILITY),
+}
+
+
+def stored_frames(companies, facts_per_concept):
+    # Queries read the preprocessed CSVs, so benchmark on a CSV round trip of the prepared data
+    df = pd.concat([flatten_company_facts(company_facts(cik, len(USD_CONCEPTS), facts_per_concept), USD_CONCEPTS)
+                    for cik in range(1, companies + 1)], ignore_index=True)
+    frames = {}
+    for category, df_category in QuarterlyDataProcessor(df).process_categories(CATEGORIES).items():
+        buffer = io.StringIO()
+        df_category.to_csv(buffer, index=False)
+        buffer.seek(0)
+        frames[category] = pd.read_csv(buffer)
+    return frames
+
+
+def measure(function, df, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function(df)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--companies', type=int, default=50)
+    parser.add_argument('--facts', type=int, default=400)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    frames = stored_frames(args.companies, args.facts)
+    for category, (row_wise, vectorized) in QUERIES.items():
+        old_time, old_result = measure(row_wise, frames[category], args.repeat)
+        new_time, new_result = measure(vectorized, frames[category], args.repeat)
+        pd.testing.assert_frame_equal(old_result.reset_index(drop=True), new_result.reset_index(drop=True),
+                                      check_dtype=False)
+        print(f"{category} ({len(frames[category])} facts): row-wise {old_time * 1000:.1f} ms, "
+              f"vectorized {new_time * 1000:.1f} ms, speedup {old_time / new_time:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,62 @@
+'''
+Micro-benchmark of the DataStorageManager storage formats: file size, write time and read time
+(full and column-projected) of a processed frame stored as CSV, Parquet and Feather.
+Usage:
+    python -m benchmarks.bench_storage_formats --companies 50
+'''
+import argparse
+import os
+import tempfile
+import time
+
+import pandas as pd
+
+from apps.functions.data import QuarterlyDataProcessor
+from apps.functions.responses.facts_flattener import flatten_company_facts
+from apps.functions.storages.storage_formats import STORAGE_FORMATS
+from apps.queries import PROFITABILITY
+from benchmarks.fixtures import USD_CONCEPTS, company_facts
+
+PROJECTION = ['DATE', 'Revenues', 'ProfitMarginPercent']
+
+
+def processed_frame(companies, facts_per_concept):
+    df = pd.concat([flatten_company_facts(company_facts(cik, len(USD_CONCEPTS), facts_per_concept), USD_CONCEPTS)
+                    for cik in range(1, companies + 1)], ignore_index=True)
+    metrics = ['OperatingIncomeLoss', 'Revenues', 'NetIncomeLoss']
+    return PROFITABILITY(QuarterlyDataProcessor(df).process_data(metrics))
+
+
+def best_of(function, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--companies', type=int, default=50)
+    parser.add_argument('--facts', type=int, default=2000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    df = processed_frame(args.companies, args.facts)
+    print(f"rows: {len(df)}")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for name, storage_format in STORAGE_FORMATS.items():
+            if not storage_format.available:
+                print(f"{name}: skipped (pyarrow is not installed)")
+                continue
+            file_path = os.path.join(tmp_dir, f"processed{storage_format.extension}")
+            write_time = best_of(lambda: storage_format.write(df, file_path), args.repeat)
+            read_time = best_of(lambda: storage_format.read(file_path), args.repeat)
+            projected_time = best_of(lambda: storage_format.read(file_path, columns=PROJECTION), args.repeat)
+            print(f"{name}: {os.path.getsize(file_path) / 1e6:.2f} MB, write {write_time * 1000:.1f} ms, "
+                  f"read {read_time * 1000:.1f} ms, read {len(PROJECTION)} columns {projected_time * 1000:.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,212 @@
+'''
+Check of the Snowflake bulk loader against a fake connector that records the commands issued.
+The fake stage keeps a copy of every PUT file and COPY reads back the files under its prefix, so the check
+verifies the loaded rows as well as the commands: compressed chunks, one COPY per load, and no clobbering
+between loads running concurrently into the same table. Tables have the fact table's columns and a COPY or
+MERGE naming a column the table does not have fails, like Snowflake's invalid identifier error, so a
+preprocessed frame ('end', 'val', 'year', ...) must be loaded and merged by table column name. The upsert path is checked for its command sequence:
+transient staging table, load of the deduplicated rows, one MERGE on the key columns and the staging table dropped.
+Usage:
+    python -m benchmarks.check_snowflake_bulk_load --loads 8 --rows 50000 --chunk-rows 10000
+'''
+import argparse
+import os
+import re
+import shutil
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+from apps.functions.storages import SnowflakeBulkLoader, SnowflakeDataManager, read_frame
+from apps.functions.storages.storage_formats import PYARROW_AVAILABLE
+from apps.types import FACT_TABLE_COLUMNS
+
+PUT_PATTERN = re.compile(r"^PUT 'file://(?P<path>[^']+)' (?P<stage>@%\w+/\S+/) AUTO_COMPRESS=FALSE OVERWRITE=TRUE$")
+COPY_PATTERN = re.compile(r"^COPY INTO (?P<table>\w+)(?: \((?P<columns>[^)]*)\))? FROM (?:\(SELECT [^)]* FROM )?"
+                          r"(?P<stage>@%\w+/\S+/)\)? .*PURGE = TRUE$")
+CREATE_LIKE_PATTERN = re.compile(r"^CREATE TRANSIENT TABLE (?P<table>\w+) LIKE (?P<source>\w+)$")
+MERGE_PATTERN = re.compile(r"^MERGE INTO (?P<table>\w+) AS t\s+USING \(\s+SELECT (?P<select>[^\n]*) FROM (?P<staging>\w+)"
+                           r"\s+QUALIFY ROW_NUMBER\(\) OVER \(PARTITION BY (?P<partition>[^)]*) ORDER BY (?P<order>\w+) DESC\)"
+                           r".*INSERT \((?P<insert>[^)]*)\)", re.DOTALL)
+OTHER_COMMANDS = ('DROP TABLE IF EXISTS',)
+
+
+class FakeConnection:
+    """
+    Stands in for a Snowflake connection: records every command and emulates table stages and tables.
+    """
+    def __init__(self, stage_dir, put_latency=0.01):
+        self.stage_dir = stage_dir
+        self.put_latency = put_latency
+        self.commands = []
+        self.tables = {}
+        self.schemas = {'FACTS': FACT_TABLE_COLUMNS}
+        self._lock = threading.Lock()
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def check_columns(self, table, columns):
+        known = {column.lower() for column in self.schemas[table]}
+        unknown = sorted({column for column in columns if column.lower() not in known})
+        if unknown:
+            raise AssertionError(f"invalid identifier(s) {unknown} for table {table}")
+
+    def execute(self, command):
+        command = command.strip()
+        with self._lock:
+            self.commands.append(command)
+        create = CREATE_LIKE_PATTERN.match(command)
+        if create:
+            self.schemas[create['table']] = self.schemas[create['source']]
+            return
+        merge = MERGE_PATTERN.match(command)
+        if merge:
+            identifiers = re.findall(r"\b[ts]\.(\w+)", command) + [merge['order']]
+            for names in (merge['select'], merge['partition'], merge['insert']):
+                identifiers += [name.strip() for name in names.split(',')]
+            self.check_columns(merge['table'], identifiers)
+            self.check_columns(merge['staging'], identifiers)
+            return
+        put = PUT_PATTERN.match(command)
+        if put:
+            time.sleep(self.put_latency)  # Network round trip
+            target = os.path.join(self.stage_dir, put['stage'].strip('@%/').replace('/', os.sep))
+            os.makedirs(target, exist_ok=True)
+            shutil.copy(put['path'], target)
+            return
+        copy = COPY_PATTERN.match(command)
+        if copy:
+            source = os.path.join(self.stage_dir, copy['stage'].strip('@%/').replace('/', os.sep))
+            frames = [read_frame(os.path.join(source, name)) if name.endswith('.parquet')
+                      else pd.read_csv(os.path.join(source, name), compression='gzip')
+                      for name in sorted(os.listdir(source))]
+            columns = [column.strip() for column in copy['columns'].split(',')] if copy['columns'] else None
+            for frame in frames:
+                # Parquet matches by name: a column the table does not have would be skipped silently
+                self.check_columns(copy['table'], columns or frame.columns)
+            with self._lock:
+                self.tables.setdefault(copy['table'], []).extend(frames)
+            shutil.rmtree(source)  # PURGE = TRUE
+            return
+        if command.startswith(OTHER_COMMANDS):
+            return
+        raise AssertionError(f"unexpected command: {command}")
+
+
+class FakeCursor:
+    def __init__(self, connection):
+        self.connection = connection
+
+    def execute(self, command):
+        self.connection.execute(command)
+
+    def fetchone(self):
+        return (0, 0)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+
+def _frame(load, rows):
+    return pd.DataFrame({'EntityName': f'Company {load}', 'CIK': load, 'Metric': 'Assets',
+                         'End': '2023-12-31', 'Value': range(rows)})
+
+
+def _preprocessed_frame(rows):
+    # The layout preprocess_data uploads: pipeline column names and derived columns the table does not have
+    end = pd.date_range('1990-03-31', periods=rows, freq='D')
+    return pd.DataFrame({'EntityName': 'Company 1', 'CIK': 1, 'Metric': 'Assets', 'end': end.strftime('%Y-%m-%d'),
+                         'val': range(rows), 'start': (end - pd.Timedelta(days=90)).strftime('%Y-%m-%d'),
+                         'year': end.year, 'quarter': 'Q1'})
+
+
+def check_preprocessed_load(stage_dir, file_format):
+    connection = FakeConnection(stage_dir, put_latency=0)
+    loader = SnowflakeBulkLoader(connection, chunk_rows=1000, file_format=file_format)
+    result = loader.load(_preprocessed_frame(2500), 'FACTS')
+    assert 'error' not in result, result
+    loaded = pd.concat(connection.tables['FACTS'], ignore_index=True)
+    assert list(loaded.columns) == ['EntityName', 'CIK', 'Metric', 'End', 'Value', 'start'], list(loaded.columns)
+    assert loaded['Value'].notna().all() and (loaded['Value'] == range(2500)).all(), 'values not loaded'
+    print(f"preprocessed frame ({file_format}): {len(loaded)} rows loaded by table column name: OK")
+
+
+def check_upsert(stage_dir):
+    connection = FakeConnection(stage_dir, put_latency=0)
+    manager = SnowflakeDataManager(_NoConfig(), connection=connection, upload_chunk_rows=1000)
+    quarterly = _preprocessed_frame(2500)
+    # Year-to-date facts ending on the same dates are other facts, told apart by their start
+    year_to_date = quarterly.head(200).assign(start='1989-01-01', val=-2)
+    # A rerun of the first 500 quarterly facts, e.g. restated values
+    facts = pd.concat([quarterly, year_to_date, quarterly.head(500).assign(val=-1)], ignore_index=True)
+    result = manager.upsert_data(facts, 'FACTS')
+    assert 'error' not in result, result
+
+    commands = [command.strip() for command in connection.commands]
+    staging_table = commands[0].split()[3]
+    assert commands[0] == f"CREATE TRANSIENT TABLE {staging_table} LIKE FACTS"
+    assert commands[-1] == f"DROP TABLE IF EXISTS {staging_table}"
+    merge = next(command for command in commands if command.startswith('MERGE INTO FACTS'))
+    assert all(f"EQUAL_NULL(t.{key}, s.{key})" in merge for key in ('CIK', 'Metric', 'start', 'End')), merge
+    assert 'QUALIFY ROW_NUMBER()' in merge and 'WHEN NOT MATCHED THEN INSERT' in merge
+    staged = pd.concat(connection.tables[staging_table], ignore_index=True)
+    assert len(staged) == result['rows'] == 2700, 'duplicate keys were staged or distinct facts dropped'
+    assert staged['Value'].notna().all(), 'values not staged'
+    rerun = staged[staged['End'].isin(quarterly['end'].head(500)) & (staged['start'] != '1989-01-01')]
+    assert len(rerun) == 500 and (rerun['Value'] == -1).all(), 'the later duplicate did not win'
+    assert (staged['start'] == '1989-01-01').sum() == 200, 'facts with another start were dropped'
+    print(f"upsert: {len(staged)} of {len(facts)} rows staged, one MERGE, staging table dropped: OK")
+
+
+class _NoConfig:
+    user = password = account = warehouse = database = schema = port = role = None
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--loads', type=int, default=8)
+    parser.add_argument('--rows', type=int, default=50000)
+    parser.add_argument('--chunk-rows', type=int, default=10000)
+    parser.add_argument('--workers', type=int, default=4)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as stage_dir:
+        connection = FakeConnection(stage_dir)
+        loader = SnowflakeBulkLoader(connection, chunk_rows=args.chunk_rows, max_workers=args.workers)
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.loads) as executor:
+            results = list(executor.map(lambda load: loader.load(_frame(load, args.rows), 'FACTS'),
+                                        range(args.loads)))
+        elapsed = time.perf_counter() - start
+
+        chunks_per_load = -(-args.rows // args.chunk_rows)
+        puts = [command for command in connection.commands if command.startswith('PUT')]
+        copies = [command for command in connection.commands if command.startswith('COPY')]
+        assert all('error' not in result for result in results), results
+        assert len({result['stage_path'] for result in results}) == args.loads, 'loads shared a stage prefix'
+        assert len(copies) == args.loads, 'expected one COPY per load'
+        assert len(puts) == args.loads * chunks_per_load, 'unexpected number of PUTs'
+        assert all(command.split("'")[1].endswith(('.parquet', '.csv.gz')) for command in puts), 'uncompressed PUT'
+        loaded = pd.concat(connection.tables['FACTS'], ignore_index=True)
+        assert len(loaded) == args.loads * args.rows, 'rows lost or duplicated'
+        assert (loaded.groupby('CIK')['Value'].nunique() == args.rows).all(), 'loads clobbered each other'
+        assert not any(files for _, _, files in os.walk(stage_dir)), 'stage not purged'
+        print(f"{args.loads} concurrent loads, {len(puts)} PUTs, {len(copies)} COPYs, "
+              f"{len(loaded)} rows in {elapsed:.2f}s: OK")
+
+    for file_format in ('parquet', 'csv') if PYARROW_AVAILABLE else ('csv',):
+        with tempfile.TemporaryDirectory() as stage_dir:
+            check_preprocessed_load(stage_dir, file_format)
+    with tempfile.TemporaryDirectory() as stage_dir:
+        check_upsert(stage_dir)
+
+
+if __name__ == '__main__':
+    main()
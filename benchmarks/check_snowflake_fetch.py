@@ -0,0 +1,124 @@
+'''
+Check of the Snowflake result fetching paths against fake cursors: the Arrow path (fetch_pandas_batches) and
+the tuple fallback (fetchmany) must return the same data, iter_data must stream (a consumer that stops early
+only pulls the chunks it read) and get_data must match the old fetchall-then-DataFrame result.
+Usage:
+    python -m benchmarks.check_snowflake_fetch --rows 1000000 --chunk-rows 100000
+'''
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+from snowflake.connector.errors import NotSupportedError
+
+from apps.functions.storages import SnowflakeDataManager
+
+
+class FakeResult:
+    """
+    A result set generated chunk by chunk, counting the chunks materialized.
+    """
+    def __init__(self, rows, chunk_rows):
+        self.rows = rows
+        self.chunk_rows = chunk_rows
+        self.chunks_read = 0
+
+    def chunk(self, start, stop):
+        self.chunks_read += 1
+        values = np.arange(start, stop)
+        return pd.DataFrame({'CIK': values % 50, 'METRIC': 'Assets', 'VAL': values * 1.5})
+
+    def frames(self):
+        for start in range(0, self.rows, self.chunk_rows):
+            yield self.chunk(start, min(start + self.chunk_rows, self.rows))
+
+
+class FakeCursor:
+    description = [('CIK',), ('METRIC',), ('VAL',)]
+
+    def __init__(self, result, arrow):
+        self.result = result
+        self.arrow = arrow
+        self._tuples = None
+
+    def execute(self, statement):
+        pass
+
+    def fetch_pandas_batches(self):
+        if not self.arrow:
+            raise NotSupportedError
+        return self.result.frames()
+
+    def fetchmany(self, size):
+        if self._tuples is None:
+            self._tuples = (row for frame in self.result.frames() for row in frame.itertuples(index=False))
+        return [tuple(row) for _, row in zip(range(size), self._tuples)]
+
+    def fetchall(self):
+        return self.fetchmany(self.result.rows)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+
+class FakeConnection:
+    def __init__(self, result, arrow):
+        self.result = result
+        self.arrow = arrow
+
+    def cursor(self):
+        return FakeCursor(self.result, self.arrow)
+
+
+class _NoConfig:
+    user = password = account = warehouse = database = schema = port = role = None
+
+
+def _manager(rows, chunk_rows, arrow):
+    result = FakeResult(rows, chunk_rows)
+    return SnowflakeDataManager(_NoConfig(), connection=FakeConnection(result, arrow)), result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=1000000)
+    parser.add_argument('--chunk-rows', type=int, default=100000)
+    args = parser.parse_args()
+
+    # Old path: every row as a Python tuple, then one DataFrame
+    manager, result = _manager(args.rows, args.chunk_rows, arrow=False)
+    start = time.perf_counter()
+    cursor = manager.connection.cursor()
+    expected = pd.DataFrame(cursor.fetchall(), columns=[col[0] for col in cursor.description])
+    tuples_time = time.perf_counter() - start
+
+    manager, result = _manager(args.rows, args.chunk_rows, arrow=True)
+    start = time.perf_counter()
+    arrow = manager.get_data('SELECT * FROM FACTS')
+    arrow_time = time.perf_counter() - start
+    pd.testing.assert_frame_equal(arrow, expected, check_dtype=False)
+
+    manager, result = _manager(args.rows, args.chunk_rows, arrow=False)
+    fallback = manager.get_data('SELECT * FROM FACTS')
+    pd.testing.assert_frame_equal(fallback, expected, check_dtype=False)
+
+    manager, result = _manager(args.rows, args.chunk_rows, arrow=True)
+    stream = manager.iter_data('SELECT * FROM FACTS')
+    first = next(stream)
+    stream.close()
+    assert len(first) == args.chunk_rows and result.chunks_read == 1, 'iter_data materialized the whole result'
+
+    manager, result = _manager(args.rows, args.chunk_rows, arrow=False)
+    sizes = [len(chunk) for chunk in manager.iter_data('SELECT * FROM FACTS', batch_size=args.chunk_rows // 2)]
+    assert sum(sizes) == args.rows and max(sizes) == args.chunk_rows // 2, 'fallback chunks are wrong'
+
+    print(f"{args.rows} rows: fetchall + DataFrame {tuples_time:.2f}s, Arrow batches {arrow_time:.2f}s; "
+          f"tuple fallback identical; iter_data streams: OK")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,132 @@
+'''
+Check of the Snowflake connection pool against a fake connector that counts connects.
+One SnowflakeDataManager per CIK runs queries from several threads, like a multi-company pipeline run:
+the pool must open no more than max_size sessions in total, drop a session that was closed under it and
+ping sessions that sat idle for longer than ping_after.
+Usage:
+    python -m benchmarks.check_snowflake_pool --companies 200 --threads 8 --pool-size 3
+'''
+import argparse
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from apps.functions.storages import SnowflakeConnectionPool, SnowflakeDataManager
+
+HANDSHAKE_SECONDS = 0.05
+
+
+class FakeConnector:
+    """
+    Opens fake connections, counting connects; every connect pays a simulated authentication handshake.
+    """
+    def __init__(self):
+        self.connects = 0
+        self.in_use = 0
+        self.max_in_use = 0
+        self._lock = threading.Lock()
+
+    def connect(self):
+        time.sleep(HANDSHAKE_SECONDS)
+        with self._lock:
+            self.connects += 1
+        return FakeConnection(self)
+
+
+class FakeConnection:
+    def __init__(self, connector):
+        self.connector = connector
+        self.closed = False
+        self.statements = []
+        self.pending = []  # Rows of the last statement not fetched yet
+
+    def is_closed(self):
+        return self.closed
+
+    def close(self):
+        self.closed = True
+
+    def cursor(self):
+        return FakeCursor(self)
+
+
+class FakeCursor:
+    description = [('ONE',)]
+
+    def __init__(self, connection):
+        self.connection = connection
+
+    def execute(self, statement):
+        assert not self.connection.closed, 'statement on a closed connection'
+        self.connection.statements.append(statement)
+        self.connection.pending = [(1,)]
+        connector = self.connection.connector
+        with connector._lock:
+            connector.in_use += 1
+            connector.max_in_use = max(connector.max_in_use, connector.in_use)
+        time.sleep(0.001)
+        with connector._lock:
+            connector.in_use -= 1
+
+    def fetchmany(self, size):
+        rows, self.connection.pending = self.connection.pending[:size], self.connection.pending[size:]
+        return rows
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+
+class _NoConfig:
+    user = password = account = warehouse = database = schema = port = role = None
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--companies', type=int, default=200)
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--pool-size', type=int, default=3)
+    args = parser.parse_args()
+
+    connector = FakeConnector()
+    pool = SnowflakeConnectionPool(connector.connect, max_size=args.pool_size)
+
+    def run_company(cik):
+        # A fresh manager per company, as DataPipelineIntegration creates one per CIK
+        manager = SnowflakeDataManager(_NoConfig(), pool=pool)
+        return len(manager.get_data(f"SELECT 1 /* CIK {cik} */"))
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.threads) as executor:
+        rows = list(executor.map(run_company, range(args.companies)))
+    elapsed = time.perf_counter() - start
+    stats = pool.get_stats()
+
+    assert rows == [1] * args.companies, 'queries failed'
+    assert connector.connects <= args.pool_size, f'{connector.connects} connects for a pool of {args.pool_size}'
+    assert connector.max_in_use <= args.pool_size, 'more sessions in use than the pool allows'
+    unpooled = args.companies * HANDSHAKE_SECONDS
+    print(f"{args.companies} companies on {args.threads} threads: {connector.connects} connects, "
+          f"{stats['reuses']} reuses, {stats['waits']} waits in {elapsed:.2f}s "
+          f"(about {unpooled:.1f}s of handshakes without the pool): OK")
+
+    # A session closed under the pool is dropped on checkout
+    with pool.connection() as connection:
+        connection.close()
+    with pool.connection() as connection:
+        assert not connection.closed, 'closed session reused'
+    assert pool.get_stats()['discarded'] == 1
+
+    # Sessions idle for longer than ping_after are pinged before they are handed out
+    pool.ping_after = 0
+    with pool.connection() as connection:
+        assert connection.statements[-1] == 'SELECT 1', 'idle session not pinged'
+    pool.close_all()
+    assert pool.get_stats()['open'] == 0
+    print("closed session dropped, idle session pinged, pool closed: OK")
+
+
+if __name__ == '__main__':
+    main()
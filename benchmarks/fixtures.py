@@ -0,0 +1,59 @@
+'''
+Synthetic SEC companyfacts payloads shaped like the real API responses, used by the benchmarks.
+'''
+import json
+import random
+import zipfile
+
+USD_CONCEPTS = ['Assets', 'Liabilities', 'StockholdersEquity', 'AssetsCurrent', 'LiabilitiesCurrent',
+                'OperatingIncomeLoss', 'Revenues', 'NetIncomeLoss', 'CapitalExpendituresIncurredButNotYetPaid',
+                'NetCashProvidedByUsedInOperatingActivities', 'NetCashProvidedByUsedInInvestingActivities',
+                'NetCashProvidedByUsedInFinancingActivities']
+INSTANT_CONCEPTS = {'Assets', 'Liabilities', 'StockholdersEquity', 'AssetsCurrent', 'LiabilitiesCurrent'}
+
+
+def _facts(rng, count, instant):
+    facts = []
+    for i in range(count):
+        year = 2008 + (i // 4) % 16
+        quarter = i % 4 + 1
+        fact = {
+            'end': f'{year}-{quarter * 3:02d}-28',
+            'val': float(rng.randint(-10 ** 9, 10 ** 10)),
+            'accn': f'0000012927-{year % 100:02d}-{i:06d}',
+            'fy': year,
+            'fp': f'Q{quarter}' if quarter < 4 else 'FY',
+            'form': '10-Q' if quarter < 4 else '10-K',
+            'filed': f'{year + 1}-02-01',
+        }
+        if not instant:
+            fact = {'start': f'{year}-{quarter * 3 - 2:02d}-01', **fact}
+        if i % 3 == 0:
+            fact['frame'] = f'CY{year}Q{quarter}' + ('I' if instant else '') if quarter < 4 else f'CY{year}'
+        facts.append(fact)
+    return facts
+
+
+def company_facts(cik=12927, concepts=400, facts_per_concept=120, seed=0):
+    """
+    Build a companyfacts payload with the given number of us-gaap concepts.
+    The real metrics used by the pipeline are always included; the rest are filler concepts.
+    """
+    rng = random.Random(seed + cik)
+    names = USD_CONCEPTS + [f'FillerConcept{i}' for i in range(max(0, concepts - len(USD_CONCEPTS)))]
+    us_gaap = {}
+    for index, name in enumerate(names):
+        instant = name in INSTANT_CONCEPTS or (name.startswith('Filler') and index % 2 == 0)
+        units = {'USD': _facts(rng, facts_per_concept, instant)}
+        us_gaap[name] = {'label': name, 'description': f'{name} description', 'units': units}
+    us_gaap['EarningsPerShareBasic'] = {'label': 'EPS', 'units': {'USD/shares': _facts(rng, facts_per_concept, False)}}
+    dei = {'EntityCommonStockSharesOutstanding': {'label': 'Shares', 'units': {'shares': _facts(rng, 40, True)}}}
+    return {'cik': cik, 'entityName': f'COMPANY {cik}', 'facts': {'dei': dei, 'us-gaap': us_gaap}}
+
+
+def write_companyfacts_zip(zip_path, companies=50, concepts=400, facts_per_concept=120):
+    with zipfile.ZipFile(zip_path, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        for cik in range(1, companies + 1):
+            payload = company_facts(cik, concepts, facts_per_concept)
+            archive.writestr(f'CIK{cik:010d}.json', json.dumps(payload))
+    return zip_path
@@ -0,0 +1,92 @@
+'''
+Stress check of concurrent writers on one storage directory: several processes, each with several threads,
+store versions of the same CIK and category while some writers crash mid-write.
+Afterwards every version must be complete and readable, no temp files may be left behind and the
+latest pointer must name the newest version.
+Usage:
+    python -m benchmarks.stress_concurrent_writes --processes 4 --threads 4 --writes 25
+'''
+import argparse
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import pandas as pd
+
+from apps.functions.storages import DataStorageManager, read_frame
+from apps.utils import latest_file
+
+CIK = '0000012927'
+CATEGORY = 'Profitability'
+ROWS = 2000
+
+
+class CrashingFrame(pd.DataFrame):
+    """
+    A frame whose CSV export dies halfway through, like a worker killed mid-write.
+    """
+    def to_csv(self, path_or_buf=None, **kwargs):
+        with open(path_or_buf, 'w') as file:
+            file.write(super().to_csv(**kwargs)[:1000])
+        raise RuntimeError('simulated crash')
+
+
+def _frame(writer, index):
+    return pd.DataFrame({'writer': writer, 'index': index, 'val': range(ROWS)})
+
+
+def _write(storage_dir, writer, writes, crash_every):
+    manager = DataStorageManager(storage_dir, CIK, storage_formats={})
+    stored = []
+    for index in range(writes):
+        data = _frame(writer, index)
+        if crash_every and index % crash_every == crash_every - 1:
+            data = CrashingFrame(data)
+        file_name = manager.store_data(data, 'processed_data', CATEGORY)
+        if file_name:
+            stored.append(file_name)
+    return stored
+
+
+def _process(storage_dir, process_index, threads, writes, crash_every):
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        futures = [executor.submit(_write, storage_dir, f"{process_index}-{thread}", writes, crash_every)
+                   for thread in range(threads)]
+        return [file_name for future in futures for file_name in future.result()]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--processes', type=int, default=4)
+    parser.add_argument('--threads', type=int, default=4)
+    parser.add_argument('--writes', type=int, default=25)
+    parser.add_argument('--crash-every', type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as storage_dir:
+        start = time.perf_counter()
+        with ProcessPoolExecutor(max_workers=args.processes) as executor:
+            futures = [executor.submit(_process, storage_dir, process, args.threads, args.writes, args.crash_every)
+                       for process in range(args.processes)]
+            stored = [file_name for future in futures for file_name in future.result()]
+        elapsed = time.perf_counter() - start
+
+        writers = args.processes * args.threads
+        crashes = writers * (args.writes // args.crash_every if args.crash_every else 0)
+        dir_path = os.path.join(storage_dir, CIK, 'processed_data', CATEGORY)
+        files = sorted(name for name in os.listdir(dir_path) if not name.startswith('.'))
+        leftovers = [name for name in os.listdir(dir_path) if name.endswith('.tmp')]
+
+        assert len(stored) == len(set(stored)) == writers * args.writes - crashes, 'version names collided'
+        assert files == sorted(stored), 'stored files and reported versions differ'
+        assert not leftovers, f'temp files left behind: {leftovers}'
+        for name in files:
+            assert len(read_frame(os.path.join(dir_path, name))) == ROWS, f'{name} is incomplete'
+        assert os.path.basename(latest_file(dir_path)) == max(stored, key=lambda name: name.split('_')[-1]), \
+            'latest pointer does not name the newest version'
+        print(f"{len(stored)} versions from {writers} writers ({crashes} simulated crashes) in {elapsed:.2f}s: OK")
+
+
+if __name__ == '__main__':
+    main()
@@ -10,6 +10,7 @@ import markdown
 from bs4 import BeautifulSoup
 import json
 
+from apps.utils import MANIFEST_FILE, ManifestStore, latest_file
 from chat.configs import MODEL, TEMPERATURE, SYSTEM_PROMPT
 
 
@@ -22,11 +23,7 @@ class DataLoader:
         Construct path to csv file in directory path of a specific query and cik number.
         '''
         folder_path = os.path.join(self.base_dir, str(cik), 'processed_json', query_type)
-        files = os.listdir(folder_path)
-        if files:
-            latest_file = max(files, key=lambda x: os.path.getctime(os.path.join(folder_path, x)))
-            return os.path.join(folder_path, latest_file)
-        return None
+        return latest_file(folder_path)
 
     def construct_directory_path(self,cik, query_type):
         '''
@@ -81,6 +78,12 @@ class DataLoader:
         """
         Returns a list of available query types for a given CIK number.
         """
+        # Read-only: the dashboard must not create or migrate the pipeline's manifest
+        if os.path.exists(os.path.join(self.base_dir, MANIFEST_FILE)):
+            query_types = ManifestStore(self.base_dir, read_only=True).categories(cik, 'processed_json')
+            if query_types:
+                return query_types
+        # Stores written before the manifest existed only have the markdown index
         index_file_path = os.path.join(self.base_dir, cik, 'processed_json', 'index.md')
         if os.path.exists(index_file_path):
             with open(index_file_path, 'r') as file:
@@ -112,9 +115,4 @@ class DataLoader:
         Construct path to the JSON file for a specific chart type.
         '''
         folder_path = os.path.join(self.base_dir, str(cik), 'processed_json', query_type, chart_type)
-        if os.path.isdir(folder_path):
-            files = os.listdir(folder_path)
-            if files:
-                latest_file = max(files, key=lambda x: os.path.getctime(os.path.join(folder_path, x)))
-                return os.path.join(folder_path, latest_file)
-        return None
\ No newline at end of file
+        return latest_file(folder_path)